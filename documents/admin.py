@@ -10,9 +10,9 @@ from .models import Document
 class DocumentAdmin(admin.ModelAdmin):
     """Documents admin model."""
 
-    list_display = ["id", "uploaded", "document", "title"]
-    readonly_fields = ["id", "uploaded"]
-    fields = ["id", "uploaded", "document", "title", "description"]
+    list_display = ["id", "uploaded", "document", "title", "size", "content_type"]
+    readonly_fields = ["id", "uploaded", "size", "content_type", "checksum"]
+    fields = ["id", "uploaded", "document", "title", "description", "size", "content_type", "checksum"]
     search_fields = ["title", "description"]
 
 
@@ -3,11 +3,24 @@ Documents application config.
 """
 
 from django.apps import AppConfig
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_migrate
 from django.utils.translation import gettext_lazy as _
 
 
+def ensure_text_search_index(sender: AppConfig, using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """Recreate document text search triggers after migrations, see `taskcamp.search.SearchIndex.ensure`."""
+    from .search import TEXT_SEARCH_INDEX
+
+    TEXT_SEARCH_INDEX.ensure(connections[using])
+
+
 class DocumentConfig(AppConfig):
     """Documents application config class."""
 
     name = "documents"
     verbose_name = _("Documents")
+
+    def ready(self) -> None:
+        """Connect signal handlers."""
+        post_migrate.connect(ensure_text_search_index, sender=self)
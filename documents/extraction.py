@@ -0,0 +1,172 @@
+"""
+Document text extraction module.
+
+Text of uploaded documents is extracted by `worker.documents` celery worker
+and stored to `DocumentText` side table indexed for full text search
+(see `documents.search`), so task search matches attachments
+without reading files at query time.
+
+Supported formats:
+    text: plain text, Markdown, CSV and other `text/*` types
+    PDF: with `pdftotext` (poppler-utils), optional
+    office documents: Office Open XML (docx, xlsx, pptx) and OpenDocument
+        (odt, ods, odp), parsed with standard library zip and xml modules
+
+Attributes:
+    OFFICE_TEXT_PARTS: zip members containing text of office document formats
+    TextUnavailable: exception raised when text can't be extracted
+
+Methods:
+    get_extractor: get text extractor for document MIME type
+    compact_text: collapse whitespaces and truncate text
+    extract_plain_text: read text file
+    extract_pdf_text: extract PDF text with pdftotext
+    extract_office_text: extract text of office document
+"""
+
+import re
+import shutil
+import subprocess
+import zipfile
+from functools import partial
+from typing import Callable, Iterator, Optional
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+OPENDOCUMENT_TEXT_PARTS = re.compile(r"^content\.xml$")
+
+OFFICE_TEXT_PARTS = {
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": re.compile(
+        r"^word/(document|header\d*|footer\d*|footnotes)\.xml$"
+    ),
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": re.compile(r"^xl/sharedStrings\.xml$"),
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": re.compile(
+        r"^ppt/slides/slide\d+\.xml$"
+    ),
+    "application/vnd.oasis.opendocument.text": OPENDOCUMENT_TEXT_PARTS,
+    "application/vnd.oasis.opendocument.spreadsheet": OPENDOCUMENT_TEXT_PARTS,
+    "application/vnd.oasis.opendocument.presentation": OPENDOCUMENT_TEXT_PARTS,
+}
+
+
+class TextUnavailable(Exception):
+    """Text can't be extracted: extractor is not installed or document is broken."""
+
+
+def compact_text(text: str, max_size: int) -> str:
+    """Collapse whitespaces and truncate text.
+
+    Args:
+        text: extracted text
+        max_size: max number of characters
+
+    Returns:
+        (str): compact text
+    """
+    return " ".join(text.split())[:max_size]
+
+
+def extract_plain_text(path: str, max_size: int) -> str:
+    """Read text file, undecodable bytes are replaced.
+
+    Args:
+        path: file path
+        max_size: max number of characters to read
+
+    Returns:
+        (str): text
+    """
+    with open(path, encoding="utf-8", errors="replace") as file:
+        return file.read(max_size)
+
+
+def extract_pdf_text(path: str, max_size: int) -> str:
+    """Extract PDF text with `pdftotext` subprocess limited by `DOCUMENTS_PREVIEW_TIMEOUT` seconds.
+
+    Args:
+        path: PDF file path
+        max_size: max number of characters
+
+    Returns:
+        (str): text
+
+    Raises:
+        TextUnavailable: if pdftotext is not installed, failed or timed out
+    """
+    executable = shutil.which("pdftotext")
+    if executable is None:
+        raise TextUnavailable("pdftotext is not installed")
+    try:
+        result = subprocess.run(
+            [executable, "-q", "-enc", "UTF-8", path, "-"],
+            capture_output=True,
+            check=True,
+            timeout=settings.DOCUMENTS_PREVIEW_TIMEOUT,
+        )
+    except subprocess.SubprocessError as exc:
+        raise TextUnavailable(str(exc)) from exc
+    return result.stdout.decode(errors="replace")[:max_size]
+
+
+def _xml_text(file) -> Iterator[str]:
+    for _, element in ElementTree.iterparse(file, events=("end",)):
+        for text in (element.text, element.tail):
+            if text and text.strip():
+                yield text
+        element.clear()
+
+
+def extract_office_text(path: str, max_size: int, parts: re.Pattern) -> str:
+    """Extract text nodes of office document XML parts.
+
+    Parsing stops as soon as `max_size` characters are collected.
+
+    Args:
+        path: document file path
+        max_size: max number of characters
+        parts: pattern of zip member names containing text
+
+    Returns:
+        (str): text
+
+    Raises:
+        TextUnavailable: if document is not a valid zip file or contains malformed XML
+    """
+    texts, size = [], 0
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for name in sorted(archive.namelist(), key=lambda name: (len(name), name)):
+                if not parts.match(name):
+                    continue
+                with archive.open(name) as file:
+                    for text in _xml_text(file):
+                        texts.append(text)
+                        size += len(text) + 1
+                        if size >= max_size:
+                            return " ".join(texts)
+    except (zipfile.BadZipFile, ElementTree.ParseError) as exc:
+        raise TextUnavailable(str(exc)) from exc
+    return " ".join(texts)
+
+
+def get_extractor(content_type: Optional[str]) -> Optional[Callable[[str, int], str]]:
+    """Get text extractor for document MIME type.
+
+    Args:
+        content_type: document MIME type
+
+    Returns:
+        (callable): extractor accepting file path and max number of characters,
+            or None if text of format can't be extracted
+    """
+    if not settings.DOCUMENTS_TEXT_EXTRACTION or not content_type:
+        return None
+    if content_type.startswith("text/"):
+        return extract_plain_text
+    if content_type == "application/pdf":
+        return extract_pdf_text
+    parts = OFFICE_TEXT_PARTS.get(content_type)
+    if parts is not None:
+        return partial(extract_office_text, parts=parts)
+    return None
@@ -22,9 +22,16 @@ class DocumentModelForm(forms.ModelForm):
         }
 
     def save(self, commit: bool = True) -> Document:
-        """Save document method."""
+        """Save document method.
+
+        Stores uploaded file metadata (size, content type and checksum)
+        calculated from uploaded file before it is written to storage.
+        """
         instance = super(DocumentModelForm, self).save(False)
         instance.title = instance.document.name
+        upload = self.files.get("document")
+        if upload is not None:
+            instance.set_metadata(upload)
         if commit:
             instance.save()
         return instance
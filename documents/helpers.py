@@ -4,14 +4,283 @@ Documents helper functions.
 """
 
 import hashlib
+import mimetypes
 import os
+import re
+import threading
 import time
+from collections import OrderedDict
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+CHECKSUM_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# number of first bytes of file used to detect its MIME type
+SNIFF_SIZE = 2048
+
+# signature, signature offset, MIME type
+FILE_SIGNATURES = [
+    (b"%PDF-", 0, "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg"),
+    (b"GIF87a", 0, "image/gif"),
+    (b"GIF89a", 0, "image/gif"),
+    (b"WEBP", 8, "image/webp"),
+    (b"BM", 0, "image/bmp"),
+    (b"II*\x00", 0, "image/tiff"),
+    (b"MM\x00*", 0, "image/tiff"),
+    (b"ftyp", 4, "video/mp4"),
+    (b"{\\rtf", 0, "application/rtf"),
+    (b"\x1f\x8b", 0, "application/gzip"),
+    (b"7z\xbc\xaf\x27\x1c", 0, "application/x-7z-compressed"),
+    (b"Rar!\x1a\x07", 0, "application/vnd.rar"),
+    (b"PK\x03\x04", 0, "application/zip"),
+    (b"PK\x05\x06", 0, "application/zip"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", 0, "application/x-ole-storage"),
+]
+
+# container formats: office documents are zip or OLE2 files
+CONTAINER_CONTENT_TYPES = {"application/zip", "application/x-ole-storage"}
+
+# counter of document files scheduled for deletion, kept in default cache: it's shared by web
+# and worker processes only with shared cache backend (memcached, see `MEMCACHED_LOCATION`)
+PENDING_FILE_DELETIONS_KEY = "documents:pending_file_deletions"
 
 
 def document_upload_path(instance: object, filename: str) -> str:
-    """Generate upload path random hash string."""
+    """Generate upload path random hash string.
+
+    In content addressed mode (`DOCUMENTS_CONTENT_ADDRESSED` setting)
+    path of document with known checksum is derived from the checksum,
+    so identical files get identical paths.
+    """
+    checksum = getattr(instance, "checksum", None)
+    if settings.DOCUMENTS_CONTENT_ADDRESSED and checksum:
+        _, extension = os.path.splitext(filename)
+        return f"documents/sha256/{checksum[0:2]}/{checksum[2:4]}/{checksum}{extension.lower()}"
     now_date_str = time.time().__str__()
     filename_md5 = hashlib.md5(filename.encode() + now_date_str.encode()).hexdigest()
     _, extension = os.path.splitext(filename)
     full_path = f"documents/{filename_md5[0:2]}/{filename_md5[2:4]}/{filename_md5}{extension}"
     return full_path
+
+
+class ChunkedUploadFile(File):
+    """Assembled chunked upload temporary file.
+
+    File system storage moves (not copies) files having temporary file path.
+    """
+
+    def temporary_file_path(self) -> str:
+        """Get path of temporary file."""
+        return self.file.name
+
+
+class RunningDigests:
+    """Process wide bounded cache of running SHA-256 digests of chunked uploads.
+
+    Digest of received bytes is updated with every appended chunk, so assembled
+    file isn't read again to get its checksum when upload is completed.
+    `hashlib` digest state can't be serialized, so digest is kept by process
+    which appended the last chunk: upload continued by another process
+    (or after restart) is hashed when it is completed.
+
+    Attributes:
+        max_size (int): max number of cached digests, least recently used are dropped
+    """
+
+    def __init__(self, max_size: int = 256) -> None:
+        """Init empty cache."""
+        self.max_size = max_size
+        self._digests: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, offset: int) -> Optional[Any]:
+        """Get copy of running digest of first `offset` bytes of upload.
+
+        Args:
+            key: upload identifier
+            offset: number of received bytes
+
+        Returns:
+            (hashlib.sha256): digest, None if digest of `offset` bytes isn't cached
+        """
+        if offset == 0:
+            return hashlib.sha256()
+        with self._lock:
+            cached = self._digests.get(key)
+            if cached is None or cached[0] != offset:
+                return None
+            self._digests.move_to_end(key)
+            return cached[1].copy()
+
+    def set(self, key: str, offset: int, digest: Any) -> None:
+        """Cache running digest of first `offset` bytes of upload."""
+        with self._lock:
+            self._digests[key] = (offset, digest)
+            self._digests.move_to_end(key)
+            while len(self._digests) > self.max_size:
+                self._digests.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        """Drop running digest of upload."""
+        with self._lock:
+            self._digests.pop(key, None)
+
+
+upload_digests = RunningDigests()
+
+
+def sniff_content_type(head: bytes, filename: Optional[str]) -> Optional[str]:
+    """Detect MIME type from the first bytes of file.
+
+    Container formats (zip, OLE2) are refined by file name extension,
+    e.g. `.docx` is a zip file.
+
+    Args:
+        head: first bytes of file (`SNIFF_SIZE` is enough)
+        filename: file name
+
+    Returns:
+        (str): MIME type or None if it can't be detected
+    """
+    guessed = mimetypes.guess_type(filename or "")[0]
+    for signature, offset, content_type in FILE_SIGNATURES:
+        if head[offset : offset + len(signature)] == signature:
+            if content_type in CONTAINER_CONTENT_TYPES and guessed:
+                return guessed
+            return content_type
+    if head and b"\x00" not in head:
+        try:
+            # file head could be cut in the middle of multibyte character
+            head[: len(head) - 3 if len(head) == SNIFF_SIZE else None].decode()
+        except UnicodeDecodeError:
+            return None
+        return guessed or "text/plain"
+    return None
+
+
+def file_metadata(file: File) -> Dict[str, Any]:
+    """Calculate file size, content type and SHA-256 checksum in one pass over file chunks.
+
+    Files received by `documents.uploadhandlers` handlers are already inspected
+    while streaming and are not read again.
+
+    Args:
+        file: uploaded or stored file
+
+    Returns:
+        (dict): `size`, `content_type` and `checksum` of file
+    """
+    if getattr(file, "sha256", None) is not None:
+        size, checksum, sniffed = file.size, file.sha256, file.sniffed_content_type
+    else:
+        digest, size, head = hashlib.sha256(), 0, b""
+        file.seek(0)
+        for chunk in file.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+            if len(head) < SNIFF_SIZE:
+                head += chunk[: SNIFF_SIZE - len(head)]
+        file.seek(0)
+        checksum, sniffed = digest.hexdigest(), sniff_content_type(head, file.name)
+    content_type = sniffed or getattr(file, "content_type", None) or mimetypes.guess_type(file.name or "")[0]
+    return {
+        "size": size,
+        "content_type": content_type or DEFAULT_CONTENT_TYPE,
+        "checksum": checksum,
+    }
+
+
+def track_pending_file_deletions(delta: int) -> int:
+    """Change counter of document files scheduled for deletion but not deleted yet.
+
+    Counter is kept in default cache, with default per process local memory cache
+    web process counts scheduled files and worker process counts deleted ones,
+    so the counter is meaningful only with shared cache backend (memcached).
+
+    Args:
+        delta: number of scheduled (positive) or deleted (negative) files
+
+    Returns:
+        (int): number of pending file deletions
+    """
+    cache.add(PENDING_FILE_DELETIONS_KEY, 0, timeout=None)
+    if delta < 0:
+        return max(cache.decr(PENDING_FILE_DELETIONS_KEY, -delta), 0)
+    return cache.incr(PENDING_FILE_DELETIONS_KEY, delta)
+
+
+def pending_file_deletions() -> int:
+    """Get number of document files scheduled for deletion but not deleted yet.
+
+    Requires shared cache backend, see `track_pending_file_deletions`.
+    """
+    return max(cache.get(PENDING_FILE_DELETIONS_KEY, 0), 0)
+
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """Requested byte range is outside of the file."""
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse single HTTP `Range` header bytes range.
+
+    Multiple ranges and malformed headers are ignored (whole file is sent).
+
+    Args:
+        header: `Range` header value
+        size: file size
+
+    Returns:
+        (tuple): first and last byte positions (inclusive) or None for whole file
+
+    Raises:
+        RangeNotSatisfiable: if range doesn't overlap the file
+    """
+    match = RANGE_RE.match((header or "").strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # suffix range: last N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - int(last), 0), size - 1
+    first, last = int(first), min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise RangeNotSatisfiable(header)
+    return first, last
+
+
+def file_range_iterator(file: IO[bytes], first: int, last: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Read bytes range of file by chunks and close the file.
+
+    Args:
+        file: opened binary file
+        first: first byte position
+        last: last byte position (inclusive)
+        chunk_size: max size of chunk
+
+    Yields:
+        (bytes): file chunks
+    """
+    try:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
@@ -0,0 +1,3 @@
+"""
+Documents management commands package.
+"""
@@ -0,0 +1,86 @@
+"""
+Backfill stored file metadata of documents management command.
+
+Examples:
+    Fill size, content type and checksum of documents uploaded before they were stored,
+    reading files with 8 threads in chunks of 100 documents
+        python3 manage.py backfill_document_metadata --workers 8 --chunk-size 100
+
+    Recalculate metadata of all documents
+        python3 manage.py backfill_document_metadata --force
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Tuple
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections, router
+
+from documents.models import Document
+
+
+def backfill_chunk(document_ids: List[int], using: str) -> Tuple[int, List[int]]:
+    """Read files of chunk of documents and store their metadata.
+
+    Args:
+        document_ids: list of document ids
+        using: database alias
+
+    Returns:
+        (tuple): number of updated documents and ids of documents with missing files
+    """
+    documents, missing = [], []
+    for document in Document.objects.using(using).filter(pk__in=document_ids).only("pk", "document"):
+        try:
+            with document.document.open("rb") as file:
+                document.set_metadata(file)
+        except (OSError, ValueError):
+            missing.append(document.pk)
+            continue
+        documents.append(document)
+    Document.objects.using(using).bulk_update(documents, Document.metadata_fields)
+    return len(documents), missing
+
+
+def run_in_thread(document_ids: List[int], using: str) -> Tuple[int, List[int]]:
+    """Run chunk job in pool thread and close thread's own db connection afterwards."""
+    try:
+        return backfill_chunk(document_ids, using)
+    finally:
+        connections[using].close()
+
+
+class Command(BaseCommand):
+    """Fill documents size, content type and checksum reading files in parallel threads."""
+
+    help = "Fill stored size, content type and checksum of documents from their files"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments."""
+        parser.add_argument("--chunk-size", type=int, default=100, help="number of documents processed in one job")
+        parser.add_argument("--workers", type=int, default=4, help="number of parallel threads")
+        parser.add_argument("--force", action="store_true", help="recalculate metadata of all documents")
+        parser.add_argument("--database", help="database alias to use (default: write database of documents)")
+
+    def handle(self, *args, **options) -> None:
+        """Split documents into chunks and process them in thread pool."""
+        using = options["database"] or router.db_for_write(Document)
+        chunk_size = options["chunk_size"]
+        queryset = Document.objects.using(using).order_by("pk")
+        if not options["force"]:
+            queryset = queryset.filter(size__isnull=True)
+        document_ids = list(queryset.values_list("pk", flat=True))
+        chunks = [document_ids[i : i + chunk_size] for i in range(0, len(document_ids), chunk_size)]
+
+        if options["workers"] > 1:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                results = list(executor.map(partial(run_in_thread, using=using), chunks))
+        else:
+            results = [backfill_chunk(chunk, using) for chunk in chunks]
+
+        updated = sum(count for count, _ in results)
+        missing = sorted(pk for _, chunk_missing in results for pk in chunk_missing)
+        if missing:
+            self.stderr.write(f"Files of documents are missing: {', '.join(map(str, missing))}")
+        self.stdout.write(self.style.SUCCESS(f"Stored metadata of {updated} documents"))
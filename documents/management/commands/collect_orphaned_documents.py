@@ -0,0 +1,56 @@
+"""
+Orphaned documents garbage collector management command.
+
+Examples:
+    Delete documents attached neither to projects nor to tasks
+    and uploaded more than a day ago, 500 documents per transaction
+        python3 manage.py collect_orphaned_documents --grace-period 86400 --chunk-size 500
+
+    Only report number of orphaned documents and their size
+        python3 manage.py collect_orphaned_documents --dry-run
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import router
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+
+from documents.models import Document
+
+
+class Command(BaseCommand):
+    """Delete orphaned documents and their files in chunks."""
+
+    help = "Delete documents attached neither to projects nor to tasks, and their files"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments."""
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="number of documents deleted in one transaction"
+        )
+        parser.add_argument(
+            "--grace-period",
+            type=int,
+            default=settings.DOCUMENTS_ORPHAN_GRACE_PERIOD,
+            help="skip documents uploaded less than this number of seconds ago",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="only report orphaned documents")
+        parser.add_argument("--database", help="database alias to use (default: write database of documents)")
+
+    def handle(self, *args, **options) -> None:
+        """Collect orphaned documents and report reclaimed storage."""
+        using = options["database"] or router.db_for_write(Document)
+        documents, reclaimed = Document.objects.using(using).collect_orphaned(
+            chunk_size=options["chunk_size"],
+            uploaded_before=timezone.now() - timedelta(seconds=options["grace_period"]),
+            dry_run=options["dry_run"],
+        )
+        action = "Found" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {documents} orphaned documents, {filesizeformat(reclaimed)} ({reclaimed} bytes)"
+            )
+        )
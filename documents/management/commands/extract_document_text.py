@@ -0,0 +1,38 @@
+"""
+Schedule text extraction of existing documents management command.
+
+Examples:
+    Extract text of documents uploaded before text extraction was enabled
+        python3 manage.py extract_document_text
+
+    Extract text of all documents again
+        python3 manage.py extract_document_text --force
+"""
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from documents.extraction import get_extractor
+from documents.models import Document
+from worker.documents.tasks import extract_document_text
+
+
+class Command(BaseCommand):
+    """Schedule text extraction of documents to `extraction` worker queue."""
+
+    help = "Schedule text extraction of documents having no extracted text (or all with --force)"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments."""
+        parser.add_argument("--force", action="store_true", help="extract text of all documents")
+
+    def handle(self, *args, **options) -> None:
+        """Send a worker task for every document of supported format."""
+        queryset = Document.objects.exclude(document="").order_by("pk")
+        if not options["force"]:
+            queryset = queryset.filter(text__isnull=True)
+        scheduled = 0
+        for pk, content_type in queryset.values_list("pk", "content_type").iterator():
+            if get_extractor(content_type):
+                extract_document_text.delay(pk)
+                scheduled += 1
+        self.stdout.write(self.style.SUCCESS(f"Scheduled text extraction of {scheduled} documents"))
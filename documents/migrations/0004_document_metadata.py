@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("documents", "0003_auto_20210327_1336"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="checksum",
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name="Checksum"),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="content_type",
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name="Content type"),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="size",
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name="Size"),
+        ),
+    ]
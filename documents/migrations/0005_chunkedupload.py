@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:27
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("documents", "0004_document_metadata"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChunkedUpload",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created", models.DateTimeField(auto_now_add=True, verbose_name="Created")),
+                ("filename", models.CharField(max_length=255, verbose_name="File name")),
+                ("size", models.PositiveBigIntegerField(verbose_name="Size")),
+                ("offset", models.PositiveBigIntegerField(default=0, verbose_name="Received")),
+                ("description", models.TextField(blank=True, max_length=500, verbose_name="Description")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name="User"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Chunked upload",
+                "verbose_name_plural": "Chunked uploads",
+            },
+        ),
+    ]
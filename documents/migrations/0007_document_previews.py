@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("documents", "0006_document_owner"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="preview",
+            field=models.FileField(blank=True, editable=False, upload_to="", verbose_name="Preview"),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="thumbnail",
+            field=models.FileField(blank=True, editable=False, upload_to="", verbose_name="Thumbnail"),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:47
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+from documents.search import install_text_search_index, uninstall_text_search_index
+
+
+def install_search(apps, schema_editor):
+    """Create document text search triggers and indexes."""
+    install_text_search_index(schema_editor.connection)
+
+
+def uninstall_search(apps, schema_editor):
+    """Drop document text search triggers and indexes."""
+    uninstall_text_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("documents", "0007_document_previews"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentText",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="text",
+                        serialize=False,
+                        to="documents.document",
+                        verbose_name="Document",
+                    ),
+                ),
+                ("text", models.TextField(blank=True, verbose_name="Text")),
+                ("extracted", models.DateTimeField(auto_now=True, verbose_name="Date and time extracted")),
+                ("search_vector", django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+            ],
+            options={
+                "verbose_name": "Document text",
+                "verbose_name_plural": "Document texts",
+            },
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
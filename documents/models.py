@@ -2,31 +2,191 @@
 Document models module.
 """
 
-from typing import Any
+import os
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import models, router, transaction
+from django.db.models import Exists, OuterRef, Q, Sum
 from django.utils.translation import gettext_lazy as _
 
-from .helpers import document_upload_path
+from worker.documents.tasks import delete_document_files, extract_document_text, generate_document_previews
+
+from .extraction import compact_text, get_extractor
+from .helpers import document_upload_path, file_metadata, track_pending_file_deletions
+from .previews import PREVIEW_SIZES, get_renderer, local_file_path, preview_path
 
 
 class DocumentQuerySet(models.QuerySet):
     """Queryset for Document model.
 
-    it's only purpose to override default delete operation.
-    It deletes uploaded files associated with document instances
-    when deleting instance from db.
+    Overrides default delete operation to delete uploaded files
+    associated with document instances when deleting instance from db,
+    and collects documents not attached to any object.
+
+    Files are reference counted by documents sharing them
+    (see content addressed mode in `document_upload_path`),
+    file is deleted when the last document referencing it is deleted.
+    Files are deleted by worker in batches after transaction commit.
     """
 
-    def delete(self) -> Any:
-        """Delete document from queryset."""
-        for obj in self:
-            obj.document.delete()
-        return super(DocumentQuerySet, self).delete()
+    def file_names(self) -> Set[str]:
+        """Get storage names of document files and previews."""
+        return {name for row in self.values_list(*self.model.file_fields) for name in row if name}
+
+    def referenced_files(self, names: Iterable[str]) -> Set[str]:
+        """Get storage names of files and previews still referenced by documents.
+
+        Args:
+            names: storage names to check
+
+        Returns:
+            (set): referenced names
+        """
+        names = set(names)
+        condition = Q()
+        for field in self.model.file_fields:
+            condition |= Q(**{f"{field}__in": names})
+        return self.filter(condition).file_names() & names
+
+    def _db_for_write(self) -> str:
+        """Get alias of database the queryset writes to.
+
+        `self.db` is the read database until the queryset is used for writing,
+        replica may not have just deleted or created documents yet.
+        """
+        return self._db or router.db_for_write(self.model, **self._hints)
+
+    def _delete_with_files(self) -> Tuple[Tuple[int, Dict[str, int]], Set[str]]:
+        using = self._db_for_write()
+        documents = self.using(using)
+        with transaction.atomic(using=using):
+            names = documents.file_names()
+            deleted = super(DocumentQuerySet, documents).delete()
+            referenced = self.model.objects.using(using).referenced_files(names)
+            orphaned = sorted(names - referenced)
+            batch_size = settings.DOCUMENTS_DELETE_BATCH_SIZE
+            for i in range(0, len(orphaned), batch_size):
+                transaction.on_commit(partial(schedule_file_deletion, orphaned[i : i + batch_size]), using=using)
+        return deleted, set(orphaned)
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """Delete document from queryset and schedule deletion of files no longer referenced by any document."""
+        return self._delete_with_files()[0]
+
+    def remaining_quota(self, user: Any) -> Optional[int]:
+        """Get number of bytes user can upload within `DOCUMENTS_USER_QUOTA`.
+
+        Args:
+            user: request user
+
+        Returns:
+            (int): remaining bytes or None if quota is disabled
+        """
+        if not settings.DOCUMENTS_USER_QUOTA:
+            return None
+        if not user.is_authenticated:
+            return 0
+        used = self.filter(owner=user).aggregate(used=Sum("size"))["used"] or 0
+        return max(settings.DOCUMENTS_USER_QUOTA - used, 0)
+
+    def orphaned(self, uploaded_before: Optional[datetime] = None) -> "DocumentQuerySet":
+        """Filter documents not attached to any object through many-to-many relations.
+
+        Uses `NOT EXISTS` anti-join for every many-to-many relation to documents
+        (`Project.documents`, `Task.documents`).
+
+        Args:
+            uploaded_before: only documents uploaded before this time, documents uploaded
+                just now could be not attached yet
+
+        Returns:
+            (DocumentQuerySet): orphaned documents
+        """
+        queryset = self
+        if uploaded_before is not None:
+            queryset = queryset.filter(uploaded__lt=uploaded_before)
+        relations = [relation for relation in self.model._meta.related_objects if relation.many_to_many]
+        for relation in relations:
+            links = relation.through.objects.filter(**{relation.field.m2m_reverse_field_name(): OuterRef("pk")})
+            queryset = queryset.filter(~Exists(links))
+        return queryset
+
+    def collect_orphaned(
+        self, chunk_size: int = 500, uploaded_before: Optional[datetime] = None, dry_run: bool = False
+    ) -> Tuple[int, int]:
+        """Delete orphaned documents and their files in chunks.
+
+        Every chunk is deleted in its own transaction, documents
+        are checked to be orphaned again at deletion time.
+        Documents are read from write database, replica may lag behind.
+
+        Args:
+            chunk_size: number of documents deleted in one transaction
+            uploaded_before: only documents uploaded before this time
+            dry_run: only count orphaned documents and their files size
+
+        Returns:
+            (tuple): number of deleted documents and reclaimed storage bytes
+        """
+        documents, reclaimed, last_pk = 0, 0, 0
+        orphaned = self.using(self._db_for_write()).orphaned(uploaded_before).order_by("pk")
+        while True:
+            chunk = list(orphaned.filter(pk__gt=last_pk).values_list("pk", "document", "size")[:chunk_size])
+            if not chunk:
+                return documents, reclaimed
+            last_pk = chunk[-1][0]
+            sizes = {name: size or 0 for _, name, size in chunk}
+            if dry_run:
+                documents += len(chunk)
+                reclaimed += sum(sizes.values())
+                continue
+            (_, deleted), names = orphaned.filter(pk__in=[pk for pk, _, _ in chunk])._delete_with_files()
+            documents += deleted.get(self.model._meta.label, 0)
+            reclaimed += sum(sizes.get(name, 0) for name in names)
+
+
+def schedule_file_deletion(names: List[str]) -> None:
+    """Schedule batch of files deletion to worker.
+
+    Args:
+        names: storage names of files
+    """
+    track_pending_file_deletions(len(names))
+    delete_document_files.delay(names)
 
 
 class Document(models.Model):
-    """Document Base Model."""
+    """Document Base Model.
+
+    Attributes:
+        uploaded: date and time uploaded
+        document: uploaded file
+        title: document title (original file name)
+        description: document description
+        size: file size in bytes
+        content_type: file MIME type
+        checksum: file SHA-256 hex digest
+        owner (User): user uploaded the document, uploads are limited by `DOCUMENTS_USER_QUOTA`
+        thumbnail: small preview image rendered by worker
+        preview: first page (or image) preview rendered by worker
+
+    Notes:
+        File metadata is stored on upload so rendering document lists
+        doesn't touch file storage, see `backfill_document_metadata` command
+        for documents uploaded before.
+        With `DOCUMENTS_CONTENT_ADDRESSED` setting enabled files are stored
+        by checksum and shared between documents with identical content.
+    """
+
+    metadata_fields = ("size", "content_type", "checksum")
+    file_fields = ("document", "thumbnail", "preview")
 
     objects = DocumentQuerySet.as_manager()
 
@@ -34,13 +194,207 @@ class Document(models.Model):
     document = models.FileField(verbose_name=_("Document"), upload_to=document_upload_path)
     title = models.CharField(verbose_name=_("Title"), max_length=100, blank=True, null=True)
     description = models.TextField(verbose_name=_("Description"), max_length=500, blank=True, null=True)
+    size = models.PositiveBigIntegerField(verbose_name=_("Size"), null=True, blank=True, editable=False)
+    content_type = models.CharField(verbose_name=_("Content type"), max_length=255, blank=True, editable=False)
+    checksum = models.CharField(verbose_name=_("Checksum"), max_length=64, blank=True, editable=False, db_index=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("Owner"),
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+    )
+    thumbnail = models.FileField(verbose_name=_("Thumbnail"), blank=True, editable=False)
+    preview = models.FileField(verbose_name=_("Preview"), blank=True, editable=False)
 
     def __str__(self) -> str:
         """Represent as string."""
         return f"{self.id} {self.title}"
 
+    def save(self, *args, **kwargs) -> None:
+        """Save document, storing metadata of newly uploaded file.
+
+        In content addressed mode file already stored by another document is reused.
+        Document referencing the file is locked until the transaction is committed,
+        so the file can't be deleted meanwhile: file of deleted documents is deleted
+        only if no document references it after their deletion (see `DocumentQuerySet.delete`).
+        File not referenced by any document (pending deletion) isn't reused,
+        upload is stored under another name.
+        Previews and text of newly uploaded file are generated by worker after transaction commit.
+        """
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        uploaded = bool(self.document) and not self.document._committed
+        with transaction.atomic(using=using):
+            if uploaded:
+                if not self.checksum:
+                    self.set_metadata(self.document.file)
+                if settings.DOCUMENTS_CONTENT_ADDRESSED:
+                    name = self.document.field.generate_filename(self, self.document.name)
+                    referencing = Document.objects.using(using).select_for_update().filter(document=name)
+                    if referencing.values_list("pk", flat=True)[:1] and self.document.storage.exists(name):
+                        self.document.name = name
+                        self.document._committed = True
+            super(Document, self).save(*args, **kwargs)
+        if uploaded and not self.thumbnail and get_renderer(self.content_type):
+            transaction.on_commit(partial(generate_document_previews.delay, self.pk), using=using)
+        if uploaded and get_extractor(self.content_type):
+            transaction.on_commit(partial(extract_document_text.delay, self.pk), using=using)
+
+    def generate_previews(self) -> bool:
+        """Render thumbnail and preview of document file.
+
+        Previews already rendered for identical document are reused,
+        all documents with the same checksum get the previews.
+
+        Returns:
+            (bool): True if document has previews
+
+        Raises:
+            PreviewUnavailable: if preview renderer is not available or failed
+        """
+        renderer = get_renderer(self.content_type)
+        if renderer is None or not self.checksum or not self.document:
+            return False
+        storage = self.document.storage
+        names = {kind: preview_path(self.checksum, kind) for kind in PREVIEW_SIZES}
+        missing = [kind for kind, name in names.items() if not storage.exists(name)]
+        if missing:
+            with local_file_path(self.document) as path:
+                for kind in missing:
+                    names[kind] = storage.save(names[kind], ContentFile(renderer(path, PREVIEW_SIZES[kind])))
+        Document.objects.filter(checksum=self.checksum).update(**names)
+        for kind, name in names.items():
+            setattr(self, kind, name)
+        return True
+
+    def extract_text(self) -> Optional["DocumentText"]:
+        """Extract and store document text for full text search.
+
+        Text already extracted from identical document is reused.
+
+        Returns:
+            (DocumentText): stored text, None if text of document format can't be extracted
+
+        Raises:
+            TextUnavailable: if text extractor is not available or failed
+        """
+        extractor = get_extractor(self.content_type)
+        if extractor is None or not self.document:
+            return None
+        identical = None
+        if self.checksum:
+            identical = DocumentText.objects.filter(document__checksum=self.checksum).exclude(document=self).first()
+        if identical is not None:
+            text = identical.text
+        else:
+            with local_file_path(self.document) as path:
+                text = compact_text(extractor(path, settings.DOCUMENTS_TEXT_MAX_SIZE), settings.DOCUMENTS_TEXT_MAX_SIZE)
+        document_text, _ = DocumentText.objects.update_or_create(document=self, defaults={"text": text})
+        return document_text
+
+    def set_metadata(self, file: File) -> None:
+        """Set size, content type and checksum fields from file.
+
+        Args:
+            file: uploaded or stored file
+        """
+        for field, value in file_metadata(file).items():
+            setattr(self, field, value)
+
     class Meta:
         """Model config."""
 
         verbose_name = _("Document")
         verbose_name_plural = _("Documents")
+
+
+class DocumentText(models.Model):
+    """Text extracted from document file by worker, see `documents.extraction`.
+
+    Attributes:
+        document (Document): document text is extracted from
+        text: text with collapsed whitespaces, truncated to `DOCUMENTS_TEXT_MAX_SIZE` characters
+        extracted: date and time extracted
+        search_vector: full text search vector (PostgreSQL only),
+            maintained by database trigger, see `documents.search`
+    """
+
+    document = models.OneToOneField(
+        Document,
+        verbose_name=_("Document"),
+        primary_key=True,
+        related_name="text",
+        on_delete=models.CASCADE,
+    )
+    text = models.TextField(verbose_name=_("Text"), blank=True)
+    extracted = models.DateTimeField(verbose_name=_("Date and time extracted"), auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    def __str__(self) -> str:
+        """Represent as string."""
+        return f"{self.document_id} ({len(self.text)})"
+
+    class Meta:
+        """Model config."""
+
+        verbose_name = _("Document text")
+        verbose_name_plural = _("Document texts")
+
+
+class ChunkedUploadQuerySet(models.QuerySet):
+    """Queryset for ChunkedUpload model.
+
+    Deletes temporary files of uploads when deleting uploads.
+    """
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """Delete uploads and their temporary files."""
+        paths = [upload.path for upload in self.only("pk")]
+        deleted = super(ChunkedUploadQuerySet, self).delete()
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return deleted
+
+
+class ChunkedUpload(models.Model):
+    """Chunked (resumable) document upload in progress.
+
+    Chunks are appended to temporary file in `DOCUMENTS_CHUNKED_UPLOAD_DIR`,
+    completed upload is moved to storage as `Document`.
+
+    Attributes:
+        id: upload identifier
+        user: user uploading the file
+        created: date and time upload started
+        filename: original file name
+        size: total file size declared by client
+        offset: number of bytes received
+        description: document description
+    """
+
+    objects = ChunkedUploadQuerySet.as_manager()
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("User"), on_delete=models.CASCADE)
+    created = models.DateTimeField(verbose_name=_("Created"), auto_now_add=True)
+    filename = models.CharField(verbose_name=_("File name"), max_length=255)
+    size = models.PositiveBigIntegerField(verbose_name=_("Size"))
+    offset = models.PositiveBigIntegerField(verbose_name=_("Received"), default=0)
+    description = models.TextField(verbose_name=_("Description"), max_length=500, blank=True)
+
+    def __str__(self) -> str:
+        """Represent as string."""
+        return f"{self.id} {self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def path(self) -> str:
+        """Get temporary file path."""
+        return os.path.join(settings.DOCUMENTS_CHUNKED_UPLOAD_DIR, f"{self.id}.part")
+
+    class Meta:
+        """Model config."""
+
+        verbose_name = _("Chunked upload")
+        verbose_name_plural = _("Chunked uploads")
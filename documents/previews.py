@@ -0,0 +1,160 @@
+"""
+Document previews rendering module.
+
+Thumbnails and first page previews are rendered by `worker.documents` celery
+worker after upload, never in the web server process.
+
+Images are rendered with Pillow, PDF documents with `pdftoppm` (poppler-utils),
+both are optional: documents of formats without available renderer
+have no previews. Image previews aren't scheduled at all if Pillow isn't installed.
+
+Previews are stored by document checksum, so preview url changes only
+with document content and identical documents share previews.
+
+Attributes:
+    PREVIEW_SIZES: max width and height (px) of preview kinds
+    PREVIEW_CONTENT_TYPE: MIME type of rendered previews
+    PreviewUnavailable: exception raised when preview can't be rendered
+
+Methods:
+    preview_path: get storage name of document preview
+    get_renderer: get preview renderer for document MIME type
+    render_image: render image preview with Pillow
+    render_pdf: render PDF first page preview with pdftoppm
+    local_file_path: get local file system path of stored file
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PREVIEW_SIZES = {"thumbnail": 160, "preview": 1024}
+
+PREVIEW_CONTENT_TYPE = "image/jpeg"
+
+
+class PreviewUnavailable(Exception):
+    """Preview can't be rendered: renderer is not installed or document is broken."""
+
+
+def preview_path(checksum: str, kind: str) -> str:
+    """Get storage name of document preview.
+
+    Args:
+        checksum: document SHA-256 hex digest
+        kind: preview kind, key of `PREVIEW_SIZES`
+
+    Returns:
+        (str): storage name
+    """
+    return f"previews/{checksum[:2]}/{checksum[2:4]}/{checksum}-{kind}.jpg"
+
+
+@contextmanager
+def local_file_path(file: FieldFile) -> Iterator[str]:
+    """Get local file system path of stored file.
+
+    Files of storages without local paths are copied to temporary file.
+
+    Args:
+        file: stored file
+
+    Yields:
+        (str): file path
+    """
+    try:
+        path = file.path
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(file.name)[1]) as temp:
+        with file.open("rb"):
+            for chunk in file.chunks():
+                temp.write(chunk)
+        temp.flush()
+        yield temp.name
+
+
+def render_image(path: str, size: int) -> bytes:
+    """Render image scaled down to fit into `size` square.
+
+    Args:
+        path: image file path
+        size: max width and height in pixels
+
+    Returns:
+        (bytes): JPEG image
+
+    Raises:
+        PreviewUnavailable: if Pillow is not installed, image can't be decoded
+            or it is too large (decompression bomb)
+    """
+    if Image is None:
+        raise PreviewUnavailable("Pillow is not installed")
+    try:
+        with Image.open(path) as image:
+            image.thumbnail((size, size))
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, "JPEG", quality=85)
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise PreviewUnavailable(str(exc)) from exc
+    return buffer.getvalue()
+
+
+def render_pdf(path: str, size: int) -> bytes:
+    """Render PDF first page scaled down to fit into `size` square.
+
+    `pdftoppm` runs in a subprocess limited by `DOCUMENTS_PREVIEW_TIMEOUT` seconds.
+
+    Args:
+        path: PDF file path
+        size: max width and height in pixels
+
+    Returns:
+        (bytes): JPEG image
+
+    Raises:
+        PreviewUnavailable: if pdftoppm is not installed, failed or timed out
+    """
+    executable = shutil.which("pdftoppm")
+    if executable is None:
+        raise PreviewUnavailable("pdftoppm is not installed")
+    command = [executable, "-jpeg", "-f", "1", "-l", "1", "-singlefile", "-scale-to", str(size), path]
+    try:
+        result = subprocess.run(command, capture_output=True, check=True, timeout=settings.DOCUMENTS_PREVIEW_TIMEOUT)
+    except subprocess.SubprocessError as exc:
+        raise PreviewUnavailable(str(exc)) from exc
+    return result.stdout
+
+
+def get_renderer(content_type: Optional[str]) -> Optional[Callable[[str, int], bytes]]:
+    """Get preview renderer for document MIME type.
+
+    Args:
+        content_type: document MIME type
+
+    Returns:
+        (callable): renderer accepting file path and size, or None if format has no previews
+            or Pillow isn't installed for images
+    """
+    if not settings.DOCUMENTS_PREVIEWS or not content_type:
+        return None
+    if content_type == "application/pdf":
+        return render_pdf
+    if content_type.startswith("image/") and Image is not None:
+        return render_image
+    return None
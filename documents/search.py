@@ -0,0 +1,83 @@
+"""
+Full text search engine for extracted document text.
+
+PostgreSQL: `DocumentText.search_vector` tsvector column is maintained by a trigger and indexed with GIN.
+
+SQLite: external content FTS5 table `documents_documenttext_fts` is maintained by triggers,
+see `taskcamp.search.SearchIndex`.
+
+Other database vendors fall back to `icontains` lookups.
+
+Attributes:
+    TEXT_SEARCH_INDEX: document text search index
+
+Methods:
+    search_documents: filter document texts by search terms
+    install_text_search_index: create search triggers and indexes
+    uninstall_text_search_index: drop search triggers and indexes
+"""
+
+from typing import List
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from taskcamp.search import SEARCH_CONFIG, SearchIndex
+
+TEXT_SEARCH_INDEX = SearchIndex("documents_documenttext", {"text": None}, key="document_id")
+
+
+def install_text_search_index(connection: BaseDatabaseWrapper, rebuild: bool = False) -> None:
+    """Create (idempotently) document text search triggers and indexes for database connection.
+
+    Args:
+        connection: database connection
+        rebuild: recalculate index for existing rows
+    """
+    TEXT_SEARCH_INDEX.install(connection, rebuild)
+
+
+def uninstall_text_search_index(connection: BaseDatabaseWrapper) -> None:
+    """Drop document text search triggers and indexes for database connection.
+
+    Args:
+        connection: database connection
+    """
+    TEXT_SEARCH_INDEX.uninstall(connection)
+
+
+def search_documents(queryset: QuerySet, terms: List[str]) -> QuerySet:
+    """Filter document texts matching every search term as a word prefix.
+
+    Args:
+        queryset: DocumentText queryset
+        terms: search terms, see `projects.search.search_terms`
+
+    Returns:
+        (QuerySet): filtered queryset
+    """
+    if not terms:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        return queryset.filter(
+            search_vector=SearchQuery(
+                " & ".join(f"{term}:*" for term in terms),
+                config=SEARCH_CONFIG,
+                search_type="raw",
+            )
+        )
+    if vendor == "sqlite":
+        table = queryset.model._meta.db_table
+        match = " ".join('"{}"*'.format(term) for term in terms)
+        matched = f"SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s"
+        return queryset.filter(document_id__in=RawSQL(matched, (match,)))
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(text__icontains=term)
+    return queryset.filter(condition)
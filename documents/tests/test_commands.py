@@ -0,0 +1,107 @@
+import hashlib
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from documents.management.commands.backfill_document_metadata import run_in_thread
+from documents.models import Document, DocumentText
+
+
+class BackfillDocumentMetadataCommandTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.document = Document.objects.create(title="doc", document=ContentFile(b"content", name="doc.txt"))
+        self.missing = Document.objects.create(title="missing")
+        # documents uploaded before metadata was stored
+        Document.objects.update(size=None, content_type="", checksum="")
+
+    def test_backfill(self):
+        stdout, stderr = StringIO(), StringIO()
+        module = "documents.management.commands.backfill_document_metadata"
+        with mock.patch(f"{module}.router.db_for_write", return_value="default") as db_for_write:
+            call_command("backfill_document_metadata", "--workers=1", stdout=stdout, stderr=stderr)
+        db_for_write.assert_called_once_with(Document)
+        self.assertIn("Stored metadata of 1 documents", stdout.getvalue())
+        self.assertIn(f"Files of documents are missing: {self.missing.pk}", stderr.getvalue())
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.size, 7)
+        self.assertEqual(self.document.content_type, "text/plain")
+        self.assertEqual(self.document.checksum, hashlib.sha256(b"content").hexdigest())
+
+        # documents with stored metadata are skipped
+        stdout = StringIO()
+        call_command("backfill_document_metadata", "--workers=1", stdout=stdout, stderr=StringIO())
+        self.assertIn("Stored metadata of 0 documents", stdout.getvalue())
+
+    def test_backfill_in_thread_pool(self):
+        self.missing.delete()
+        # run pool jobs inline: test transaction is not visible from other threads
+        executor = mock.MagicMock()
+        executor.return_value.__enter__.return_value.map = map
+        module = "documents.management.commands.backfill_document_metadata"
+        with mock.patch(f"{module}.ThreadPoolExecutor", executor), mock.patch(f"{module}.connections") as connections:
+            stdout = StringIO()
+            call_command("backfill_document_metadata", "--workers=2", "--force", stdout=stdout, stderr=StringIO())
+        executor.assert_called_once_with(max_workers=2)
+        connections["default"].close.assert_called()
+        self.assertIn("Stored metadata of 1 documents", stdout.getvalue())
+
+    def test_run_in_thread_closes_connection(self):
+        with mock.patch("documents.management.commands.backfill_document_metadata.connections") as connections:
+            self.assertEqual(run_in_thread([self.document.pk], "default"), (1, []))
+        connections["default"].close.assert_called_once()
+
+
+class CollectOrphanedDocumentsCommandTestCase(TestCase):
+    def setUp(self) -> None:
+        Document.objects.create(title="orphan", document="documents/orphan.txt", size=2048)
+
+    def test_collect_dry_run(self):
+        stdout = StringIO()
+        call_command("collect_orphaned_documents", "--dry-run", "--grace-period=0", stdout=stdout)
+        self.assertIn("Found 1 orphaned documents", stdout.getvalue())
+        self.assertIn("(2048 bytes)", stdout.getvalue())
+        self.assertEqual(Document.objects.count(), 1)
+
+    def test_collect(self):
+        stdout = StringIO()
+        module = "documents.management.commands.collect_orphaned_documents"
+        with mock.patch(f"{module}.router.db_for_write", return_value="default") as db_for_write:
+            with mock.patch("documents.models.delete_document_files.delay"):
+                call_command("collect_orphaned_documents", "--grace-period=0", stdout=stdout)
+        db_for_write.assert_called_once_with(Document)
+        self.assertIn("Deleted 1 orphaned documents", stdout.getvalue())
+        self.assertFalse(Document.objects.exists())
+
+        # grace period protects just uploaded documents
+        Document.objects.create(title="new", document="documents/new.txt")
+        call_command("collect_orphaned_documents", stdout=stdout)
+        self.assertTrue(Document.objects.exists())
+
+
+class ExtractDocumentTextCommandTestCase(TestCase):
+    def test_extract_document_text(self):
+        pending = Document.objects.create(title="a.txt", document="documents/a.txt", content_type="text/plain")
+        extracted = Document.objects.create(title="b.txt", document="documents/b.txt", content_type="text/plain")
+        DocumentText.objects.create(document=extracted, text="b")
+        Document.objects.create(title="c.png", document="documents/c.png", content_type="image/png")
+        Document.objects.create(title="no file", content_type="text/plain")
+
+        out = StringIO()
+        with mock.patch("documents.management.commands.extract_document_text.extract_document_text.delay") as delay:
+            call_command("extract_document_text", stdout=out)
+            self.assertEqual(delay.call_args_list, [mock.call(pending.pk)])
+            self.assertIn("Scheduled text extraction of 1 documents", out.getvalue())
+
+            delay.reset_mock()
+            call_command("extract_document_text", "--force", stdout=out)
+            self.assertEqual(delay.call_args_list, [mock.call(pending.pk), mock.call(extracted.pk)])
@@ -0,0 +1,151 @@
+import io
+import subprocess
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from documents.extraction import (
+    TextUnavailable,
+    compact_text,
+    extract_office_text,
+    extract_pdf_text,
+    extract_plain_text,
+    get_extractor,
+)
+from documents.models import Document, DocumentText
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PPTX = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+def office_document(parts: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, xml in parts.items():
+            archive.writestr(name, xml)
+    return buffer.getvalue()
+
+
+DOCX_CONTENT = office_document(
+    {
+        "word/document.xml": '<w:document xmlns:w="urn:w"><w:body>'
+        "<w:p><w:r><w:t>Roof</w:t></w:r><w:r><w:t>repair</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t>estimate</w:t></w:r></w:p></w:body></w:document>",
+        "word/styles.xml": '<w:styles xmlns:w="urn:w"><w:t>ignored</w:t></w:styles>',
+    }
+)
+
+
+class TextExtractorsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: bytes) -> str:
+        path = f"{self.directory.name}/{name}"
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_get_extractor(self):
+        self.assertEqual(get_extractor("text/markdown"), extract_plain_text)
+        self.assertEqual(get_extractor("application/pdf"), extract_pdf_text)
+        self.assertEqual(get_extractor(DOCX).func, extract_office_text)
+        self.assertIsNone(get_extractor("image/png"))
+        self.assertIsNone(get_extractor(""))
+        with override_settings(DOCUMENTS_TEXT_EXTRACTION=False):
+            self.assertIsNone(get_extractor("text/plain"))
+
+    def test_compact_text(self):
+        self.assertEqual(compact_text(" one\n\n two\tthree ", 100), "one two three")
+        self.assertEqual(compact_text("one two", 3), "one")
+
+    def test_extract_plain_text(self):
+        path = self.write("notes.md", "# Заметки\n".encode() + b"\xff")
+        self.assertEqual(extract_plain_text(path, 100), "# Заметки\n�")
+        self.assertEqual(extract_plain_text(path, 3), "# З")
+
+    def test_extract_office_text(self):
+        path = self.write("estimate.docx", DOCX_CONTENT)
+        self.assertEqual(get_extractor(DOCX)(path, 100), "Roof repair estimate")
+        self.assertEqual(get_extractor(DOCX)(path, 6), "Roof repair")
+
+        slides = {f"ppt/slides/slide{i}.xml": f'<p:sld xmlns:p="urn:p"><p:t>slide {i}</p:t></p:sld>' for i in (10, 9)}
+        path = self.write("slides.pptx", office_document(slides))
+        self.assertEqual(get_extractor(PPTX)(path, 100), "slide 9 slide 10")
+
+        with self.assertRaises(TextUnavailable):
+            get_extractor(DOCX)(self.write("broken.docx", b"not a zip"), 100)
+        with self.assertRaises(TextUnavailable):
+            get_extractor(DOCX)(self.write("broken.docx", office_document({"word/document.xml": "<w:t>"})), 100)
+
+    def test_extract_pdf_text(self):
+        with mock.patch("documents.extraction.shutil.which", return_value=None):
+            with self.assertRaises(TextUnavailable):
+                extract_pdf_text("scan.pdf", 100)
+
+        with mock.patch("documents.extraction.shutil.which", return_value="/usr/bin/pdftotext"):
+            with mock.patch("documents.extraction.subprocess.run") as run:
+                run.return_value.stdout = "Счёт на оплату".encode()
+                self.assertEqual(extract_pdf_text("scan.pdf", 4), "Счёт")
+                self.assertEqual(run.call_args.args[0][-2:], ["scan.pdf", "-"])
+
+                run.side_effect = subprocess.CalledProcessError(1, "pdftotext")
+                with self.assertRaises(TextUnavailable):
+                    extract_pdf_text("scan.pdf", 100)
+
+
+class DocumentTextExtractionTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_document(self, content: bytes, name: str) -> Document:
+        with mock.patch("documents.models.extract_document_text.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                document = Document.objects.create(title=name, document=ContentFile(content, name=name))
+        self.delay = delay
+        return document
+
+    def test_extraction_scheduled_after_upload(self):
+        document = self.create_document(b"roof  repair\n", "notes.txt")
+        self.delay.assert_called_once_with(document.pk)
+        self.create_document(b"\x00\x01", "data.bin")
+        self.delay.assert_not_called()
+
+    @override_settings(DOCUMENTS_TEXT_MAX_SIZE=8)
+    def test_extract_text(self):
+        document = self.create_document(b"roof  repair\n", "notes.txt")
+        self.assertEqual(document.extract_text().text, "roof re")
+        self.assertEqual(DocumentText.objects.get(pk=document.pk).text, "roof re")
+        self.assertEqual(str(document.text), f"{document.pk} (7)")
+
+        # text of identical document is reused
+        identical = self.create_document(b"roof  repair\n", "copy.txt")
+        with mock.patch("documents.models.local_file_path") as local_file_path:
+            self.assertEqual(identical.extract_text().text, "roof re")
+        local_file_path.assert_not_called()
+
+        # document uploaded before checksums were stored
+        identical.checksum = ""
+        self.assertEqual(identical.extract_text().text, "roof re")
+
+        docx = self.create_document(DOCX_CONTENT, "estimate.docx")
+        self.assertEqual(docx.content_type, DOCX)
+        self.assertEqual(docx.extract_text().text, "Roof rep")
+
+        self.assertIsNone(self.create_document(b"\x00\x01", "data.bin").extract_text())
+        self.assertIsNone(Document.objects.create(title="empty", content_type="text/plain").extract_text())
+
+    def test_text_deleted_with_document(self):
+        document = self.create_document(b"roof", "notes.txt")
+        document.extract_text()
+        with mock.patch("documents.models.delete_document_files.delay"):
+            Document.objects.filter(pk=document.pk).delete()
+        self.assertFalse(DocumentText.objects.exists())
@@ -1,5 +1,7 @@
+import hashlib
 from unittest import mock
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
 from documents.forms import DocumentModelForm
@@ -19,3 +21,14 @@ class DocumentModelFormTestCase(TestCase):
         with mock.patch("django.forms.ModelForm.save", self.save_mock):
             self.model_form.save(commit=False)
             self.save_mock.assert_called_once()
+
+    def test_document_model_form_save_metadata(self):
+        upload = SimpleUploadedFile("notes.txt", b"file content", content_type="text/plain")
+        form = DocumentModelForm(data={"description": "notes"}, files={"document": upload})
+        self.assertTrue(form.is_valid())
+        with mock.patch("documents.models.Document.save") as save:
+            document = form.save(commit=True)
+        save.assert_called_once()
+        self.assertEqual(document.size, 12)
+        self.assertEqual(document.content_type, "text/plain")
+        self.assertEqual(document.checksum, hashlib.sha256(b"file content").hexdigest())
@@ -1,8 +1,14 @@
+import tempfile
 from unittest import mock
 
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.db import router
+from django.test import TestCase, override_settings
 
+from documents.helpers import document_upload_path
 from documents.models import Document
+from projects.models import Project, Task
+from worker.documents.tasks import delete_document_files
 
 
 class DocumentQuerySetTestCase(TestCase):
@@ -12,15 +18,138 @@ class DocumentQuerySetTestCase(TestCase):
         self.doc3 = Document.objects.create(title="doc3")
 
     def test_document_query_set_delete(self):
-        mock_file_delete = mock.Mock()
-        mock_delete = mock.Mock()
-        with mock.patch(
-            "django.db.models.fields.files.FieldFile.delete", mock_file_delete
-        ):
-            with mock.patch("django.db.models.QuerySet.delete", mock_delete):
+        self.doc1.document.name = "documents/shared.txt"
+        self.doc2.document.name = "documents/shared.txt"
+        self.doc3.document.name = "documents/own.txt"
+        Document.objects.bulk_update([self.doc1, self.doc2, self.doc3], ["document"])
+        Document.objects.create(title="no file")
+
+        with mock.patch("documents.models.delete_document_files.delay") as mock_delete:
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.filter(pk__in=[self.doc1.pk, self.doc3.pk]).delete()
+                # files are deleted after commit only
+                mock_delete.assert_not_called()
+            # shared file is still referenced by doc2
+            mock_delete.assert_called_once_with(["documents/own.txt"])
+
+            mock_delete.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.all().delete()
+            mock_delete.assert_called_once_with(["documents/shared.txt"])
+        self.assertFalse(Document.objects.exists())
+
+    def test_document_query_set_delete_on_write_database(self):
+        self.doc1.document.name = "documents/own.txt"
+        self.doc1.save()
+        # replica alias doesn't exist, so any read from it fails
+        with mock.patch.object(router, "db_for_read", return_value="replica"):
+            with mock.patch("documents.models.delete_document_files.delay") as mock_delete:
+                with self.captureOnCommitCallbacks(execute=True):
+                    Document.objects.filter(pk=self.doc1.pk).delete()
+        mock_delete.assert_called_once_with(["documents/own.txt"])
+
+    @override_settings(DOCUMENTS_DELETE_BATCH_SIZE=2)
+    def test_document_query_set_delete_batches(self):
+        for i, doc in enumerate([self.doc1, self.doc2, self.doc3]):
+            doc.document.name = f"documents/{i}.txt"
+        Document.objects.bulk_update([self.doc1, self.doc2, self.doc3], ["document"])
+
+        with mock.patch("documents.models.delete_document_files.delay") as mock_delete:
+            with self.captureOnCommitCallbacks(execute=True):
                 Document.objects.all().delete()
-        self.assertEqual(mock_delete.call_count, 1)
-        self.assertEqual(mock_file_delete.call_count, 3)
+        self.assertEqual(
+            mock_delete.call_args_list,
+            [mock.call(["documents/0.txt", "documents/1.txt"]), mock.call(["documents/2.txt"])],
+        )
 
     def test_document_representation(self):
         self.assertEqual(self.doc1.__str__(), f"{self.doc1.id} {self.doc1.title}")
+
+    def test_document_set_metadata(self):
+        self.doc1.set_metadata(ContentFile(b"%PDF-1.4", name="scan.pdf"))
+        self.assertEqual(self.doc1.size, 8)
+        self.assertEqual(self.doc1.content_type, "application/pdf")
+        self.assertEqual(len(self.doc1.checksum), 64)
+
+        self.doc2.set_metadata(ContentFile(b"", name="unknown"))
+        self.assertEqual((self.doc2.size, self.doc2.content_type), (0, "application/octet-stream"))
+
+
+class ContentAddressedDocumentTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, DOCUMENTS_CONTENT_ADDRESSED=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_identical_uploads_share_file(self):
+        doc1 = Document.objects.create(title="spec", document=ContentFile(b"spec", name="spec.PDF"))
+        doc2 = Document.objects.create(title="copy", document=ContentFile(b"spec", name="copy.pdf"))
+        doc3 = Document.objects.create(title="other", document=ContentFile(b"other", name="spec.pdf"))
+        checksum = doc1.checksum
+        self.assertEqual(doc1.document.name, f"documents/sha256/{checksum[0:2]}/{checksum[2:4]}/{checksum}.pdf")
+        self.assertEqual(doc2.document.name, doc1.document.name)
+        self.assertNotEqual(doc3.document.name, doc1.document.name)
+
+        storage = doc1.document.storage
+        with mock.patch("documents.models.delete_document_files.delay", side_effect=delete_document_files):
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.filter(pk=doc1.pk).delete()
+            self.assertTrue(storage.exists(doc2.document.name))
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.filter(pk=doc2.pk).delete()
+        self.assertFalse(storage.exists(doc2.document.name))
+        self.assertTrue(storage.exists(doc3.document.name))
+
+    def test_file_pending_deletion_not_reused(self):
+        doc1 = Document.objects.create(title="spec", document=ContentFile(b"spec", name="spec.pdf"))
+        name = doc1.document.name
+        with mock.patch("documents.models.delete_document_files.delay") as delete:
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.filter(pk=doc1.pk).delete()
+        delete.assert_called_once_with([name])
+        # file is still stored, worker deletes it later
+        doc2 = Document.objects.create(title="copy", document=ContentFile(b"spec", name="copy.pdf"))
+        self.assertNotEqual(doc2.document.name, name)
+        self.assertEqual(doc2.document.read(), b"spec")
+        delete_document_files([name])
+        self.assertTrue(doc2.document.storage.exists(doc2.document.name))
+
+    def test_random_path_without_checksum(self):
+        self.assertRegex(document_upload_path(object(), "file.txt"), r"^documents/\w{2}/\w{2}/\w{32}\.txt$")
+
+
+class OrphanedDocumentsTestCase(TestCase):
+    def setUp(self) -> None:
+        project = Project.objects.create(title="Test project")
+        task = Task.objects.create(title="Test task", project=project)
+        self.project_doc = Document.objects.create(title="project", document="documents/project.txt", size=10)
+        self.task_doc = Document.objects.create(title="task", document="documents/task.txt", size=20)
+        self.orphan = Document.objects.create(title="orphan", document="documents/orphan.txt", size=30)
+        self.shared_orphan = Document.objects.create(title="shared", document="documents/project.txt", size=10)
+        self.empty_orphan = Document.objects.create(title="empty")
+        project.documents.add(self.project_doc)
+        task.documents.add(self.task_doc)
+        self.orphans = [self.orphan.pk, self.shared_orphan.pk, self.empty_orphan.pk]
+
+    def test_orphaned(self):
+        self.assertEqual(sorted(Document.objects.orphaned().values_list("pk", flat=True)), self.orphans)
+        self.assertFalse(Document.objects.orphaned(uploaded_before=self.orphan.uploaded).exists())
+
+    def test_collect_orphaned_dry_run(self):
+        self.assertEqual(Document.objects.collect_orphaned(chunk_size=2, dry_run=True), (3, 40))
+        self.assertEqual(Document.objects.count(), 5)
+
+    def test_collect_orphaned(self):
+        with mock.patch("documents.models.delete_document_files.delay") as mock_delete:
+            with self.captureOnCommitCallbacks(execute=True):
+                # file shared with attached document is not reclaimed
+                self.assertEqual(Document.objects.collect_orphaned(chunk_size=2), (3, 30))
+        mock_delete.assert_called_once_with(["documents/orphan.txt"])
+        with mock.patch.object(router, "db_for_read", return_value="replica"):
+            self.assertEqual(Document.objects.collect_orphaned(), (0, 0))
+        self.assertEqual(
+            sorted(Document.objects.values_list("pk", flat=True)),
+            [self.project_doc.pk, self.task_doc.pk],
+        )
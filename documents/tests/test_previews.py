@@ -0,0 +1,152 @@
+import io
+import os
+import subprocess
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from documents.models import Document
+from documents.previews import (
+    PreviewUnavailable,
+    get_renderer,
+    local_file_path,
+    preview_path,
+    render_image,
+    render_pdf,
+)
+
+
+class PreviewRenderersTestCase(TestCase):
+    def test_preview_path(self):
+        self.assertEqual(preview_path("abcdef", "thumbnail"), "previews/ab/cd/abcdef-thumbnail.jpg")
+
+    def test_get_renderer(self):
+        self.assertEqual(get_renderer("application/pdf"), render_pdf)
+        with mock.patch("documents.previews.Image"):
+            self.assertEqual(get_renderer("image/png"), render_image)
+        with mock.patch("documents.previews.Image", None):
+            self.assertIsNone(get_renderer("image/png"))
+        self.assertIsNone(get_renderer("text/plain"))
+        self.assertIsNone(get_renderer(""))
+        with override_settings(DOCUMENTS_PREVIEWS=False):
+            self.assertIsNone(get_renderer("application/pdf"))
+
+    def test_render_image(self):
+        with mock.patch("documents.previews.Image", None):
+            with self.assertRaises(PreviewUnavailable):
+                render_image("image.png", 160)
+
+        with mock.patch("documents.previews.Image") as image_module:
+            image_module.DecompressionBombError = type("DecompressionBombError", (Exception,), {})
+            image = image_module.open.return_value.__enter__.return_value
+            image.convert.return_value.save.side_effect = lambda buffer, *args, **kwargs: buffer.write(b"jpeg")
+            self.assertEqual(render_image("image.png", 160), b"jpeg")
+            image.thumbnail.assert_called_once_with((160, 160))
+
+            image_module.open.side_effect = OSError("cannot identify image file")
+            with self.assertRaises(PreviewUnavailable):
+                render_image("broken.png", 160)
+
+            image_module.open.side_effect = image_module.DecompressionBombError("image size exceeds limit")
+            with self.assertRaises(PreviewUnavailable):
+                render_image("bomb.png", 160)
+
+    def test_render_pdf(self):
+        with mock.patch("documents.previews.shutil.which", return_value=None):
+            with self.assertRaises(PreviewUnavailable):
+                render_pdf("scan.pdf", 160)
+
+        with mock.patch("documents.previews.shutil.which", return_value="/usr/bin/pdftoppm"):
+            with mock.patch("documents.previews.subprocess.run") as run:
+                run.return_value.stdout = b"jpeg"
+                self.assertEqual(render_pdf("scan.pdf", 160), b"jpeg")
+                command = run.call_args.args[0]
+                self.assertEqual((command[0], command[-3:]), ("/usr/bin/pdftoppm", ["-scale-to", "160", "scan.pdf"]))
+
+                run.side_effect = subprocess.TimeoutExpired(command, 30)
+                with self.assertRaises(PreviewUnavailable):
+                    render_pdf("scan.pdf", 160)
+
+
+class DocumentPreviewsTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_document(self, content: bytes = b"%PDF-1.4", name: str = "scan.pdf") -> Document:
+        with mock.patch("documents.models.generate_document_previews.delay") as delay:
+            with mock.patch("documents.models.extract_document_text.delay"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    document = Document.objects.create(title=name, document=ContentFile(content, name=name))
+        self.delay = delay
+        return document
+
+    def test_previews_scheduled_after_upload(self):
+        document = self.create_document()
+        self.delay.assert_called_once_with(document.pk)
+
+        self.create_document(b"text", "notes.txt")
+        self.delay.assert_not_called()
+
+        # file is not uploaded again
+        with mock.patch("documents.models.generate_document_previews.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                document.save()
+        delay.assert_not_called()
+
+    def test_generate_previews(self):
+        document = self.create_document()
+        identical = self.create_document()
+        renderer = mock.Mock(side_effect=lambda path, size: f"{size}".encode())
+        with mock.patch("documents.models.get_renderer", return_value=renderer):
+            self.assertTrue(document.generate_previews())
+            self.assertEqual(renderer.call_count, 2)
+            self.assertEqual(renderer.call_args.args[0], document.document.path)
+            self.assertEqual(document.thumbnail.name, preview_path(document.checksum, "thumbnail"))
+            with document.preview.open("rb") as file:
+                self.assertEqual(file.read(), b"1024")
+
+            # previews of identical document are reused
+            identical.refresh_from_db()
+            self.assertEqual(identical.preview.name, document.preview.name)
+            Document.objects.filter(pk=identical.pk).update(thumbnail="", preview="")
+            identical.refresh_from_db()
+            self.assertTrue(identical.generate_previews())
+            self.assertEqual(renderer.call_count, 2)
+            self.assertEqual(identical.thumbnail.name, document.thumbnail.name)
+
+        self.assertFalse(self.create_document(b"text", "notes.txt").generate_previews())
+
+    def test_previews_deleted_with_last_document(self):
+        document = self.create_document()
+        identical = self.create_document()
+        with mock.patch("documents.models.get_renderer", return_value=mock.Mock(return_value=b"jpeg")):
+            document.generate_previews()
+        previews = [document.preview.name, document.thumbnail.name]
+
+        with mock.patch("documents.models.delete_document_files.delay") as delete:
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.filter(pk=document.pk).delete()
+            self.assertEqual(delete.call_args.args[0], [document.document.name])
+            with self.captureOnCommitCallbacks(execute=True):
+                Document.objects.filter(pk=identical.pk).delete()
+            self.assertEqual(delete.call_args.args[0], sorted([identical.document.name, *previews]))
+
+    def test_local_file_path(self):
+        document = self.create_document()
+        with local_file_path(document.document) as path:
+            self.assertEqual(path, document.document.path)
+
+        with mock.patch("django.core.files.storage.FileSystemStorage.path", side_effect=NotImplementedError):
+            with mock.patch.object(document.document, "open", return_value=io.BytesIO()):
+                document.document.file = io.BytesIO(b"%PDF-1.4")
+                with local_file_path(document.document) as path:
+                    self.assertTrue(path.endswith(".pdf"))
+                    with open(path, "rb") as file:
+                        self.assertEqual(file.read(), b"%PDF-1.4")
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+
+from documents.apps import ensure_text_search_index
+from documents.models import Document, DocumentText
+from documents.search import (
+    TEXT_SEARCH_INDEX,
+    install_text_search_index,
+    search_documents,
+    uninstall_text_search_index,
+)
+
+
+class DocumentTextSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        self.invoice = DocumentText.objects.create(
+            document=Document.objects.create(title="invoice.pdf"), text="Invoice for roof painting"
+        )
+        self.contract = DocumentText.objects.create(
+            document=Document.objects.create(title="contract.docx"), text="Contract of roof repair"
+        )
+
+    def search(self, *terms):
+        return list(search_documents(DocumentText.objects.order_by("pk"), list(terms)))
+
+    def test_search_documents(self):
+        self.assertEqual(self.search("roof"), [self.invoice, self.contract])
+        self.assertEqual(self.search("roof", "paint"), [self.invoice])
+        self.assertEqual(self.search(), [])
+
+    def test_search_index_maintained(self):
+        self.contract.text = "Contract of painting"
+        self.contract.save()
+        self.invoice.document.delete()
+        self.assertEqual(self.search("paint"), [self.contract])
+        self.assertEqual(self.search("repair"), [])
+
+    def test_search_other_vendors(self):
+        with mock.patch("documents.search.connections", {"default": mock.Mock(vendor="mysql")}):
+            self.assertEqual(self.search("repair"), [self.contract])
+        with mock.patch("documents.search.connections", {"default": mock.Mock(vendor="postgresql")}):
+            queryset = search_documents(DocumentText.objects.all(), ["roof"])
+        self.assertIn("@@", str(queryset.query))
+
+    def test_install_text_search_index(self):
+        uninstall_text_search_index(connection)
+        install_text_search_index(connection, rebuild=True)
+        self.assertEqual(self.search("invoice"), [self.invoice])
+
+        other_vendor = mock.MagicMock(vendor="mysql")
+        install_text_search_index(other_vendor, rebuild=True)
+        uninstall_text_search_index(other_vendor)
+        other_vendor.cursor.return_value.__enter__.return_value.execute.assert_not_called()
+
+    def test_ensure_text_search_index_after_migrate(self):
+        config = apps.get_app_config("documents")
+        with mock.patch.object(TEXT_SEARCH_INDEX, "install") as install:
+            ensure_text_search_index(config)
+            install.assert_called_once_with(connection)
+
+            introspection = mock.MagicMock()
+            introspection.table_names.return_value = []
+            with mock.patch.object(connection, "introspection", introspection):
+                ensure_text_search_index(config)
+            install.assert_called_once()
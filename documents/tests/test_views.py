@@ -1,14 +1,38 @@
+import hashlib
+import io
+import os
+import tempfile
 from unittest import mock
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
 from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
 from django.db import IntegrityError
-from django.db.models import Model
+from django.db.models import Model, QuerySet
 from django.forms import Form
 from django.http import HttpResponseRedirect
 from django.shortcuts import reverse
-from django.test import TestCase
+from django.test import Client, RequestFactory, TestCase, override_settings
 
-from documents.views import DocumentUpload
+from documents.helpers import (
+    SNIFF_SIZE,
+    ChunkedUploadFile,
+    RangeNotSatisfiable,
+    RunningDigests,
+    file_metadata,
+    file_range_iterator,
+    parse_range_header,
+    sniff_content_type,
+    upload_digests,
+)
+from documents.models import ChunkedUpload, Document
+from documents.uploadhandlers import InspectingTemporaryFileUploadHandler
+from documents.views import ChunkedDocumentUpload, DocumentUpload
+from projects.models import Project, Task
 
 
 class DocumentUploadTestCase(TestCase):
@@ -21,6 +45,7 @@ class DocumentUploadTestCase(TestCase):
         document = DocumentUpload()
         document.model = Model
         document.form_class = Form
+        document.request = mock.Mock()
         with self.assertRaises(AttributeError):
             document.form_valid(form=mock.Mock())
 
@@ -29,6 +54,443 @@ class DocumentUploadTestCase(TestCase):
         document.model = Model
         document.form_class = Form
         document.success_url = reverse("home")
+        document.request = mock.Mock()
         document.get_object = mock.Mock(side_effect=IntegrityError())
         ret = document.form_valid(form=mock.Mock())
         self.assertIsInstance(ret, HttpResponseRedirect)
+
+
+class DocumentDownloadViewTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.document = Document.objects.create(title="notes.txt", document=ContentFile(b"0123456789", name="n.txt"))
+        self.task = Task.objects.create(title="Task", project=Project.objects.create(title="Project"))
+        self.task.documents.add(self.document)
+        self.url = reverse("document-download", kwargs={"pk": self.document.pk})
+
+        self.user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        self.user.user_permissions.add(
+            *Permission.objects.filter(codename__in=["view_document", "view_task"]),
+        )
+        self.client.login(email="user@example.com", password="password")
+
+    def test_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Content-Type"], "text/plain")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="notes.txt"')
+        self.assertEqual(response["ETag"], f'"{self.document.checksum}"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_download_not_modified(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.document.checksum}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], f'"{self.document.checksum}"')
+
+    def test_download_range(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(response["Content-Length"], "3")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+
+        # range of another version of file is ignored
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-4", HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_download_size_from_storage(self):
+        Document.objects.filter(pk=self.document.pk).update(size=None, checksum="")
+        response = self.client.get(self.url, HTTP_RANGE="bytes=8-")
+        self.assertEqual(b"".join(response.streaming_content), b"89")
+        self.assertNotIn("ETag", response)
+
+    @override_settings(DOCUMENTS_DOWNLOAD_OFFLOAD="x-sendfile")
+    def test_download_x_sendfile(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Sendfile"], self.document.document.path)
+        self.assertEqual(response.content, b"")
+
+    @override_settings(DOCUMENTS_DOWNLOAD_OFFLOAD="x-accel-redirect")
+    def test_download_x_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.document.document.name}")
+
+    def test_download_not_attached_visible(self):
+        self.task.documents.clear()
+        Project.objects.get().documents.add(self.document)
+        # user can't view projects
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_download_permission_denied(self):
+        self.user.user_permissions.clear()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class DocumentPreviewViewTestCase(DocumentDownloadViewTestCase):
+    def setUp(self) -> None:
+        super(DocumentPreviewViewTestCase, self).setUp()
+        self.document.thumbnail = ContentFile(b"jpeg", name="thumbnail.jpg")
+        self.document.save()
+
+    def preview_url(self, kind: str = "thumbnail", checksum: str = None):
+        return reverse(
+            "document-preview",
+            kwargs={"pk": self.document.pk, "kind": kind, "checksum": checksum or self.document.checksum},
+        )
+
+    def test_preview(self):
+        response = self.client.get(self.preview_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"jpeg")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Cache-Control"], "private, max-age=31536000, immutable")
+
+    def test_preview_not_found(self):
+        # preview is not rendered yet
+        self.assertEqual(self.client.get(self.preview_url("preview")).status_code, 404)
+        self.assertEqual(self.client.get(self.preview_url("document")).status_code, 404)
+        # document content changed
+        self.assertEqual(self.client.get(self.preview_url(checksum="0" * 64)).status_code, 404)
+        self.task.documents.clear()
+        self.assertEqual(self.client.get(self.preview_url()).status_code, 404)
+
+
+class RangeHeaderTestCase(TestCase):
+    def test_parse_range_header(self):
+        self.assertIsNone(parse_range_header(None, 10))
+        self.assertIsNone(parse_range_header("bytes=-", 10))
+        self.assertIsNone(parse_range_header("bytes=0-1,3-4", 10))
+        self.assertEqual(parse_range_header("bytes=0-", 10), (0, 9))
+        self.assertEqual(parse_range_header("bytes=5-100", 10), (5, 9))
+        self.assertEqual(parse_range_header("bytes=-100", 10), (0, 9))
+        for header in ["bytes=-0", "bytes=10-", "bytes=5-4"]:
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range_header(header, 10)
+
+    def test_file_range_iterator(self):
+        file = io.BytesIO(b"0123456789")
+        self.assertEqual(list(file_range_iterator(file, 1, 8, chunk_size=3)), [b"123", b"456", b"78"])
+        self.assertTrue(file.closed)
+        # file is shorter than expected
+        self.assertEqual(list(file_range_iterator(io.BytesIO(b"01"), 0, 9)), [b"01"])
+
+
+class ChunkedDocumentUploadTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root.name,
+            DOCUMENTS_CHUNKED_UPLOAD_DIR=os.path.join(media_root.name, "chunked"),
+            DOCUMENTS_CHUNK_MAX_SIZE=4,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.task = Task.objects.create(title="Task", project=Project.objects.create(title="Project"))
+        self.user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        self.user.user_permissions.add(Permission.objects.get(codename="add_document"))
+        self.client.login(email="user@example.com", password="password")
+        self.content = b"0123456789"
+
+    def init(self, **data) -> dict:
+        data = {"filename": "../spec.txt", "size": len(self.content), "description": "spec", **data}
+        response = self.client.post(reverse("task-chunked-upload", kwargs={"pk": self.task.pk}), data)
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def append(self, upload_id: str, offset: int, chunk: bytes, checksum: str = None):
+        return self.client.post(
+            reverse("task-chunked-upload-append", kwargs={"pk": self.task.pk, "upload_id": upload_id}),
+            chunk,
+            content_type="application/octet-stream",
+            HTTP_X_UPLOAD_OFFSET=str(offset),
+            HTTP_X_CHUNK_CHECKSUM=checksum or hashlib.sha256(chunk).hexdigest(),
+        )
+
+    def complete(self, upload_id: str, **data):
+        return self.client.post(
+            reverse("task-chunked-upload-complete", kwargs={"pk": self.task.pk, "upload_id": upload_id}),
+            data,
+        )
+
+    def test_chunked_upload(self):
+        state = self.init()
+        upload_id = state["upload_id"]
+        self.assertEqual((state["offset"], state["size"], state["chunk_max_size"]), (0, 10, 4))
+
+        self.assertEqual(self.append(upload_id, 0, b"0123").json()["offset"], 4)
+        # chunk is corrupted in transfer
+        response = self.append(upload_id, 4, b"45x7", checksum=hashlib.sha256(b"4567").hexdigest())
+        self.assertEqual(response.status_code, 400)
+        # client lost response and resumes from the server offset
+        response = self.client.get(
+            reverse("task-chunked-upload-append", kwargs={"pk": self.task.pk, "upload_id": upload_id})
+        )
+        self.assertEqual(response.json()["offset"], 4)
+        self.assertEqual(self.append(upload_id, 0, b"0123").status_code, 409)
+        self.assertEqual(self.complete(upload_id).status_code, 409)
+        self.assertEqual(self.append(upload_id, 4, b"4567").json()["offset"], 8)
+        self.assertEqual(self.append(upload_id, 8, b"89").json()["offset"], 10)
+
+        response = self.complete(upload_id, checksum=hashlib.sha256(self.content).hexdigest().upper())
+        self.assertEqual(response.status_code, 201)
+        document = Document.objects.get(pk=response.json()["document_id"])
+        self.assertEqual((document.title, document.description, document.size), ("spec.txt", "spec", 10))
+        with document.document.open("rb") as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertEqual(list(self.task.documents.all()), [document])
+        self.assertEqual(document.owner, self.user)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(settings.DOCUMENTS_CHUNKED_UPLOAD_DIR), [])
+
+    def test_chunked_upload_invalid_chunks(self):
+        upload_id = self.init(size=6)["upload_id"]
+        # larger than max chunk size
+        self.assertEqual(self.append(upload_id, 0, b"01234").status_code, 400)
+        # larger than rest of the file
+        self.assertEqual(self.append(upload_id, 0, b"0123").status_code, 200)
+        self.assertEqual(self.append(upload_id, 4, b"456").status_code, 400)
+        response = self.append(upload_id, 4, b"45", checksum="not a checksum")
+        self.assertEqual(response.status_code, 400)
+        with open(ChunkedUpload.objects.get().path, "rb") as file:
+            self.assertEqual(file.read(), b"0123")
+
+    def test_chunked_upload_locked(self):
+        upload_id = self.init()["upload_id"]
+        with mock.patch.object(QuerySet, "select_for_update", autospec=True, side_effect=QuerySet.select_for_update) as lock:
+            self.assertEqual(self.append(upload_id, 0, b"0123").status_code, 200)
+            self.assertEqual(self.complete(upload_id).status_code, 409)
+        self.assertEqual([call.args[0].model for call in lock.call_args_list], [ChunkedUpload, ChunkedUpload])
+
+    def test_chunked_upload_appended_meanwhile(self):
+        upload_id = self.init()["upload_id"]
+        get_upload = ChunkedDocumentUpload.get_upload
+
+        def appended_meanwhile(view, using=None, lock=False):
+            # other request appends its chunk while this one is received
+            if lock:
+                ChunkedUpload.objects.filter(pk=upload_id).update(offset=4)
+            return get_upload(view, using, lock)
+
+        with mock.patch.object(ChunkedDocumentUpload, "get_upload", autospec=True, side_effect=appended_meanwhile):
+            response = self.append(upload_id, 0, b"abcd")
+        self.assertEqual((response.status_code, response.json()["offset"]), (409, 4))
+        with open(ChunkedUpload.objects.get().path, "rb") as file:
+            self.assertEqual(file.read(), b"")
+
+    def test_chunked_upload_running_checksum(self):
+        upload_id = self.init()["upload_id"]
+        self.append(upload_id, 0, b"0123")
+        self.append(upload_id, 4, b"4567")
+        self.append(upload_id, 8, b"89")
+        with mock.patch.object(ChunkedUploadFile, "chunks", side_effect=AssertionError("file is read again")):
+            response = self.complete(upload_id)
+        self.assertEqual(response.json()["checksum"], hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(Document.objects.get().content_type, "text/plain")
+
+    def test_chunked_upload_continued_by_other_process(self):
+        upload_id = self.init()["upload_id"]
+        self.append(upload_id, 0, b"0123")
+        upload_digests.pop(upload_id)
+        self.append(upload_id, 4, b"4567")
+        self.append(upload_id, 8, b"89")
+        response = self.complete(upload_id)
+        self.assertEqual(response.json()["checksum"], hashlib.sha256(self.content).hexdigest())
+
+    def test_chunked_upload_checksum_mismatch(self):
+        upload_id = self.init(size=2)["upload_id"]
+        self.append(upload_id, 0, b"01")
+        response = self.complete(upload_id, checksum=hashlib.sha256(b"10").hexdigest())
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Document.objects.exists())
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(settings.DOCUMENTS_CHUNKED_UPLOAD_DIR), [])
+
+    def test_chunked_upload_invalid_init(self):
+        url = reverse("task-chunked-upload", kwargs={"pk": self.task.pk})
+        self.assertEqual(self.client.post(url, {"filename": "a.txt", "size": "-1"}).status_code, 400)
+        self.assertEqual(self.client.post(url, {"size": "1"}).status_code, 400)
+        url = reverse("task-chunked-upload", kwargs={"pk": 0})
+        self.assertEqual(self.client.post(url, {"filename": "a.txt", "size": "1"}).status_code, 404)
+
+    @override_settings(DOCUMENTS_USER_QUOTA=15)
+    def test_chunked_upload_quota(self):
+        Document.objects.create(title="used", document=ContentFile(b"0" * 10, name="used.txt"), owner=self.user)
+        url = reverse("task-chunked-upload", kwargs={"pk": self.task.pk})
+        response = self.client.post(url, {"filename": "a.txt", "size": 6})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("5 bytes left", response.json()["error"])
+        self.assertEqual(self.client.post(url, {"filename": "a.txt", "size": 5}).status_code, 201)
+
+    def test_chunked_upload_of_another_user(self):
+        upload = ChunkedUpload.objects.create(
+            user=get_user_model().objects.create_user(email="other@example.com", password="password"),
+            filename="a.txt",
+            size=1,
+        )
+        self.assertEqual(self.append(str(upload.pk), 0, b"0").status_code, 404)
+
+    def test_chunked_upload_to_deleted_object(self):
+        upload_id = self.init(size=0)["upload_id"]
+        Task.objects.all().delete()
+        self.assertEqual(self.complete(upload_id).status_code, 404)
+
+    def test_chunked_upload_to_project(self):
+        project = self.task.project
+        url = reverse("project-chunked-upload", kwargs={"pk": project.pk})
+        upload_id = self.client.post(url, {"filename": "a.txt", "size": 0}).json()["upload_id"]
+        response = self.client.post(
+            reverse("project-chunked-upload-complete", kwargs={"pk": project.pk, "upload_id": upload_id})
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(project.documents.get().pk, response.json()["document_id"])
+        self.assertEqual(str(ChunkedUpload(filename="a.txt", size=2, offset=1)).split(" ", 1)[1], "a.txt (1/2)")
+
+
+class RunningDigestsTestCase(TestCase):
+    def test_running_digests(self):
+        digests = RunningDigests(max_size=1)
+        self.assertEqual(digests.get("a", 0).hexdigest(), hashlib.sha256().hexdigest())
+        digests.set("a", 1, hashlib.sha256(b"0"))
+        self.assertIsNone(digests.get("a", 2))
+        digest = digests.get("a", 1)
+        digest.update(b"1")
+        self.assertEqual(digests.get("a", 1).hexdigest(), hashlib.sha256(b"0").hexdigest())
+        digests.set("b", 2, digest)
+        self.assertIsNone(digests.get("a", 1))
+        self.assertEqual(digests.get("b", 2).hexdigest(), hashlib.sha256(b"01").hexdigest())
+
+
+class SniffContentTypeTestCase(TestCase):
+    def test_sniff_content_type(self):
+        self.assertEqual(sniff_content_type(b"%PDF-1.7\n", "report.txt"), "application/pdf")
+        self.assertEqual(sniff_content_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ", None), "image/webp")
+        self.assertEqual(
+            sniff_content_type(b"PK\x03\x04rest", "report.docx"),
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        )
+        self.assertEqual(sniff_content_type(b"PK\x03\x04rest", "archive"), "application/zip")
+        self.assertEqual(sniff_content_type("текст".encode(), "notes.md"), "text/markdown")
+        self.assertEqual(sniff_content_type(b"plain", "notes"), "text/plain")
+        # multibyte character cut at the end of the head
+        head = ("a" * (SNIFF_SIZE - 1) + "я").encode()[:SNIFF_SIZE]
+        self.assertEqual(sniff_content_type(head, None), "text/plain")
+        self.assertIsNone(sniff_content_type(b"\xff\xfe\xfd", None))
+        self.assertIsNone(sniff_content_type(b"a\x00b", None))
+        self.assertIsNone(sniff_content_type(b"", None))
+
+    def test_file_metadata(self):
+        content = b"a" * 100 * 1024
+        metadata = file_metadata(ContentFile(content, name="a.txt"))
+        self.assertEqual(
+            metadata,
+            {"size": len(content), "content_type": "text/plain", "checksum": hashlib.sha256(content).hexdigest()},
+        )
+
+
+class InspectingUploadHandlerTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.task = Task.objects.create(title="Task", project=Project.objects.create(title="Project"))
+        self.user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        self.user.user_permissions.add(Permission.objects.get(codename="add_document"))
+        self.client.login(email="user@example.com", password="password")
+        self.content = b"\x89PNG\r\n\x1a\n" + b"0" * 100
+
+    def upload(self, content: bytes):
+        return self.client.post(
+            reverse("task-document-upload", kwargs={"pk": self.task.pk}),
+            {"document": SimpleUploadedFile("image.txt", content, content_type="text/plain")},
+        )
+
+    def assertUploaded(self, response):
+        self.assertEqual(response.status_code, 302)
+        document = self.task.documents.get()
+        self.assertEqual(
+            (document.size, document.content_type, document.checksum, document.owner),
+            (len(self.content), "image/png", hashlib.sha256(self.content).hexdigest(), self.user),
+        )
+
+    def test_upload_inspected_in_memory(self):
+        with mock.patch("documents.helpers.sniff_content_type") as sniff:
+            self.assertUploaded(self.upload(self.content))
+        # file is not read again to calculate metadata
+        sniff.assert_not_called()
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=10)
+    def test_upload_inspected_in_temporary_file(self):
+        self.assertUploaded(self.upload(self.content))
+
+    @override_settings(DOCUMENTS_USER_QUOTA=150, FILE_UPLOAD_MAX_MEMORY_SIZE=10)
+    def test_upload_quota(self):
+        self.assertUploaded(self.upload(self.content))
+        response = self.upload(self.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Upload exceeds your storage quota, 42")
+        self.assertEqual(Document.objects.count(), 1)
+
+    def test_upload_csrf_checked(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse("task-document-upload", kwargs={"pk": self.task.pk}),
+            {"document": SimpleUploadedFile("image.txt", self.content, content_type="text/plain")},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Document.objects.exists())
+
+    @override_settings(DOCUMENTS_USER_QUOTA=10)
+    def test_other_uploads_not_inspected(self):
+        self.user.user_permissions.add(Permission.objects.get(codename="add_task"))
+        file = SimpleUploadedFile("tasks.csv", f"project,title\n{self.task.project_id},One\n".encode())
+        with mock.patch("projects.views.import_tasks.delay"):
+            response = self.client.post(reverse("projects-task-import"), {"file": file, "format": "csv"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_upload_without_file(self):
+        response = self.client.post(reverse("task-document-upload", kwargs={"pk": self.task.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].has_error("document", "required"))
+
+    def test_handler_keeps_file_head(self):
+        handler = InspectingTemporaryFileUploadHandler(mock.Mock(upload_quota_remaining=None))
+        handler.new_file("document", "a.txt", "text/plain", None)
+        handler.receive_data_chunk(b"a" * SNIFF_SIZE, 0)
+        handler.receive_data_chunk(b"\x00", SNIFF_SIZE)
+        file = handler.file_complete(SNIFF_SIZE + 1)
+        self.assertEqual(file.sniffed_content_type, "text/plain")
+        self.assertEqual(file.sha256, hashlib.sha256(b"a" * SNIFF_SIZE + b"\x00").hexdigest())
+
+    @override_settings(DOCUMENTS_USER_QUOTA=10)
+    def test_upload_quota_declared_size(self):
+        request = RequestFactory().post("/")
+        request.user = self.user
+        handler = InspectingTemporaryFileUploadHandler(request)
+        with self.assertRaises(StopUpload):
+            handler.new_file("document", "a.txt", "text/plain", 11)
+        self.assertFalse(hasattr(handler, "file"))
+        self.assertIn("10", request.upload_error)
+
+        request.user = mock.Mock(is_authenticated=False)
+        del request.upload_quota_remaining
+        self.assertEqual(handler.remaining_quota(), 0)
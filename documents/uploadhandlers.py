@@ -0,0 +1,101 @@
+"""
+Documents file upload handlers.
+
+Uploaded files are inspected while request body is streamed, so
+documents are not read again to get their metadata:
+
+    - SHA-256 checksum is calculated chunk by chunk
+    - MIME type is detected from the first `SNIFF_SIZE` bytes
+    - total size of user documents is limited by `DOCUMENTS_USER_QUOTA` setting,
+      upload is aborted as soon as it exceeds the quota, before the exceeding
+      chunk is written to memory or temporary file
+
+Attributes:
+    InspectingMemoryFileUploadHandler: in memory upload handler for small files
+    InspectingTemporaryFileUploadHandler: temporary file upload handler for large files
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import MemoryFileUploadHandler, StopUpload, TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.utils.translation import gettext
+
+from documents.helpers import SNIFF_SIZE, sniff_content_type
+from documents.models import Document
+
+
+class InspectingUploadMixin:
+    """Hash, sniff and size-limit uploaded files in one pass.
+
+    Handler inspects data chunks only if it stores them: in memory handler
+    passes chunks of large files to the next handler.
+
+    After the upload is aborted `request.upload_error` is set to error message.
+    """
+
+    def remaining_quota(self) -> Optional[int]:
+        """Get number of bytes user can still upload in current request, None if unlimited."""
+        if not hasattr(self.request, "upload_quota_remaining"):
+            self.request.upload_quota_remaining = Document.objects.remaining_quota(self.request.user)
+        return self.request.upload_quota_remaining
+
+    def abort(self) -> None:
+        """Abort upload without reading the rest of request body.
+
+        Raises:
+            StopUpload: always
+        """
+        self.request.upload_error = gettext("Upload exceeds your storage quota, %(size)s left") % {
+            "size": filesizeformat(self.remaining_quota())
+        }
+        raise StopUpload(connection_reset=True)
+
+    def new_file(
+        self,
+        field_name: str,
+        file_name: str,
+        content_type: str,
+        content_length: Optional[int],
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        """Reset inspection state and check declared file size against the quota."""
+        self.digest, self.head = hashlib.sha256(), b""
+        remaining = self.remaining_quota()
+        if remaining is not None and content_length is not None and content_length > remaining:
+            self.abort()
+        super(InspectingUploadMixin, self).new_file(
+            field_name, file_name, content_type, content_length, *args, **kwargs
+        )
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> Optional[bytes]:
+        """Check quota, hash and keep file head before the chunk is stored."""
+        if getattr(self, "activated", True):
+            remaining = self.remaining_quota()
+            if remaining is not None:
+                if len(raw_data) > remaining:
+                    self.abort()
+                self.request.upload_quota_remaining -= len(raw_data)
+            self.digest.update(raw_data)
+            if len(self.head) < SNIFF_SIZE:
+                self.head += raw_data[: SNIFF_SIZE - len(self.head)]
+        return super(InspectingUploadMixin, self).receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size: int) -> Optional[UploadedFile]:
+        """Attach `sha256` and `sniffed_content_type` attributes to uploaded file."""
+        file = super(InspectingUploadMixin, self).file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.digest.hexdigest()
+            file.sniffed_content_type = sniff_content_type(self.head, file.name)
+        return file
+
+
+class InspectingMemoryFileUploadHandler(InspectingUploadMixin, MemoryFileUploadHandler):
+    """Inspecting upload handler storing small files in memory."""
+
+
+class InspectingTemporaryFileUploadHandler(InspectingUploadMixin, TemporaryFileUploadHandler):
+    """Inspecting upload handler storing large files in temporary files."""
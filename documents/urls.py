@@ -0,0 +1,15 @@
+"""
+Documents url patterns.
+
+path = '/documents/'
+
+"""
+
+from django.urls import path
+
+from .views import DocumentDownloadView, DocumentPreviewView
+
+urlpatterns = [
+    path("<int:pk>/download/", DocumentDownloadView.as_view(), name="document-download"),
+    path("<int:pk>/<str:kind>/<str:checksum>.jpg", DocumentPreviewView.as_view(), name="document-preview"),
+]
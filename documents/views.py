@@ -2,33 +2,64 @@
 Documents views module.
 """
 
-from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.exceptions import ImproperlyConfigured
-from django.db import IntegrityError
-from django.http import HttpResponseRedirect, HttpResponse
+import hashlib
+import os
+import tempfile
+from functools import partial
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.db import IntegrityError, router, transaction
+from django.db.models import Model
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
 from django.utils.translation import gettext_lazy
-from django.views.generic import FormView
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.generic import FormView, View
 
 from documents.forms import DocumentModelForm
-from documents.models import Document
+from documents.helpers import (
+    CHECKSUM_RE,
+    DEFAULT_CONTENT_TYPE,
+    SNIFF_SIZE,
+    ChunkedUploadFile,
+    RangeNotSatisfiable,
+    file_range_iterator,
+    parse_range_header,
+    sniff_content_type,
+    upload_digests,
+)
+from documents.models import ChunkedUpload, Document
+from documents.previews import PREVIEW_CONTENT_TYPE, PREVIEW_SIZES
+from documents.uploadhandlers import InspectingMemoryFileUploadHandler, InspectingTemporaryFileUploadHandler
 
 
-class DocumentUpload(PermissionRequiredMixin, FormView):
-    """Documents upload form view.
+class DocumentAttachMixin:
+    """Attach documents to object through many-to-many field.
 
     Usage:
         1) Override in subclasses which will be use as many-to-many model.
         2) set attributes `model` and `model_field`
     """
 
-    template_name = "document_form.html"
-    permission_required = "documents.add_document"
-    permission_denied_message = gettext_lazy("You have no permission to view Projects")
-    form_class = DocumentModelForm
     model = None
     model_field = "documents"
 
-    def get_object(self) -> Document:
+    def get_object(self) -> Model:
         """Get object for editing."""
         if self.model is None:
             raise ImproperlyConfigured(
@@ -41,14 +72,12 @@ class DocumentUpload(PermissionRequiredMixin, FormView):
 
         return obj
 
-    def form_valid(self, form: DocumentModelForm) -> HttpResponse:
-        """Validate form data and save to DB, redirect to success url."""
-        form.save(commit=True)
-
+    def attach_document(self, document: Document) -> None:
+        """Add document to object many-to-many field."""
         try:
             obj = self.get_object()
             documents = getattr(obj, self.model_field)
-            documents.add(form.instance)
+            documents.add(document)
         except IntegrityError:
             pass
 
@@ -60,8 +89,363 @@ class DocumentUpload(PermissionRequiredMixin, FormView):
                 f".model_field attribute"
             )
 
+
+class DocumentUpload(DocumentAttachMixin, PermissionRequiredMixin, FormView):
+    """Documents upload form view.
+
+    Uploaded files are hashed, sniffed and checked against user quota while streaming
+    by `upload_handlers`, other views keep default `FILE_UPLOAD_HANDLERS`.
+
+    Usage:
+        1) Override in subclasses which will be use as many-to-many model.
+        2) set attributes `model` and `model_field`
+
+    Attributes:
+        upload_handlers (tuple): upload handler classes of the view
+    """
+
+    template_name = "document_form.html"
+    permission_required = "documents.add_document"
+    permission_denied_message = gettext_lazy("You have no permission to view Projects")
+    form_class = DocumentModelForm
+    upload_handlers = (InspectingMemoryFileUploadHandler, InspectingTemporaryFileUploadHandler)
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """Exempt view from CSRF middleware, which reads request body before upload handlers are set.
+
+        CSRF token is checked by `dispatch` instead.
+        """
+        return csrf_exempt(super(DocumentUpload, cls).as_view(**initkwargs))
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Set upload handlers of the view and check CSRF token."""
+        request.upload_handlers = [handler(request) for handler in self.upload_handlers]
+        return csrf_protect(super(DocumentUpload, self).dispatch)(request, *args, **kwargs)
+
+    def form_valid(self, form: DocumentModelForm) -> HttpResponse:
+        """Validate form data and save to DB, redirect to success url."""
+        form.instance.owner = self.request.user
+        form.save(commit=True)
+        self.attach_document(form.instance)
         return HttpResponseRedirect(self.get_success_url())
 
+    def form_invalid(self, form: DocumentModelForm) -> HttpResponse:
+        """Render form with upload handler error instead of missing file error."""
+        upload_error = getattr(self.request, "upload_error", None)
+        if upload_error:
+            form.errors["document"] = form.error_class([upload_error])
+        return super(DocumentUpload, self).form_invalid(form)
+
     def __init__(self) -> None:
         """Init instance."""
         super(DocumentUpload, self).__init__()
+
+
+class ChunkedDocumentUpload(DocumentAttachMixin, PermissionRequiredMixin, View):
+    """Chunked (resumable) document upload JSON endpoints.
+
+    Protocol:
+        1) init: POST `filename`, `size` and optional `description` form fields,
+            responds with `upload_id` and `offset` (201)
+        2) status: GET, responds with `offset` of the next chunk to resume from
+        3) append: POST raw chunk bytes with headers `X-Upload-Offset` (must be equal
+            to current offset, 409 otherwise) and `X-Chunk-Checksum` (chunk SHA-256 hex digest,
+            chunk is discarded with 400 response on mismatch)
+        4) complete: POST with optional `checksum` form field (whole file SHA-256),
+            document is created and attached to the object (201)
+
+    Upload row is locked while received chunk is appended or upload is completed, so concurrent
+    requests of the same upload don't interleave: they wait and get 409 response.
+    Chunk is received into temporary file before the lock is taken.
+    Whole file checksum is updated with every chunk, see `documents.helpers.RunningDigests`.
+
+    Usage:
+        1) Override in subclasses which will be use as many-to-many model.
+        2) set attributes `model` and `model_field`
+        3) route urls with `action` argument of `as_view`: "init", "append" or "complete"
+
+    Attributes:
+        action (str): endpoint of POST requests
+    """
+
+    permission_required = "documents.add_document"
+    permission_denied_message = gettext_lazy("You have no permission to add Documents")
+    http_method_names = ["get", "post"]
+    action = "append"
+
+    read_size = 64 * 1024
+
+    def get_upload(self, using: Optional[str] = None, lock: bool = False) -> ChunkedUpload:
+        """Get upload of current user from database `using`, locked until the end of transaction if `lock` is set."""
+        uploads = ChunkedUpload.objects.all() if using is None else ChunkedUpload.objects.using(using)
+        if lock:
+            uploads = uploads.select_for_update()
+        return get_object_or_404(uploads, pk=self.kwargs.get("upload_id"), user=self.request.user)
+
+    def get_object_or_404(self) -> Model:
+        """Get object documents are attached to or raise 404."""
+        try:
+            return self.get_object()
+        except ObjectDoesNotExist:
+            raise Http404()
+
+    @staticmethod
+    def upload_state(upload: ChunkedUpload, status: int = 200) -> JsonResponse:
+        """Build response with upload state."""
+        return JsonResponse(
+            {
+                "upload_id": str(upload.pk),
+                "offset": upload.offset,
+                "size": upload.size,
+                "chunk_max_size": settings.DOCUMENTS_CHUNK_MAX_SIZE,
+            },
+            status=status,
+        )
+
+    @staticmethod
+    def error(message: str, status: int = 400) -> JsonResponse:
+        """Build error response."""
+        return JsonResponse({"error": message}, status=status)
+
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Get upload state."""
+        return self.upload_state(self.get_upload())
+
+    def post(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Handle POST request with endpoint method."""
+        return getattr(self, self.action)(request)
+
+    def init(self, request: HttpRequest) -> HttpResponse:
+        """Start new upload."""
+        filename = os.path.basename(request.POST.get("filename", "").strip())
+        size = request.POST.get("size", "")
+        if not filename or not size.isdigit():
+            return self.error("filename and size are required")
+        self.get_object_or_404()
+        remaining = Document.objects.remaining_quota(request.user)
+        if remaining is not None and int(size) > remaining:
+            return self.error(f"upload exceeds your storage quota, {remaining} bytes left", status=413)
+
+        upload = ChunkedUpload.objects.create(
+            user=request.user,
+            filename=filename[:255],
+            size=int(size),
+            description=request.POST.get("description", "")[:500],
+        )
+        os.makedirs(settings.DOCUMENTS_CHUNKED_UPLOAD_DIR, exist_ok=True)
+        open(upload.path, "wb").close()
+        return self.upload_state(upload, status=201)
+
+    def append(self, request: HttpRequest) -> HttpResponse:
+        """Append chunk streamed from request body to upload temporary file.
+
+        Chunk is received and verified before upload row is locked, so slow clients
+        don't hold the lock and database connection while chunk is transferred.
+        """
+        using = router.db_for_write(ChunkedUpload)
+        upload = self.get_upload(using)
+        offset = upload.offset
+        if request.headers.get("X-Upload-Offset") != str(offset):
+            return self.upload_state(upload, status=409)
+        checksum = request.headers.get("X-Chunk-Checksum", "").lower()
+        if not CHECKSUM_RE.match(checksum):
+            return self.error("X-Chunk-Checksum header with SHA-256 hex digest of chunk is required")
+
+        max_size = min(settings.DOCUMENTS_CHUNK_MAX_SIZE, upload.size - offset)
+        with tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE, dir=settings.FILE_UPLOAD_TEMP_DIR
+        ) as chunk:
+            digest, received = hashlib.sha256(), 0
+            while received <= max_size:
+                data = request.read(self.read_size)
+                if not data:
+                    break
+                received += len(data)
+                digest.update(data)
+                chunk.write(data)
+            if received > max_size or digest.hexdigest() != checksum:
+                return self.error("chunk is too large" if received > max_size else "chunk checksum mismatch")
+
+            with transaction.atomic(using=using):
+                upload = self.get_upload(using, lock=True)
+                # other request of the upload appended its chunk meanwhile
+                if upload.offset != offset:
+                    return self.upload_state(upload, status=409)
+                file_digest = upload_digests.get(str(upload.pk), offset)
+                chunk.seek(0)
+                with open(upload.path, "r+b") as file:
+                    file.seek(offset)
+                    for data in iter(partial(chunk.read, self.read_size), b""):
+                        if file_digest is not None:
+                            file_digest.update(data)
+                        file.write(data)
+                    file.truncate()
+                upload.offset += received
+                ChunkedUpload.objects.using(using).filter(pk=upload.pk).update(offset=upload.offset)
+                if file_digest is not None:
+                    upload_digests.set(str(upload.pk), upload.offset, file_digest)
+        return self.upload_state(upload)
+
+    def complete(self, request: HttpRequest) -> HttpResponse:
+        """Move assembled file to storage as document and attach it to object."""
+        using = router.db_for_write(ChunkedUpload)
+        with transaction.atomic(using=using):
+            upload = self.get_upload(using, lock=True)
+            if upload.offset != upload.size:
+                return self.upload_state(upload, status=409)
+            self.get_object_or_404()
+
+            file_digest = upload_digests.get(str(upload.pk), upload.offset)
+            upload_digests.pop(str(upload.pk))
+            with ChunkedUploadFile(open(upload.path, "rb"), name=upload.filename) as file:
+                if file_digest is not None:
+                    # inspected like files received by `documents.uploadhandlers`, file is not read again
+                    file.sha256 = file_digest.hexdigest()
+                    file.sniffed_content_type = sniff_content_type(file.read(SNIFF_SIZE), upload.filename)
+                    file.seek(0)
+                document = Document(
+                    title=upload.filename[:100],
+                    description=upload.description or None,
+                    document=file,
+                    owner=request.user,
+                )
+                document.set_metadata(file)
+                checksum = request.POST.get("checksum", "").lower()
+                if checksum and checksum != document.checksum:
+                    ChunkedUpload.objects.using(using).filter(pk=upload.pk).delete()
+                    return self.error("file checksum mismatch")
+                document.save()
+            # removes temporary file if stored file was reused
+            ChunkedUpload.objects.using(using).filter(pk=upload.pk).delete()
+        self.attach_document(document)
+        return JsonResponse(
+            {"document_id": document.pk, "size": document.size, "checksum": document.checksum},
+            status=201,
+        )
+
+
+class DocumentDownloadView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Permission checked document download view.
+
+    Document is available to users with `documents.view_document` permission
+    if it's attached to an object (project or task) user has view permission for.
+
+    File transfer is handed to the front server depending on
+    `DOCUMENTS_DOWNLOAD_OFFLOAD` setting:
+
+        x-sendfile: uWSGI serves file from `X-Sendfile` header with offload threads
+        x-accel-redirect: nginx serves file from internal location
+            `DOCUMENTS_X_ACCEL_REDIRECT_PREFIX`
+        empty: file is streamed by django with single byte range support
+
+    Attributes:
+        login_url (str): path to redirect not logged-in users.
+        permission_required (str): permission requirements code
+        permission_denied_message (str): message for user without permissions
+    """
+
+    login_url = reverse_lazy("accounts:login")
+    permission_required = "documents.view_document"
+    permission_denied_message = gettext_lazy("You have no permission to view Documents")
+
+    def is_attached_visible(self, document: Document) -> bool:
+        """Check if document is attached to an object user can view.
+
+        Args:
+            document: document instance
+
+        Returns:
+            (bool): True if user can see any object document is attached to
+        """
+        relations = [relation for relation in Document._meta.related_objects if relation.many_to_many]
+        for relation in relations:
+            opts = relation.related_model._meta
+            if not self.request.user.has_perm(f"{opts.app_label}.view_{opts.model_name}"):
+                continue
+            links = relation.through.objects.filter(**{relation.field.m2m_reverse_field_name(): document.pk})
+            if links.exists():
+                return True
+        return False
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        """Get document file, or 304 response if client has it already."""
+        document = get_object_or_404(Document.objects.exclude(document=""), pk=pk)
+        if not self.is_attached_visible(document):
+            raise Http404()
+
+        etag = f'"{document.checksum}"' if document.checksum else None
+        last_modified = int(document.uploaded.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.file_response(request, document, etag)
+            filename = document.title or os.path.basename(document.document.name)
+            response["Content-Disposition"] = content_disposition_header(True, filename)
+            response["Accept-Ranges"] = "bytes"
+        if etag:
+            response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def file_response(self, request: HttpRequest, document: Document, etag: Optional[str]) -> HttpResponse:
+        """Build response transferring document file.
+
+        Args:
+            request: http request
+            document: document instance
+            etag: document entity tag
+
+        Returns:
+            (HttpResponse): file response
+        """
+        content_type = document.content_type or DEFAULT_CONTENT_TYPE
+        offload = settings.DOCUMENTS_DOWNLOAD_OFFLOAD
+        if offload == "x-sendfile":
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = document.document.path
+            return response
+        if offload == "x-accel-redirect":
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = quote(settings.DOCUMENTS_X_ACCEL_REDIRECT_PREFIX + document.document.name)
+            return response
+
+        size = document.size if document.size is not None else document.document.size
+        byte_range = None
+        if request.headers.get("If-Range") in (None, etag):
+            try:
+                byte_range = parse_range_header(request.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+        file = document.document.storage.open(document.document.name, "rb")
+        if byte_range is None:
+            return FileResponse(file, content_type=content_type)
+        first, last = byte_range
+        response = StreamingHttpResponse(file_range_iterator(file, first, last), status=206, content_type=content_type)
+        response["Content-Length"] = str(last - first + 1)
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        return response
+
+
+class DocumentPreviewView(DocumentDownloadView):
+    """Permission checked document thumbnail and preview view.
+
+    Preview url contains document checksum, so it changes only with document content
+    and the response is cached by browser as immutable.
+    """
+
+    def get(self, request: HttpRequest, pk: int, kind: str, checksum: str) -> HttpResponse:
+        """Get document preview image."""
+        if kind not in PREVIEW_SIZES:
+            raise Http404()
+        document = get_object_or_404(Document.objects.exclude(**{kind: ""}), pk=pk, checksum=checksum)
+        if not self.is_attached_visible(document):
+            raise Http404()
+
+        file = getattr(document, kind)
+        response = FileResponse(file.storage.open(file.name, "rb"), content_type=PREVIEW_CONTENT_TYPE)
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
+        return response
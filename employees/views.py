@@ -19,6 +19,7 @@ class EmployeeListView(ListView):
     template_name = "employee_list.html"
     model = Employee
     ordering = "id"
+    paginate_by = 10
 
 
 class EmployeeDetailView(DetailView):
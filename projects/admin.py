@@ -9,7 +9,7 @@ from django.db.models import QuerySet
 from django.http import HttpRequest
 from django.urls import reverse
 
-from .models import Comment, Project, Task
+from .models import Comment, Project, Task, TaskBulkUpdate, TaskImport
 
 
 class ProjectAdmin(admin.ModelAdmin):
@@ -167,6 +167,67 @@ class CommentAdmin(admin.ModelAdmin):
         return reverse("projects-task-detail", args=(obj.task.id,)) if obj else None
 
 
+class TaskImportAdmin(admin.ModelAdmin):
+    """Task bulk import admin, imports are created by users and processed by worker.
+
+    Attributes:
+        readonly_fields (list): list of uneditable fields
+        list_display (list): fields displayed in list view page
+        list_filter (list): fields used for left panel with filters
+    """
+
+    readonly_fields = [
+        "id",
+        "user",
+        "created",
+        "finished",
+        "format",
+        "status",
+        "processed",
+        "imported",
+        "failed",
+        "errors",
+    ]
+    list_display = ["id", "user", "created", "status", "processed", "imported", "failed"]
+    list_filter = ["status"]
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        """Imports are uploaded on the site only."""
+        return False
+
+
+class TaskBulkUpdateAdmin(admin.ModelAdmin):
+    """Task bulk update admin, updates are started by users and processed by worker.
+
+    Attributes:
+        readonly_fields (list): list of uneditable fields
+        list_display (list): fields displayed in list view page
+        list_filter (list): fields used for left panel with filters
+    """
+
+    readonly_fields = [
+        "id",
+        "user",
+        "created",
+        "finished",
+        "status",
+        "query",
+        "task_ids",
+        "changes",
+        "total",
+        "processed",
+        "updated",
+    ]
+    list_display = ["id", "user", "created", "status", "total", "processed", "updated"]
+    list_filter = ["status"]
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        """Updates are started on the site only."""
+        return False
+
+
 admin.site.register(Project, ProjectAdmin)
 admin.site.register(Task, TaskAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(TaskImport, TaskImportAdmin)
+admin.site.register(TaskBulkUpdate, TaskBulkUpdateAdmin)
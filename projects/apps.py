@@ -3,11 +3,24 @@ Projects application config.
 """
 
 from django.apps import AppConfig
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_migrate
 from django.utils.translation import gettext_lazy as _
 
 
+def ensure_search_index(sender: AppConfig, using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """Recreate task search triggers after migrations, see `taskcamp.search.SearchIndex.ensure`."""
+    from .search import TASK_SEARCH_INDEX
+
+    TASK_SEARCH_INDEX.ensure(connections[using])
+
+
 class ProjectsConfig(AppConfig):
     """Projects application config class."""
 
     name = "projects"
     verbose_name = _("Projects")
+
+    def ready(self) -> None:
+        """Connect signal handlers."""
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,352 @@
+"""
+Project and task list export module.
+
+Project is exported as ZIP archive built incrementally while it is sent
+to the client: rows are read with server-side cursors in chunks, archive
+entries are compressed on the fly and written to an unseekable buffer
+which is flushed after every chunk, so memory usage doesn't depend
+on project size. Tasks are read once: Markdown sections of tasks are spooled
+to temporary file while tasks.json is streamed.
+
+Archive layout:
+    project.json: project fields
+    tasks.json: list of tasks with their comments
+    project.md: project, tasks and comments as Markdown document
+    documents/<id>-<file name>: files of documents attached to the project and its tasks
+
+Task list is exported as CSV or NDJSON stream of `values()` rows read with
+server-side cursor, so tasks are never instantiated as models and memory usage
+doesn't depend on number of exported tasks.
+
+Attributes:
+    ZipStream: unseekable file object collecting bytes written by `zipfile.ZipFile`
+    ProjectExport: project ZIP export
+    Echo: pseudo file object for `csv.writer`
+    TaskListExport: task list CSV or NDJSON export
+"""
+
+import csv
+import datetime
+import json
+import tempfile
+import time
+import zipfile
+from functools import partial
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.utils.text import get_valid_filename
+
+from documents.models import Document
+
+from .models import Comment, Project, Task
+
+TASK_FIELDS = ("id", "title", "description", "status", "start", "end", "author__email", "assignee__email")
+COMMENT_FIELDS = ("id", "task_id", "created", "description")
+TASK_LIST_FIELDS = (
+    "id",
+    "project_id",
+    "title",
+    "description",
+    "status",
+    "start",
+    "end",
+    "author__email",
+    "assignee__email",
+)
+
+
+class ZipStream:
+    """Unseekable file object collecting bytes written by `zipfile.ZipFile`.
+
+    `zipfile` writes entries with data descriptors to unseekable files,
+    so written bytes can be sent right away.
+    """
+
+    def __init__(self) -> None:
+        """Init empty buffer."""
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        """Collect written bytes."""
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        """Get number of bytes written."""
+        return self._position
+
+    def flush(self) -> None:
+        """Do nothing, bytes are taken with `pop`."""
+
+    def pop(self) -> bytes:
+        """Take bytes written since last call."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, Iterable[bytes], int]]) -> Iterator[bytes]:
+    """Build ZIP archive incrementally.
+
+    Args:
+        entries: archive entries: name, data chunks and compression method
+
+    Yields:
+        (bytes): archive chunks
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, "w") as archive:
+        for name, chunks, compress_type in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compress_type
+            with archive.open(info, "w", force_zip64=True) as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    data = stream.pop()
+                    if data:
+                        yield data
+            yield stream.pop()
+    yield stream.pop()
+
+
+class ProjectExport:
+    """Project ZIP export.
+
+    Usage:
+        response = StreamingHttpResponse(ProjectExport(project), content_type="application/zip")
+
+    Attributes:
+        project (Project): exported project
+        include_tasks (bool): export tasks
+        include_comments (bool): export comments of tasks
+        include_documents (bool): export files of attached documents
+        chunk_size (int): number of rows fetched from server-side cursor at once
+        spool_size (int): max size (bytes) of Markdown task sections kept in memory
+    """
+
+    spool_size = 1024 * 1024
+
+    def __init__(
+        self,
+        project: Project,
+        include_tasks: bool = True,
+        include_comments: bool = True,
+        include_documents: bool = True,
+        chunk_size: int = 500,
+    ) -> None:
+        """Init export."""
+        self.project = project
+        self.include_tasks = include_tasks
+        self.include_comments = include_comments and include_tasks
+        self.include_documents = include_documents
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over ZIP archive chunks."""
+        return stream_zip(self.entries())
+
+    @property
+    def filename(self) -> str:
+        """Get archive file name."""
+        return f"project-{self.project.pk}.zip"
+
+    def entries(self) -> Iterator[Tuple[str, Iterable[bytes], int]]:
+        """Get archive entries: name, data chunks and compression method."""
+        yield "project.json", [self.dumps(self.project_data())], zipfile.ZIP_DEFLATED
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_size) as sections:
+            if self.include_tasks:
+                yield "tasks.json", self.tasks_json(sections), zipfile.ZIP_DEFLATED
+            yield "project.md", self.markdown(sections), zipfile.ZIP_DEFLATED
+        if self.include_documents:
+            for document in self.documents().iterator(chunk_size=self.chunk_size):
+                # files are compressed already mostly
+                yield (
+                    f"documents/{document.pk}-{self.document_filename(document)}",
+                    self.file_chunks(document),
+                    zipfile.ZIP_STORED,
+                )
+
+    @staticmethod
+    def dumps(data: Any) -> bytes:
+        """Serialize data to JSON."""
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2).encode()
+
+    def project_data(self) -> Dict[str, Any]:
+        """Get project fields."""
+        fields = ("id", "title", "description", "due_date", "is_closed", "tasks_total", "tasks_open", "tasks_completed")
+        return {field: getattr(self.project, field) for field in fields}
+
+    def tasks(self) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Iterate over tasks with their comments.
+
+        Tasks and comments are read with two server-side cursors ordered by task id
+        and merged, so comments of only one task are held in memory.
+
+        Yields:
+            (tuple): task fields and list of comment fields
+        """
+        tasks = Task.objects.filter(project=self.project).order_by("id").values(*TASK_FIELDS)
+        comments: Iterator[Dict[str, Any]] = iter(())
+        if self.include_comments:
+            comments = (
+                Comment.objects.filter(task__project=self.project)
+                .order_by("task_id", "created", "id")
+                .values(*COMMENT_FIELDS)
+                .iterator(chunk_size=self.chunk_size)
+            )
+        comment: Optional[Dict[str, Any]] = next(comments, None)
+        for task in tasks.iterator(chunk_size=self.chunk_size):
+            task_comments = []
+            while comment is not None and comment["task_id"] == task["id"]:
+                task_comments.append(comment)
+                comment = next(comments, None)
+            yield task, task_comments
+
+    def tasks_json(self, sections: IO[bytes]) -> Iterator[bytes]:
+        """Stream JSON list of tasks with comments, writing Markdown sections of tasks to `sections` file."""
+        separator = b"[\n"
+        for task, comments in self.tasks():
+            yield separator + self.dumps({**task, "comments": comments})
+            separator = b",\n"
+            sections.write(self.task_markdown(task, comments))
+        yield b"]\n" if separator != b"[\n" else b"[]\n"
+
+    @staticmethod
+    def task_markdown(task: Dict[str, Any], comments: List[Dict[str, Any]]) -> bytes:
+        """Format task and its comments as Markdown section."""
+        lines = ["", f"## #{task['id']} {task['title']}", "", f"Status: {task['status']}"]
+        if task["assignee__email"]:
+            lines.append(f"Assignee: {task['assignee__email']}")
+        if task["description"]:
+            lines += ["", task["description"]]
+        for comment in comments:
+            lines += ["", f"### {comment['created'].isoformat()}", "", comment["description"]]
+        return ("\n".join(lines) + "\n").encode()
+
+    def markdown(self, sections: IO[bytes]) -> Iterator[bytes]:
+        """Stream project and task sections spooled by `tasks_json` as Markdown document."""
+        project = self.project
+        lines = [f"# {project.title}", ""]
+        if project.due_date:
+            lines += [f"Due date: {project.due_date.isoformat()}", ""]
+        if project.description:
+            lines += [project.description, ""]
+        yield "\n".join(lines).encode()
+        sections.seek(0)
+        yield from iter(partial(sections.read, 64 * 1024), b"")
+
+    def documents(self) -> QuerySet:
+        """Get documents attached to project or its tasks."""
+        condition = Q(project=self.project)
+        if self.include_tasks:
+            condition |= Q(task__project=self.project)
+        return Document.objects.filter(condition).exclude(document="").distinct().order_by("id")
+
+    @staticmethod
+    def document_filename(document: Document) -> str:
+        """Get archive file name of document, "document" if its title has no valid file name characters."""
+        name = (document.title or document.document.name).replace("\\", "/").rsplit("/", 1)[-1]
+        try:
+            return get_valid_filename(name)
+        except SuspiciousFileOperation:
+            return "document"
+
+    def file_chunks(self, document: Document) -> Iterator[bytes]:
+        """Read document file chunks, missing file is exported empty."""
+        try:
+            file = document.document.open("rb")
+        except OSError:
+            return
+        with file:
+            yield from file.chunks()
+
+
+class Echo:
+    """Pseudo file object returning written value, lets `csv.writer` format a row without buffering it."""
+
+    def write(self, value: str) -> str:
+        """Return written value."""
+        return value
+
+
+class TaskListExport:
+    """Task list CSV or NDJSON export.
+
+    Lines are joined into chunks of at least `buffer_size` characters,
+    so response isn't sent in a chunk per row.
+
+    Usage:
+        export = TaskListExport(Task.objects.filter(status="new"), "ndjson")
+        response = StreamingHttpResponse(export, content_type=export.content_type)
+
+    Attributes:
+        formats (dict): supported formats and their MIME types
+        queryset (QuerySet): exported tasks, in export order
+        format (str): export format, key of `formats`
+        fields (tuple): exported fields, `values()` lookups
+        chunk_size (int): number of rows fetched from server-side cursor at once
+        buffer_size (int): min size (characters) of response chunk
+    """
+
+    formats = {
+        "csv": "text/csv; charset=utf-8",
+        "ndjson": "application/x-ndjson; charset=utf-8",
+    }
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        format: str = "csv",
+        fields: Tuple[str, ...] = TASK_LIST_FIELDS,
+        chunk_size: int = 2000,
+        buffer_size: int = 64 * 1024,
+    ) -> None:
+        """Init export."""
+        self.queryset = queryset
+        self.format = format
+        self.fields = fields
+        self.chunk_size = chunk_size
+        self.buffer_size = buffer_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over export chunks."""
+        rows = self.queryset.values_list(*self.fields).iterator(chunk_size=self.chunk_size)
+        lines = self.csv_lines(rows) if self.format == "csv" else self.ndjson_lines(rows)
+        buffer: List[str] = []
+        size = 0
+        for line in lines:
+            buffer.append(line)
+            size += len(line)
+            if size >= self.buffer_size:
+                yield "".join(buffer).encode()
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer).encode()
+
+    @property
+    def content_type(self) -> str:
+        """Get export MIME type."""
+        return self.formats[self.format]
+
+    @property
+    def filename(self) -> str:
+        """Get export file name."""
+        return f"tasks.{self.format}"
+
+    def csv_lines(self, rows: Iterator[Tuple[Any, ...]]) -> Iterator[str]:
+        """Format CSV lines with header, dates are formatted to ISO 8601."""
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.fields)
+        for row in rows:
+            yield writer.writerow([value.isoformat() if isinstance(value, datetime.date) else value for value in row])
+
+    def ndjson_lines(self, rows: Iterator[Tuple[Any, ...]]) -> Iterator[str]:
+        """Format newline delimited JSON lines, an object per row."""
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield encoder.encode(dict(zip(self.fields, row))) + "\n"
@@ -5,7 +5,9 @@ Projects forms module.
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
-from .models import Comment, Project, Task
+from employees.models import Employee
+
+from .models import Comment, Project, Task, TaskBulkUpdate, TaskImport, TaskStatus
 
 
 class ProjectModelForm(forms.ModelForm):
@@ -64,6 +66,103 @@ class TaskModelForm(forms.ModelForm):
         }
 
 
+class TaskImportRowForm(TaskModelForm):
+    """Imported task row form.
+
+    Validates row fields with `TaskModelForm` rules, project, author and assignee
+    references are resolved by `projects.imports.TaskImporter` lookup maps
+    instead of a query per row.
+    """
+
+    reference_fields = ["project", "author", "assignee"]
+
+    class Meta(TaskModelForm.Meta):
+        """Task import row form config.
+
+        Args:
+            fields (list): list of included model fields
+        """
+
+        fields = [field for field in TaskModelForm.Meta.fields if field not in ("project", "author", "assignee")]
+
+
+class TaskImportModelForm(forms.ModelForm):
+    """Task import file upload form."""
+
+    class Meta:
+        """Task import form config.
+
+        Args:
+            fields (list): list of included model fields
+            widgets (dict): dict of used widgets for fields
+        """
+
+        model = TaskImport
+        fields = ["file", "format"]
+        widgets = {
+            "file": forms.ClearableFileInput(attrs={"class": "form-control"}),
+            "format": forms.Select(attrs={"class": "form-select"}),
+        }
+
+
+class TaskBulkUpdateForm(forms.Form):
+    """Bulk status and assignee update of selected tasks or all tasks matching search query.
+
+    Attributes:
+        tasks: selected tasks
+        select_all: update all tasks matching search query instead of selected ones
+        q: search query of task list
+        next: task list url to return to
+        status: new status, empty to keep
+        assignee: new assignee, empty to keep
+    """
+
+    tasks = forms.ModelMultipleChoiceField(queryset=Task.objects.all(), required=False)
+    select_all = forms.BooleanField(
+        label=_("All matching tasks"),
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    q = forms.CharField(required=False, max_length=200, widget=forms.HiddenInput)
+    next = forms.CharField(required=False, widget=forms.HiddenInput)
+    status = forms.ChoiceField(
+        label=_("Status"),
+        choices=[("", "---------"), *TaskStatus.choices],
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    assignee = forms.ModelChoiceField(
+        label=_("Assignee"),
+        queryset=Employee.objects.all(),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def clean(self) -> dict:
+        """Check that tasks are selected and something is changed."""
+        cleaned_data = super(TaskBulkUpdateForm, self).clean()
+        if not cleaned_data.get("select_all") and not cleaned_data.get("tasks"):
+            raise forms.ValidationError(_("Select tasks to update"))
+        if not self.changes():
+            raise forms.ValidationError(_("Select new status or assignee"))
+        return cleaned_data
+
+    def changes(self) -> dict:
+        """Get updated task field values."""
+        changes = {}
+        if self.cleaned_data.get("status"):
+            changes["status"] = self.cleaned_data["status"]
+        if self.cleaned_data.get("assignee"):
+            changes["assignee_id"] = self.cleaned_data["assignee"].pk
+        return changes
+
+    def get_bulk_update(self) -> TaskBulkUpdate:
+        """Build unsaved bulk update of valid form."""
+        if self.cleaned_data["select_all"]:
+            return TaskBulkUpdate(query=self.cleaned_data["q"], changes=self.changes())
+        return TaskBulkUpdate(task_ids=[task.pk for task in self.cleaned_data["tasks"]], changes=self.changes())
+
+
 class CommentModelForm(forms.ModelForm):
     """Comment model form for creating and updating."""
 
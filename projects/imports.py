@@ -0,0 +1,315 @@
+"""
+Task bulk import module.
+
+Tasks are read from CSV or NDJSON file row by row, validated with
+`TaskModelForm` rules and inserted in batches:
+
+    - project, author and assignee references are resolved with lookup maps
+      loaded once per import, instead of a query per row
+    - PostgreSQL: batch is sent with one `COPY ... FROM STDIN` statement
+    - other database vendors: batch is inserted with `bulk_create`
+    - invalid rows are reported with their line numbers and skipped,
+      batch violating database constraints is inserted again row by row,
+      so one bad row doesn't abort the import
+
+Columns (CSV header or NDJSON object keys), unknown ones are ignored,
+so files exported by `projects.export.TaskListExport` are imported as is:
+    project, project_id: project id
+    author, author_id, author__email: author employee id or email
+    assignee, assignee_id, assignee__email: assignee employee id or email
+    title, description, status, start, end: task fields, status defaults to `new`
+
+Attributes:
+    REFERENCE_COLUMNS: columns of reference fields, in order of precedence
+    ImportFileError: exception raised when file can't be parsed at all
+    TaskImporter: task bulk importer
+"""
+
+import csv
+import io
+import json
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import DatabaseError, connections, router, transaction
+from django.forms import ModelChoiceField
+from django.forms.fields import Field
+from django.utils.translation import gettext
+
+from employees.models import Employee
+
+from .forms import TaskImportRowForm
+from .models import Project, Task, TaskImportFormat, TaskStatus
+
+REFERENCE_COLUMNS = {
+    "project": ("project", "project_id"),
+    "author": ("author", "author_id", "author__email"),
+    "assignee": ("assignee", "assignee_id", "assignee__email"),
+}
+
+COPY_FIELDS = (
+    "title",
+    "description",
+    "project",
+    "start",
+    "end",
+    "author",
+    "assignee",
+    "status",
+    "description_html",
+    "description_digest",
+)
+
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class ImportFileError(Exception):
+    """Import file is not a valid CSV or NDJSON file."""
+
+
+def copy_value(value: Any) -> str:
+    """Format value for `COPY` text format.
+
+    Args:
+        value: database value
+
+    Returns:
+        (str): escaped value, `\\N` for NULL
+    """
+    if value is None:
+        return "\\N"
+    return str(value).translate(COPY_ESCAPES)
+
+
+class TaskImporter:
+    """Task bulk importer.
+
+    Usage:
+        importer = TaskImporter(batch_size=1000)
+        with open("tasks.csv", "rb") as file:
+            importer.run(file, "csv")
+        print(importer.imported, importer.failed, importer.errors)
+
+    Attributes:
+        using (str): database alias, write database of tasks by default
+        batch_size (int): number of tasks inserted at once
+        use_copy (bool): insert batches with `COPY`, PostgreSQL only
+        max_errors (int): max number of kept row errors, the rest are only counted
+        on_progress (callable): called with importer after every batch
+        processed (int): number of processed rows
+        imported (int): number of created tasks
+        failed (int): number of rejected rows
+        errors (list): row errors: line number and error messages by field
+    """
+
+    def __init__(
+        self,
+        using: Optional[str] = None,
+        batch_size: int = 1000,
+        use_copy: Optional[bool] = None,
+        max_errors: int = 1000,
+        on_progress: Optional[Callable[["TaskImporter"], None]] = None,
+    ) -> None:
+        """Init importer, `COPY` is used by default if database supports it."""
+        self.using = using = using or router.db_for_write(Task)
+        self.batch_size = batch_size
+        self.use_copy = connections[using].vendor == "postgresql" if use_copy is None else use_copy
+        self.max_errors = max_errors
+        self.on_progress = on_progress
+        self.processed = self.imported = self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.projects: Set[int] = set()
+        self.employees: Set[int] = set()
+        self.employees_by_email: Dict[str, int] = {}
+
+    def load_lookups(self) -> None:
+        """Load lookup maps of project and employee references.
+
+        Employee emails aren't unique, email of several employees refers to the first one.
+        """
+        self.projects = set(Project.objects.using(self.using).values_list("pk", flat=True))
+        self.employees = set()
+        self.employees_by_email = {}
+        for pk, email in Employee.objects.using(self.using).order_by("pk").values_list("pk", "email"):
+            self.employees.add(pk)
+            self.employees_by_email.setdefault(email.lower(), pk)
+
+    def add_error(self, line: int, errors: Dict[str, List[str]]) -> None:
+        """Count rejected row and keep its errors.
+
+        Args:
+            line: line number of the row
+            errors: error messages by field, `__all__` for row errors
+        """
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": errors})
+
+    def read_rows(self, file: IO[bytes], format: str) -> Iterator[Tuple[int, Any]]:
+        """Read rows of CSV or NDJSON file.
+
+        Args:
+            file: binary file object
+            format: file format, `TaskImportFormat` value
+
+        Yields:
+            (tuple): line number and row, None for malformed NDJSON line
+
+        Raises:
+            ImportFileError: if file isn't UTF-8 encoded or is malformed CSV
+        """
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="" if format == TaskImportFormat.CSV else None)
+        try:
+            if format == TaskImportFormat.CSV:
+                reader = csv.DictReader(text)
+                for row in reader:
+                    yield reader.line_num, row
+                return
+            for line, data in enumerate(text, 1):
+                if not data.strip():
+                    continue
+                try:
+                    row = json.loads(data)
+                except ValueError:
+                    row = None
+                yield line, row
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ImportFileError(str(exc)) from exc
+        finally:
+            # keep file open
+            text.detach()
+
+    def resolve(self, row: Dict[str, Any], field: str) -> Tuple[Optional[int], Optional[str]]:
+        """Resolve reference field of row with lookup maps.
+
+        Args:
+            row: imported row
+            field: reference field name, key of `REFERENCE_COLUMNS`
+
+        Returns:
+            (tuple): referenced object id and error message
+        """
+        for column in REFERENCE_COLUMNS[field]:
+            value = row.get(column)
+            if value is None or str(value).strip() == "":
+                continue
+            value = str(value).strip()
+            if column.endswith("__email"):
+                pk = self.employees_by_email.get(value.lower())
+            else:
+                pk = int(value) if value.isdigit() else None
+                if pk not in (self.projects if field == "project" else self.employees):
+                    pk = None
+            if pk is None:
+                return None, ModelChoiceField.default_error_messages["invalid_choice"]
+            return pk, None
+        if field == "project":
+            return None, Field.default_error_messages["required"]
+        return None, None
+
+    def build(self, line: int, row: Any) -> Optional[Task]:
+        """Validate row and build unsaved task, invalid row is rejected.
+
+        Args:
+            line: line number of the row
+            row: imported row
+
+        Returns:
+            (Task): task with rendered description html or None if row is invalid
+        """
+        if not isinstance(row, dict):
+            self.add_error(line, {NON_FIELD_ERRORS: [gettext("Row is not a JSON object")]})
+            return None
+        data = {key: value for key, value in row.items() if value is not None}
+        data["status"] = data.get("status") or TaskStatus.NEW
+        form = TaskImportRowForm(data=data)
+        errors = {}
+        references = {}
+        for field in TaskImportRowForm.reference_fields:
+            references[f"{field}_id"], error = self.resolve(row, field)
+            if error:
+                errors[field] = [str(error)]
+        if not form.is_valid():
+            errors.update((field, [str(message) for message in messages]) for field, messages in form.errors.items())
+        if errors:
+            self.add_error(line, errors)
+            return None
+        task = form.instance
+        for attname, pk in references.items():
+            setattr(task, attname, pk)
+        task.render_description()
+        return task
+
+    def insert(self, tasks: List[Task]) -> None:
+        """Insert tasks and refresh task counters of their projects.
+
+        Args:
+            tasks: unsaved tasks
+        """
+        if not self.use_copy:
+            Task.objects.using(self.using).bulk_create(tasks)
+            return
+        connection = connections[self.using]
+        fields = [Task._meta.get_field(name) for name in COPY_FIELDS]
+        buffer = io.StringIO()
+        for task in tasks:
+            values = (field.get_db_prep_save(getattr(task, field.attname), connection) for field in fields)
+            buffer.write("\t".join(copy_value(value) for value in values) + "\n")
+        buffer.seek(0)
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        table = connection.ops.quote_name(Task._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+        Project.objects.using(self.using).filter(pk__in={task.project_id for task in tasks}).refresh_task_counters()
+
+    def flush(self, batch: List[Tuple[int, Task]]) -> None:
+        """Insert batch, rows of batch violating database constraints are inserted one by one.
+
+        Args:
+            batch: line numbers and unsaved tasks
+        """
+        try:
+            with transaction.atomic(using=self.using):
+                self.insert([task for _, task in batch])
+        except DatabaseError:
+            for line, task in batch:
+                task.pk = None
+                try:
+                    with transaction.atomic(using=self.using):
+                        Task.objects.using(self.using).bulk_create([task])
+                except DatabaseError as exc:
+                    self.add_error(line, {NON_FIELD_ERRORS: [str(exc)]})
+                else:
+                    self.imported += 1
+        else:
+            self.imported += len(batch)
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def run(self, file: IO[bytes], format: str) -> "TaskImporter":
+        """Import tasks from file.
+
+        Args:
+            file: binary file object
+            format: file format, `TaskImportFormat` value
+
+        Returns:
+            (TaskImporter): importer with counters and errors
+
+        Raises:
+            ImportFileError: if file isn't UTF-8 encoded or is malformed CSV,
+                batches inserted before the error are kept
+        """
+        self.load_lookups()
+        batch: List[Tuple[int, Task]] = []
+        for line, row in self.read_rows(file, format):
+            self.processed += 1
+            task = self.build(line, row)
+            if task is not None:
+                batch.append((line, task))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        return self
@@ -0,0 +1,3 @@
+"""
+Projects management commands package.
+"""
@@ -0,0 +1,56 @@
+"""
+Bulk task import management command.
+
+Examples:
+    Import tasks from CSV file in batches of 5000 rows
+        python3 manage.py import_tasks tasks.csv --batch-size 5000
+
+    Import tasks from NDJSON file with bulk_create instead of PostgreSQL COPY
+        python3 manage.py import_tasks tasks.ndjson --no-copy
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from projects.imports import ImportFileError, TaskImporter
+from projects.models import TaskImportFormat
+
+
+class Command(BaseCommand):
+    """Import tasks from CSV or NDJSON file, see `projects.imports`."""
+
+    help = "Import tasks from CSV or NDJSON file, invalid rows are reported and skipped"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments."""
+        parser.add_argument("path", help="CSV or NDJSON file path")
+        parser.add_argument(
+            "--format", choices=TaskImportFormat.values, help="file format (default by file name extension)"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="number of tasks inserted at once")
+        parser.add_argument("--no-copy", action="store_true", help="don't use PostgreSQL COPY")
+        parser.add_argument("--database", help="database alias to use (default: write database of tasks)")
+
+    def handle(self, *args, **options) -> None:
+        """Import file and report row errors."""
+        file_format = options["format"] or os.path.splitext(options["path"])[1].lstrip(".").lower()
+        if file_format not in TaskImportFormat.values:
+            raise CommandError("Unknown file format, use --format option")
+        importer = TaskImporter(
+            using=options["database"],
+            batch_size=options["batch_size"],
+            use_copy=False if options["no_copy"] else None,
+            max_errors=100,
+        )
+        try:
+            with open(options["path"], "rb") as file:
+                importer.run(file, file_format)
+        except (ImportFileError, OSError) as exc:
+            raise CommandError(f"Import failed after {importer.imported} tasks: {exc}")
+        for error in importer.errors:
+            messages = "; ".join(f"{field}: {' '.join(errors)}" for field, errors in error["errors"].items())
+            self.stderr.write(f"line {error['line']}: {messages}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {importer.imported} of {importer.processed} tasks, {importer.failed} failed")
+        )
@@ -0,0 +1,103 @@
+"""
+Rebuild denormalized project task counters management command.
+
+Examples:
+    Rebuild counters of all projects with 4 threads in chunks of 500 projects
+        python3 manage.py rebuild_task_counters --workers 4 --chunk-size 500
+
+    Only check counters, exit with error if any of them are out of sync
+        python3 manage.py rebuild_task_counters --verify
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections, router
+from django.db.models import Count, Q
+
+from projects.models import OPEN_TASK_STATUSES, Project
+
+
+def rebuild_chunk(project_ids: List[int], using: str) -> int:
+    """Recalculate task counters for chunk of projects.
+
+    Args:
+        project_ids: list of project ids
+        using: database alias
+
+    Returns:
+        (int): number of updated projects
+    """
+    return Project.objects.using(using).filter(pk__in=project_ids).refresh_task_counters()
+
+
+def verify_chunk(project_ids: List[int], using: str) -> List[int]:
+    """Find projects with task counters different from actual tasks count.
+
+    Args:
+        project_ids: list of project ids
+        using: database alias
+
+    Returns:
+        (list): ids of projects with out of sync counters
+    """
+    projects = (
+        Project.objects.using(using)
+        .filter(pk__in=project_ids)
+        .annotate(
+            actual_total=Count("task"),
+            actual_open=Count("task", filter=Q(task__status__in=OPEN_TASK_STATUSES)),
+        )
+        .values_list("pk", "tasks_total", "tasks_open", "tasks_completed", "actual_total", "actual_open")
+    )
+    return [
+        pk
+        for pk, total, open_, completed, actual_total, actual_open in projects
+        if (total, open_, completed) != (actual_total, actual_open, actual_total - actual_open)
+    ]
+
+
+def run_in_thread(job: Callable[[List[int], str], Any], project_ids: List[int], using: str) -> Any:
+    """Run chunk job in pool thread and close thread's own db connection afterwards."""
+    try:
+        return job(project_ids, using)
+    finally:
+        connections[using].close()
+
+
+class Command(BaseCommand):
+    """Rebuild or verify project task counters in parallel chunks."""
+
+    help = "Rebuild (or verify with --verify) denormalized task counters of projects"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments."""
+        parser.add_argument("--chunk-size", type=int, default=500, help="number of projects processed in one query")
+        parser.add_argument("--workers", type=int, default=4, help="number of parallel threads")
+        parser.add_argument("--verify", action="store_true", help="check counters without changing them")
+        parser.add_argument("--database", help="database alias to use (default: write database of projects)")
+
+    def handle(self, *args, **options) -> None:
+        """Split projects into chunks and process them in thread pool."""
+        using = options["database"] or router.db_for_write(Project)
+        chunk_size = options["chunk_size"]
+        project_ids = list(Project.objects.using(using).order_by("pk").values_list("pk", flat=True))
+        chunks = [project_ids[i : i + chunk_size] for i in range(0, len(project_ids), chunk_size)]
+        job = verify_chunk if options["verify"] else rebuild_chunk
+
+        if options["workers"] > 1:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                results = list(executor.map(partial(run_in_thread, job, using=using), chunks))
+        else:
+            results = [job(chunk, using) for chunk in chunks]
+
+        if not options["verify"]:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt task counters of {sum(results)} projects"))
+            return
+
+        mismatched = sorted(pk for chunk in results for pk in chunk)
+        if mismatched:
+            raise CommandError(f"Task counters are out of sync for projects: {', '.join(map(str, mismatched))}")
+        self.stdout.write(self.style.SUCCESS(f"Task counters of {len(project_ids)} projects are in sync"))
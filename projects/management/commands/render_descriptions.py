@@ -0,0 +1,71 @@
+"""
+Backfill pre-rendered description html management command.
+
+Examples:
+    Render stale descriptions of all projects, tasks and comments in batches of 500 rows
+        python3 manage.py render_descriptions --batch-size 500
+
+    Re-render all comments
+        python3 manage.py render_descriptions --model projects.Comment --force
+"""
+
+from typing import Type
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import router, transaction
+
+from projects.models import Comment, Project, RenderedDescriptionModel, Task
+
+MODELS = {model._meta.label: model for model in (Project, Task, Comment)}
+
+
+def render_batches(model: Type[RenderedDescriptionModel], batch_size: int, using: str, force: bool = False) -> int:
+    """Render stale description html of all model rows.
+
+    Rows are read in primary key order, one batch per query,
+    and stale ones are written back with one `bulk_update` per batch.
+
+    Args:
+        model: model class
+        batch_size: number of rows in one batch
+        using: database alias
+        force: re-render fresh html too
+
+    Returns:
+        (int): number of rendered rows
+    """
+    queryset = model.objects.using(using).order_by("pk").only("pk", "description", "description_digest")
+    rendered, last_pk = 0, 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return rendered
+        last_pk = batch[-1].pk
+        stale = [obj for obj in batch if force or not obj.description_html_is_fresh]
+        for obj in stale:
+            obj.render_description()
+        with transaction.atomic(using=using):
+            model.objects.using(using).bulk_update(stale, model.rendered_fields)
+        rendered += len(stale)
+
+
+class Command(BaseCommand):
+    """Render Markdown descriptions of existing rows to stored html."""
+
+    help = "Render stale (or all with --force) pre-rendered description html of projects, tasks and comments"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command arguments."""
+        parser.add_argument("--batch-size", type=int, default=500, help="number of rows processed in one query")
+        parser.add_argument(
+            "--model", action="append", choices=sorted(MODELS), help="model to process (default all of them)"
+        )
+        parser.add_argument("--force", action="store_true", help="re-render html even if it is fresh")
+        parser.add_argument("--database", help="database alias to use (default: write database of every model)")
+
+    def handle(self, *args, **options) -> None:
+        """Process models one by one."""
+        for label in options["model"] or MODELS:
+            using = options["database"] or router.db_for_write(MODELS[label])
+            rendered = render_batches(MODELS[label], options["batch_size"], using, options["force"])
+            self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} {label} descriptions"))
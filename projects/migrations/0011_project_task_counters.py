@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_task_counters(apps, schema_editor):
+    """Calculate task counters for existing projects."""
+    Project = apps.get_model("projects", "Project")
+    Task = apps.get_model("projects", "Task")
+    alias = schema_editor.connection.alias
+
+    open_statuses = ["new", "in progress"]
+    tasks = Task.objects.using(alias).filter(project=OuterRef("pk")).order_by().values("project")
+
+    def count(queryset):
+        return Coalesce(Subquery(queryset.annotate(count=Count("pk")).values("count")), 0)
+
+    Project.objects.using(alias).update(
+        tasks_total=count(tasks),
+        tasks_open=count(tasks.filter(status__in=open_statuses)),
+        tasks_completed=count(tasks.exclude(status__in=open_statuses)),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0010_project_documents"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="tasks_completed",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Completed tasks"),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="tasks_open",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Open tasks"),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="tasks_total",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Tasks"),
+        ),
+        migrations.RunPython(fill_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:59
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from projects.search import install_search_index, uninstall_search_index
+
+
+def install_search(apps, schema_editor):
+    """Create search triggers and indexes and index existing tasks."""
+    install_search_index(schema_editor.connection, rebuild=True)
+
+
+def uninstall_search(apps, schema_editor):
+    """Drop search triggers and indexes."""
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0011_project_task_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0012_task_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="description_digest",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="description_html",
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name="Description html"),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="description_digest",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="description_html",
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name="Description html"),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="description_digest",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="description_html",
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name="Description html"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:08
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_rendered_description_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskImport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('finished', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Finished')),
+                ('file', models.FileField(upload_to='imports/', verbose_name='File')),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], max_length=10, verbose_name='Format')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', editable=False, max_length=20, verbose_name='Status')),
+                ('processed', models.PositiveIntegerField(default=0, editable=False, verbose_name='Processed')),
+                ('imported', models.PositiveIntegerField(default=0, editable=False, verbose_name='Imported')),
+                ('failed', models.PositiveIntegerField(default=0, editable=False, verbose_name='Failed')),
+                ('errors', models.JSONField(blank=True, default=list, editable=False, verbose_name='Errors')),
+                ('user', models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Task import',
+                'verbose_name_plural': 'Task imports',
+            },
+        ),
+    ]
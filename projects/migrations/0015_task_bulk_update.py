@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:15
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0014_task_import'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskBulkUpdate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('finished', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Finished')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', editable=False, max_length=20, verbose_name='Status')),
+                ('processed', models.PositiveIntegerField(default=0, editable=False, verbose_name='Processed')),
+                ('query', models.CharField(blank=True, editable=False, max_length=200, verbose_name='Query')),
+                ('task_ids', models.JSONField(blank=True, editable=False, null=True, verbose_name='Tasks')),
+                ('changes', models.JSONField(default=dict, editable=False, verbose_name='Changes')),
+                ('total', models.PositiveIntegerField(default=0, editable=False, verbose_name='Total')),
+                ('updated', models.PositiveIntegerField(default=0, editable=False, verbose_name='Updated')),
+                ('user', models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Task bulk update',
+                'verbose_name_plural': 'Task bulk updates',
+            },
+        ),
+    ]
@@ -2,14 +2,123 @@
 Models for project module.
 """
 
-from django.db import models
+import uuid
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 
 from documents.models import Document
 from employees.models import Employee
+from worker.rendering.tasks import render_description_html
+
+from .rendering import markdown_digest, render_markdown
+from .search import search_tasks
+
+
+class RenderedDescriptionModel(models.Model):
+    """Abstract model storing pre-rendered html of Markdown `description` field.
+
+    Descriptions up to `MARKDOWN_RENDER_SYNC_MAX_SIZE` characters are rendered on save,
+    larger ones are rendered by worker after transaction commit,
+    until then html is rendered at request time.
+
+    Attributes:
+        description_html: rendered description html
+        description_digest: content hash of description the html was rendered from
+    """
+
+    rendered_fields = ("description_html", "description_digest")
+
+    description_html = models.TextField(verbose_name=_("Description html"), null=True, blank=True, editable=False)
+    description_digest = models.CharField(max_length=64, blank=True, default="", editable=False)
+
+    @property
+    def description_html_is_fresh(self) -> bool:
+        """Check if stored html is rendered from current description."""
+        return self.description_digest == markdown_digest(self.description)
+
+    def render_description(self) -> None:
+        """Render description html in place."""
+        self.description_html = render_markdown(self.description)
+        self.description_digest = markdown_digest(self.description)
+
+    def save(self, *args, **kwargs) -> None:
+        """Save instance with html rendered from description.
+
+        Rendering of large descriptions is scheduled to worker.
+        """
+        update_fields = kwargs.get("update_fields")
+        schedule = False
+        if (update_fields is None or "description" in update_fields) and not self.description_html_is_fresh:
+            if len(self.description or "") <= settings.MARKDOWN_RENDER_SYNC_MAX_SIZE:
+                self.render_description()
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, *self.rendered_fields}
+            else:
+                schedule = True
+        super(RenderedDescriptionModel, self).save(*args, **kwargs)
+        if schedule:
+            transaction.on_commit(
+                partial(render_description_html.delay, self._meta.label, self.pk, markdown_digest(self.description)),
+                using=kwargs.get("using") or router.db_for_write(type(self), instance=self),
+            )
+
+    class Meta:
+        """Abstract model config."""
+
+        abstract = True
+
+
+class ProjectQuerySet(models.QuerySet):
+    """Queryset for Project model.
+
+    Maintains denormalized task counters stored on project rows.
+    """
+
+    def refresh_task_counters(self) -> int:
+        """Recalculate task counters of projects in queryset from tasks table.
+
+        Uses single `UPDATE` statement with correlated subqueries.
+
+        Returns:
+            (int): number of updated projects
+        """
+        tasks = Task.objects.filter(project=OuterRef("pk")).order_by().values("project")
+
+        def count(queryset: models.QuerySet) -> Coalesce:
+            return Coalesce(Subquery(queryset.annotate(count=Count("pk")).values("count")), 0)
+
+        return self.update(
+            tasks_total=count(tasks),
+            tasks_open=count(tasks.filter(status__in=OPEN_TASK_STATUSES)),
+            tasks_completed=count(tasks.exclude(status__in=OPEN_TASK_STATUSES)),
+        )
+
+    def shift_task_counters(self, total: int = 0, open: int = 0, completed: int = 0) -> int:
+        """Increment (or decrement) task counters of projects in queryset.
+
+        Args:
+            total: delta for total tasks counter
+            open: delta for open tasks counter
+            completed: delta for completed tasks counter
+
+        Returns:
+            (int): number of updated projects
+        """
+        return self.update(
+            tasks_total=F("tasks_total") + total,
+            tasks_open=F("tasks_open") + open,
+            tasks_completed=F("tasks_completed") + completed,
+        )
 
 
-class Project(models.Model):
+class Project(RenderedDescriptionModel):
     """Project django model.
 
     Attributes:
@@ -18,9 +127,17 @@ class Project(models.Model):
         due_date: project due date
         is_closed: is this project closed
         documents (Document): many-to-many, attached documents
+        tasks_total: denormalized counter of project tasks
+        tasks_open: denormalized counter of new and in progress tasks
+        tasks_completed: denormalized counter of done and closed tasks
+        description_html: rendered description html, see `RenderedDescriptionModel`
 
     """
 
+    objects = ProjectQuerySet.as_manager()
+
+    task_counter_fields = ("tasks_total", "tasks_open", "tasks_completed")
+
     title = models.CharField(verbose_name=_("Title"), max_length=200)
     description = models.TextField(verbose_name=_("Description"), max_length=20000, null=True, blank=True)
     due_date = models.DateField(verbose_name=_("Due date"), null=True, blank=True)
@@ -28,10 +145,31 @@ class Project(models.Model):
 
     documents = models.ManyToManyField(Document, verbose_name=_("Documents"))
 
+    tasks_total = models.PositiveIntegerField(verbose_name=_("Tasks"), default=0, editable=False)
+    tasks_open = models.PositiveIntegerField(verbose_name=_("Open tasks"), default=0, editable=False)
+    tasks_completed = models.PositiveIntegerField(verbose_name=_("Completed tasks"), default=0, editable=False)
+
     def __str__(self) -> str:
         """Project string representation."""
         return f"{self.id}: {self.title} ({self.is_closed})"
 
+    def save(self, *args, **kwargs) -> None:
+        """Save project without overwriting task counters maintained by tasks."""
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.task_counter_fields
+            ]
+        super(Project, self).save(*args, **kwargs)
+
+    @property
+    def completed(self) -> float:
+        """Percent of completed tasks of the project."""
+        if not self.tasks_total:
+            return 0.0
+        return 100.0 * self.tasks_completed / self.tasks_total
+
     class Meta:
         """Project names config."""
 
@@ -48,7 +186,129 @@ class TaskStatus(models.TextChoices):
     CLOSED = "closed", _("Closed")
 
 
-class Task(models.Model):
+OPEN_TASK_STATUSES = [TaskStatus.NEW, TaskStatus.IN_PROGRESS]
+
+
+def task_counters_delta(status: str, sign: int = 1) -> Dict[str, int]:
+    """Build project counters delta for one task with given status.
+
+    Args:
+        status: task status
+        sign: 1 if task is added to project, -1 if task is removed
+
+    Returns:
+        (dict): keyword arguments for `ProjectQuerySet.shift_task_counters`
+    """
+    if status in OPEN_TASK_STATUSES:
+        return {"total": sign, "open": sign}
+    return {"total": sign, "completed": sign}
+
+
+class TaskQuerySet(models.QuerySet):
+    """Queryset for Task model.
+
+    Keeps denormalized `Project` task counters consistent
+    on bulk operations which bypass `Task.save` and `Task.delete`.
+    """
+
+    counted_fields = {"status", "project", "project_id"}
+
+    def _db_for_write(self) -> str:
+        """Get alias of database the queryset writes to.
+
+        Tasks and projects are read, locked and counted on this database, not on replica:
+        `self.db` is the read database until the queryset is used for writing.
+        """
+        return self._db or router.db_for_write(self.model, **self._hints)
+
+    def _project_ids(self) -> List[int]:
+        return list(self.order_by().values_list("project_id", flat=True).distinct())
+
+    def _refresh_project_counters(self, project_ids: Iterable[Optional[int]], using: str) -> None:
+        project_ids = {pk for pk in project_ids if pk is not None}
+        if project_ids:
+            Project.objects.using(using).filter(pk__in=project_ids).refresh_task_counters()
+
+    def update(self, **kwargs) -> int:
+        """Update tasks and refresh counters of affected projects."""
+        if not self.counted_fields.intersection(kwargs):
+            return super(TaskQuerySet, self).update(**kwargs)
+        using = self._db_for_write()
+        tasks = self.using(using)
+        with transaction.atomic(using=using):
+            project_ids = tasks._project_ids()
+            rows = super(TaskQuerySet, tasks).update(**kwargs)
+            project = kwargs.get("project", kwargs.get("project_id"))
+            project_ids.append(getattr(project, "pk", project))
+            self._refresh_project_counters(project_ids, using)
+        return rows
+
+    def update_in_projects(self, **kwargs) -> int:
+        """Update tasks without moving them to other projects, shifting counters of affected projects.
+
+        Unlike `update` counters aren't recalculated from tasks table: updated tasks are locked
+        and counters are shifted by number of tasks moved between open and completed statuses,
+        so cost depends on number of updated tasks only, not on size of affected projects.
+
+        Returns:
+            (int): number of updated tasks
+
+        Raises:
+            ValueError: if tasks are moved to other project
+        """
+        if "project" in kwargs or "project_id" in kwargs:
+            raise ValueError("update_in_projects() can't move tasks to other project")
+        if "status" not in kwargs:
+            return super(TaskQuerySet, self).update(**kwargs)
+        is_open = kwargs["status"] in OPEN_TASK_STATUSES
+        using = self._db_for_write()
+        tasks = self.using(using)
+        with transaction.atomic(using=using):
+            moved: Dict[int, int] = {}
+            for project_id, status in tasks.select_for_update().order_by().values_list("project_id", "status"):
+                if project_id is not None and (status in OPEN_TASK_STATUSES) != is_open:
+                    moved[project_id] = moved.get(project_id, 0) + 1
+            rows = super(TaskQuerySet, tasks).update(**kwargs)
+            sign = 1 if is_open else -1
+            for project_id, count in moved.items():
+                Project.objects.using(using).filter(pk=project_id).shift_task_counters(
+                    open=sign * count, completed=-sign * count
+                )
+        return rows
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """Delete tasks and refresh counters of affected projects."""
+        using = self._db_for_write()
+        tasks = self.using(using)
+        with transaction.atomic(using=using):
+            project_ids = tasks._project_ids()
+            deleted = super(TaskQuerySet, tasks).delete()
+            self._refresh_project_counters(project_ids, using)
+        return deleted
+
+    def bulk_create(self, objs: Iterable["Task"], *args, **kwargs) -> List["Task"]:
+        """Bulk insert tasks and refresh counters of affected projects."""
+        using = self._db_for_write()
+        with transaction.atomic(using=using):
+            objs = super(TaskQuerySet, self.using(using)).bulk_create(objs, *args, **kwargs)
+            self._refresh_project_counters((obj.project_id for obj in objs), using)
+        return objs
+
+    def bulk_update(self, objs: Iterable["Task"], fields: Iterable[str], *args, **kwargs) -> int:
+        """Bulk update tasks and refresh counters of affected projects."""
+        objs = list(objs)
+        if not self.counted_fields.intersection(fields):
+            return super(TaskQuerySet, self).bulk_update(objs, fields, *args, **kwargs)
+        using = self._db_for_write()
+        tasks = self.using(using)
+        with transaction.atomic(using=using):
+            project_ids = tasks.filter(pk__in=[obj.pk for obj in objs])._project_ids()
+            rows = super(TaskQuerySet, tasks).bulk_update(objs, fields, *args, **kwargs)
+            self._refresh_project_counters(project_ids + [obj.project_id for obj in objs], using)
+        return rows
+
+
+class Task(RenderedDescriptionModel):
     """Task model.
 
     Attributes:
@@ -61,9 +321,17 @@ class Task(models.Model):
         assignee (Employee):
         status (TaskStatus):
         documnents (Document):
+        search_vector: full text search vector (PostgreSQL only),
+            maintained by database trigger, see `projects.search`
+        description_html: rendered description html, see `RenderedDescriptionModel`
 
+    Notes:
+        Saving and deleting tasks maintains `Project` task counters
+        in the same transaction.
     """
 
+    objects = TaskQuerySet.as_manager()
+
     title = models.CharField(verbose_name=_("Title"), max_length=200)
     description = models.TextField(verbose_name=_("Description"), max_length=20000, null=True, blank=True)
     project = models.ForeignKey(Project, verbose_name=_("Project"), on_delete=models.CASCADE)
@@ -92,11 +360,56 @@ class Task(models.Model):
         default=TaskStatus.NEW,
     )
     documents = models.ManyToManyField(Document, verbose_name=_("Documents"))
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self) -> str:
         """Task string representation."""
         return f"{self.id}: {self.title} ({self.status})"
 
+    def _stored_counted_state(self, using: str) -> Optional[Tuple[int, str]]:
+        """Get project and status the task is currently counted with in db.
+
+        Task row is locked until the end of transaction, so concurrent saves
+        of the task compute counter deltas from the state stored by each other.
+        """
+        if self.pk is None:
+            return None
+        return (
+            Task.objects.using(using).select_for_update().filter(pk=self.pk).values_list("project_id", "status").first()
+        )
+
+    def save(self, *args, **kwargs) -> None:
+        """Save task and update counters of related projects."""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not TaskQuerySet.counted_fields.intersection(update_fields):
+            return super(Task, self).save(*args, **kwargs)
+
+        using = kwargs.get("using") or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using):
+            stored = self._stored_counted_state(using)
+            super(Task, self).save(*args, **kwargs)
+            current = (self.project_id, self.status)
+            if stored != current:
+                if stored is not None:
+                    Project.objects.using(using).filter(pk=stored[0]).shift_task_counters(
+                        **task_counters_delta(stored[1], -1)
+                    )
+                Project.objects.using(using).filter(pk=current[0]).shift_task_counters(
+                    **task_counters_delta(current[1])
+                )
+
+    def delete(self, *args, **kwargs) -> Tuple[int, Dict[str, int]]:
+        """Delete task and update counters of its project."""
+        using = kwargs.get("using") or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using):
+            stored = self._stored_counted_state(using)
+            deleted = super(Task, self).delete(*args, **kwargs)
+            if stored is not None:
+                Project.objects.using(using).filter(pk=stored[0]).shift_task_counters(
+                    **task_counters_delta(stored[1], -1)
+                )
+        return deleted
+
     class Meta:
         """Task config."""
 
@@ -104,13 +417,14 @@ class Task(models.Model):
         verbose_name_plural = _("Tasks")
 
 
-class Comment(models.Model):
+class Comment(RenderedDescriptionModel):
     """Comment model.
 
     Args:
         task (Task): task comment link
         created: date and time of creation
         description: comment text
+        description_html: rendered comment html, see `RenderedDescriptionModel`
     """
 
     task = models.ForeignKey(Task, verbose_name=_("Task"), on_delete=models.CASCADE)
@@ -125,3 +439,161 @@ class Comment(models.Model):
 
         verbose_name = _("Comment")
         verbose_name_plural = _("Comments")
+
+
+class TaskImportFormat(models.TextChoices):
+    """Task import file formats choice class."""
+
+    CSV = "csv", "CSV"
+    NDJSON = "ndjson", "NDJSON"
+
+
+class TaskJobStatus(models.TextChoices):
+    """Background task job statuses choice class."""
+
+    PENDING = "pending", _("Pending")
+    RUNNING = "running", _("Running")
+    DONE = "done", _("Done")
+    FAILED = "failed", _("Failed")
+
+
+class TaskJob(models.Model):
+    """Abstract model of bulk task operation processed by worker.
+
+    Attributes:
+        id: job identifier
+        user: user started the job
+        created: date and time job was created
+        finished: date and time job was finished
+        status (TaskJobStatus): job status
+        processed: number of processed rows
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, verbose_name=_("User"), null=True, editable=False, on_delete=models.SET_NULL
+    )
+    created = models.DateTimeField(verbose_name=_("Created"), auto_now_add=True)
+    finished = models.DateTimeField(verbose_name=_("Finished"), null=True, blank=True, editable=False)
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=20,
+        choices=TaskJobStatus.choices,
+        default=TaskJobStatus.PENDING,
+        editable=False,
+    )
+    processed = models.PositiveIntegerField(verbose_name=_("Processed"), default=0, editable=False)
+
+    @property
+    def is_finished(self) -> bool:
+        """Check if job is done or failed."""
+        return self.status in (TaskJobStatus.DONE, TaskJobStatus.FAILED)
+
+    class Meta:
+        """Abstract model config."""
+
+        abstract = True
+
+
+class TaskImport(TaskJob):
+    """Bulk task import processed by worker, see `projects.imports`.
+
+    Attributes:
+        file: uploaded CSV or NDJSON file, deleted after import
+        format (TaskImportFormat): file format
+        imported: number of created tasks
+        failed: number of rejected rows
+        errors: first `TaskImporter.max_errors` row errors: line number and error messages by field
+    """
+
+    file = models.FileField(verbose_name=_("File"), upload_to="imports/")
+    format = models.CharField(verbose_name=_("Format"), max_length=10, choices=TaskImportFormat.choices)
+    imported = models.PositiveIntegerField(verbose_name=_("Imported"), default=0, editable=False)
+    failed = models.PositiveIntegerField(verbose_name=_("Failed"), default=0, editable=False)
+    errors = models.JSONField(verbose_name=_("Errors"), default=list, blank=True, editable=False)
+
+    def __str__(self) -> str:
+        """Task import string representation."""
+        return f"{self.id}: {self.status} ({self.imported}/{self.processed})"
+
+    class Meta:
+        """Task import config."""
+
+        verbose_name = _("Task import")
+        verbose_name_plural = _("Task imports")
+
+
+class TaskBulkUpdate(TaskJob):
+    """Bulk status and assignee update of many tasks processed by worker.
+
+    Attributes:
+        query: search query of updated tasks, see `projects.search.search_tasks`
+        task_ids: ids of updated tasks, None to update all tasks matching `query`
+        changes: updated task field values, `status` and `assignee_id`
+        total: number of tasks matched when update was started
+        updated: number of updated tasks
+    """
+
+    query = models.CharField(verbose_name=_("Query"), max_length=200, blank=True, editable=False)
+    task_ids = models.JSONField(verbose_name=_("Tasks"), null=True, blank=True, editable=False)
+    changes = models.JSONField(verbose_name=_("Changes"), default=dict, editable=False)
+    total = models.PositiveIntegerField(verbose_name=_("Total"), default=0, editable=False)
+    updated = models.PositiveIntegerField(verbose_name=_("Updated"), default=0, editable=False)
+
+    def __str__(self) -> str:
+        """Task bulk update string representation."""
+        return f"{self.id}: {self.status} ({self.processed}/{self.total})"
+
+    @property
+    def progress(self) -> float:
+        """Percent of processed tasks."""
+        if not self.total:
+            return 100.0 if self.is_finished else 0.0
+        return min(100.0, 100.0 * self.processed / self.total)
+
+    def get_queryset(self) -> TaskQuerySet:
+        """Get updated tasks.
+
+        Attached documents are searched only if `user` has permission to view them.
+        """
+        tasks = Task.objects.all()
+        if self.task_ids is not None:
+            return tasks.filter(pk__in=self.task_ids)
+        if self.query:
+            attachments = self.user_id is not None and self.user.has_perm("documents.view_document")
+            return search_tasks(tasks, self.query, attachments=attachments)
+        return tasks
+
+    def apply(self, chunk_size: int = 1000) -> int:
+        """Update tasks in chunks of primary key ordered rows, progress is stored after every chunk.
+
+        Every chunk is updated with one `UPDATE` statement in its own transaction
+        together with task counters of affected projects, so locks are held shortly.
+        Counters are shifted by delta of every chunk, see `TaskQuerySet.update_in_projects`.
+        Tasks are read from write database, replica may lag behind.
+
+        Args:
+            chunk_size: number of tasks updated at once
+
+        Returns:
+            (int): number of updated tasks
+        """
+        using = router.db_for_write(Task)
+        pks = self.get_queryset().using(using).order_by("pk").values_list("pk", flat=True)
+        last_pk = 0
+        while True:
+            chunk = list(pks.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                return self.updated
+            last_pk = chunk[-1]
+            self.updated += Task.objects.using(using).filter(pk__in=chunk).update_in_projects(**self.changes)
+            self.processed += len(chunk)
+            TaskBulkUpdate.objects.using(router.db_for_write(TaskBulkUpdate)).filter(pk=self.pk).update(
+                processed=self.processed, updated=self.updated
+            )
+
+    class Meta:
+        """Task bulk update config."""
+
+        verbose_name = _("Task bulk update")
+        verbose_name_plural = _("Task bulk updates")
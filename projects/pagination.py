@@ -0,0 +1,215 @@
+"""
+Keyset (cursor) pagination module.
+
+Pages are fetched with `WHERE (column, id) > (last column value, last id) LIMIT n`
+conditions instead of `OFFSET`, so deep pages cost the same as the first one,
+and no `COUNT(*)` query is issued.
+
+Attributes:
+    InvalidCursor: exception raised for malformed or foreign cursors
+    KeysetPage: one page of keyset paginated objects
+    KeysetPaginator: keyset paginator for ordered querysets
+"""
+
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Model, Q, QuerySet
+from django.db.models.expressions import OrderBy
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping full microsecond precision of datetime values.
+
+    `DjangoJSONEncoder` truncates datetimes to milliseconds,
+    which breaks equality comparison of the cursor key.
+    """
+
+    def default(self, o: Any) -> Any:
+        """Encode datetime with microseconds."""
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super(CursorJSONEncoder, self).default(o)
+
+
+class InvalidCursor(Exception):
+    """Cursor can't be decoded or was issued for another ordering."""
+
+
+class KeysetPage:
+    """Page of objects returned by `KeysetPaginator`.
+
+    Attributes:
+        object_list (list): objects on the page
+        next_cursor (str): cursor of the next page or None
+        previous_cursor (str): cursor of the previous page or None
+        paginator (KeysetPaginator): paginator the page belongs to
+    """
+
+    def __init__(
+        self,
+        object_list: List[Model],
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+        paginator: "KeysetPaginator",
+    ) -> None:
+        """Init page."""
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.paginator = paginator
+
+    def __len__(self) -> int:
+        """Get number of objects on page."""
+        return len(self.object_list)
+
+    def __iter__(self):
+        """Iterate over objects on page."""
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        """Check if there is a next page."""
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        """Check if there is a previous page."""
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        """Check if there are pages besides this one."""
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Keyset paginator.
+
+    Orders queryset by one model field plus primary key as a tie-breaker,
+    nulls are always placed last.
+
+    Attributes:
+        is_keyset (bool): marker for templates to render cursor links
+    """
+
+    is_keyset = True
+
+    def __init__(self, queryset: QuerySet, per_page: int, ordering: str = "pk") -> None:
+        """Init paginator.
+
+        Args:
+            queryset: queryset to paginate
+            per_page: number of objects on a page
+            ordering: model field name to order by, prefixed with `-` for descending order.
+                Unknown fields fall back to primary key ordering.
+        """
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = ordering.startswith("-")
+        self.field = self._resolve_field(ordering.lstrip("-"))
+        self.ordering = ("-" if self.descending else "") + self.field.name
+
+    def _resolve_field(self, name: str) -> Any:
+        opts = self.queryset.model._meta
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return opts.pk
+        if not field.concrete or field.many_to_many:
+            return opts.pk
+        return field
+
+    @property
+    def column(self) -> str:
+        """Get name of the ordering column attribute."""
+        return self.field.attname
+
+    def encode_cursor(self, direction: str, obj: Model) -> str:
+        """Encode opaque cursor pointing at object position.
+
+        Args:
+            direction: "n" for the page after object, "p" for the page before object
+            obj: model instance
+
+        Returns:
+            (str): url safe cursor string
+        """
+        key = [self.ordering, direction, getattr(obj, self.column), obj.pk]
+        data = json.dumps(key, cls=CursorJSONEncoder, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> Tuple[str, Any, Any]:
+        """Decode cursor issued by `encode_cursor`.
+
+        Returns:
+            (tuple): direction, ordering column value and primary key
+
+        Raises:
+            InvalidCursor: if cursor is malformed or issued for another ordering
+        """
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            ordering, direction, value, pk = json.loads(data)
+        except (binascii.Error, ValueError, TypeError) as exc:
+            raise InvalidCursor(cursor) from exc
+        if ordering != self.ordering or direction not in ("n", "p"):
+            raise InvalidCursor(cursor)
+        opts = self.queryset.model._meta
+        try:
+            value = None if value is None else self.field.to_python(value)
+            pk = opts.pk.to_python(pk)
+        except (ValidationError, ValueError, TypeError) as exc:
+            raise InvalidCursor(cursor) from exc
+        return direction, value, pk
+
+    def _order_by(self, forward: bool) -> List[OrderBy]:
+        descending = self.descending != (not forward)
+        nulls = {}
+        if self.field.null:
+            nulls = {"nulls_last": True} if forward else {"nulls_first": True}
+        column = F(self.column).desc(**nulls) if descending else F(self.column).asc(**nulls)
+        return [column, F("pk").desc() if descending else F("pk").asc()]
+
+    def _seek(self, value: Any, pk: Any, forward: bool) -> Q:
+        """Build condition for rows after (forward) or before the key in paginator ordering."""
+        after, before = ("lt", "gt") if self.descending else ("gt", "lt")
+        op = after if forward else before
+        column = self.column
+        if value is None:
+            # nulls are placed last: only nulls are after a null key
+            rows = Q(**{f"{column}__isnull": True, f"pk__{op}": pk})
+            return rows if forward else rows | Q(**{f"{column}__isnull": False})
+        rows = Q(**{f"{column}__{op}": value}) | Q(**{column: value, f"pk__{op}": pk})
+        if forward and self.field.null:
+            rows |= Q(**{f"{column}__isnull": True})
+        return rows
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        """Get page of objects located by cursor.
+
+        Args:
+            cursor: cursor from previous page, or empty for the first page
+
+        Returns:
+            (KeysetPage): page of objects
+        """
+        queryset = self.queryset
+        forward, has_cursor = True, bool(cursor)
+        if has_cursor:
+            direction, value, pk = self.decode_cursor(cursor)
+            forward = direction == "n"
+            queryset = queryset.filter(self._seek(value, pk, forward))
+
+        object_list = list(queryset.order_by(*self._order_by(forward))[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+        if not forward:
+            object_list.reverse()
+
+        has_next, has_previous = (has_more, has_cursor) if forward else (has_cursor, has_more)
+        next_cursor = self.encode_cursor("n", object_list[-1]) if has_next and object_list else None
+        previous_cursor = self.encode_cursor("p", object_list[0]) if has_previous and object_list else None
+        return KeysetPage(object_list, next_cursor, previous_cursor, self)
@@ -0,0 +1,191 @@
+"""
+Markdown rendering module.
+
+Rendered html is cached by content hash in two levels:
+in-process LRU cache bounded by total size of cached html,
+and configured Django cache shared between processes.
+
+Attributes:
+    MarkdownRenderCache: two level markdown render cache
+    markdown_cache: process wide render cache instance
+
+Methods:
+    markdown_digest: get content hash of Markdown text
+    render_markdown: render Markdown text to html using process wide cache
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from markdown import markdown
+
+
+def markdown_digest(text: Optional[str]) -> str:
+    """Get content hash of Markdown text.
+
+    Args:
+        text: Markdown text
+
+    Returns:
+        (str): sha256 hex digest
+    """
+    return hashlib.sha256((text or "").encode()).hexdigest()
+
+
+class MarkdownRenderCache:
+    """Markdown render cache.
+
+    Attributes:
+        max_size (int): max total length of html kept in process
+        timeout (int): shared cache timeout in seconds
+        cache_alias (str): Django cache alias
+        key_prefix (str): shared cache key prefix
+        hits (int): number of renders served from process cache
+        shared_hits (int): number of renders served from shared cache
+        misses (int): number of actual markdown renders
+    """
+
+    def __init__(
+        self,
+        max_size: int = 8 * 1024 * 1024,
+        timeout: Optional[int] = 86400,
+        cache_alias: str = "default",
+        key_prefix: str = "markdown",
+    ) -> None:
+        """Init empty cache."""
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        """Get cache key for Markdown text."""
+        return f"{self.key_prefix}:{markdown_digest(text)}"
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            html = self._local.get(key)
+            if html is not None:
+                self._local.move_to_end(key)
+                self.hits += 1
+            return html
+
+    def _set_local(self, key: str, html: str) -> None:
+        if len(html) > self.max_size:
+            return
+        with self._lock:
+            previous = self._local.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._local[key] = html
+            self._size += len(html)
+            while self._size > self.max_size:
+                _, evicted = self._local.popitem(last=False)
+                self._size -= len(evicted)
+
+    def render(self, text: Optional[str]) -> str:
+        """Render Markdown text to html, using cached result if any.
+
+        Args:
+            text: Markdown text
+
+        Returns:
+            (str): html
+        """
+        if not text:
+            return ""
+        key = self.key(text)
+        html = self._get_local(key)
+        if html is not None:
+            return html
+
+        cache = caches[self.cache_alias]
+        html = cache.get(key)
+        missed = html is None
+        if missed:
+            html = markdown(text)
+            cache.set(key, html, self.timeout)
+        with self._lock:
+            if missed:
+                self.misses += 1
+            else:
+                self.shared_hits += 1
+        self._set_local(key, html)
+        return html
+
+    def warm(self, texts: Iterable[Optional[str]]) -> int:
+        """Pre-render many Markdown texts with one shared cache `get_many` query.
+
+        Args:
+            texts: Markdown texts
+
+        Returns:
+            (int): number of texts rendered
+        """
+        keys: Dict[str, str] = {self.key(text): text for text in texts if text}
+        with self._lock:
+            keys = {key: text for key, text in keys.items() if key not in self._local}
+        if not keys:
+            return 0
+
+        cache = caches[self.cache_alias]
+        found = cache.get_many(keys.keys())
+        rendered = {key: markdown(text) for key, text in keys.items() if key not in found}
+        with self._lock:
+            self.shared_hits += len(found)
+            self.misses += len(rendered)
+        if rendered:
+            cache.set_many(rendered, self.timeout)
+        for key, html in {**found, **rendered}.items():
+            self._set_local(key, html)
+        return len(rendered)
+
+    def clear(self) -> None:
+        """Clear process cache and counters."""
+        with self._lock:
+            self._local.clear()
+            self._size = 0
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters.
+
+        Returns:
+            (dict): hits, shared hits, misses, number of entries and size of process cache
+        """
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "entries": len(self._local),
+            "size": self._size,
+            "max_size": self.max_size,
+        }
+
+
+markdown_cache = MarkdownRenderCache(
+    max_size=settings.MARKDOWN_CACHE_MAX_SIZE,
+    timeout=settings.MARKDOWN_CACHE_TIMEOUT,
+)
+
+
+def render_markdown(text: Optional[str]) -> str:
+    """Render Markdown text to html using process wide cache.
+
+    Args:
+        text: Markdown text
+
+    Returns:
+        (str): html
+    """
+    return markdown_cache.render(text)
@@ -0,0 +1,168 @@
+"""
+Full text search engine for tasks.
+
+PostgreSQL: `Task.search_vector` tsvector column (title weighted `A`, description `B`)
+is maintained by a trigger and indexed with GIN.
+
+SQLite: external content FTS5 table `projects_task_fts` is maintained by triggers,
+see `taskcamp.search.SearchIndex`.
+
+Other database vendors fall back to `icontains` lookups.
+
+Tasks also match by text extracted from attached documents, see `documents.search`.
+
+Attributes:
+    TASK_SEARCH_INDEX: task search index
+    HIGHLIGHT_START: marker of highlighted fragment start in search headlines
+    HIGHLIGHT_STOP: marker of highlighted fragment end in search headlines
+
+Methods:
+    search_terms: split user query to search terms
+    search_tasks: filter tasks queryset by full text query
+    install_search_index: create search triggers and indexes
+    uninstall_search_index: drop search triggers and indexes
+"""
+
+import re
+from typing import List
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import F, FloatField, Q, QuerySet, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Concat
+
+from documents.models import DocumentText
+from documents.search import search_documents
+from taskcamp.search import SEARCH_CONFIG, SearchIndex
+
+# private use unicode characters: never appear in user text and survive html escaping
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+TASK_SEARCH_INDEX = SearchIndex("projects_task", {"title": "A", "description": "B"})
+
+
+def install_search_index(connection: BaseDatabaseWrapper, rebuild: bool = False) -> None:
+    """Create (idempotently) task search triggers and indexes for database connection.
+
+    Args:
+        connection: database connection
+        rebuild: recalculate index for existing rows
+    """
+    TASK_SEARCH_INDEX.install(connection, rebuild)
+
+
+def uninstall_search_index(connection: BaseDatabaseWrapper) -> None:
+    """Drop task search triggers and indexes for database connection.
+
+    Args:
+        connection: database connection
+    """
+    TASK_SEARCH_INDEX.uninstall(connection)
+
+
+def search_terms(query: str) -> List[str]:
+    """Split user query to words, dropping search syntax characters.
+
+    Args:
+        query: raw user input
+
+    Returns:
+        (list): list of words
+    """
+    return re.findall(r"\w+", query or "")
+
+
+def search_tasks(queryset: QuerySet, query: str, attachments: bool = True) -> QuerySet:
+    """Filter tasks by full text query.
+
+    Every word of the query should match as a prefix of word either
+    in title or description, or in text of an attached document.
+    Attachments must be searched only for users with `documents.view_document` permission.
+    Tasks are annotated with:
+
+        search_rank: relevance (greater is better)
+        search_headline: text fragment with matches wrapped into
+            `HIGHLIGHT_START` and `HIGHLIGHT_STOP` markers
+
+    Args:
+        queryset: Task queryset
+        query: raw user input
+        attachments: search text of attached documents too
+
+    Returns:
+        (QuerySet): filtered and annotated queryset
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    attached = _attachments_match(queryset, terms) if attachments else Q(pk__in=[])
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        return _search_postgresql(queryset, terms, attached)
+    if vendor == "sqlite":
+        return _search_sqlite(queryset, terms, attached)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition | attached).annotate(
+        search_rank=Value(0.0, output_field=FloatField()),
+        search_headline=Value(None, output_field=TextField()),
+    )
+
+
+def _attachments_match(queryset: QuerySet, terms: List[str]) -> Q:
+    """Build condition for tasks with attached documents matching the terms."""
+    documents = search_documents(DocumentText.objects.using(queryset.db), terms).values("document_id")
+    links = queryset.model.documents.through.objects.filter(document_id__in=documents)
+    return Q(id__in=links.values("task_id"))
+
+
+def _search_postgresql(queryset: QuerySet, terms: List[str], attached: Q) -> QuerySet:
+    search_query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        config=SEARCH_CONFIG,
+        search_type="raw",
+    )
+    return queryset.filter(Q(search_vector=search_query) | attached).annotate(
+        search_rank=SearchRank(
+            F("search_vector"),
+            search_query,
+            weights=[0.1, 0.2, DESCRIPTION_WEIGHT / TITLE_WEIGHT, 1.0],
+        ),
+        search_headline=SearchHeadline(
+            Concat("title", Value("\n"), Coalesce("description", Value("")), output_field=TextField()),
+            search_query,
+            config=SEARCH_CONFIG,
+            start_sel=HIGHLIGHT_START,
+            stop_sel=HIGHLIGHT_STOP,
+            max_words=20,
+            min_words=5,
+        ),
+    )
+
+
+def _search_sqlite(queryset: QuerySet, terms: List[str], attached: Q) -> QuerySet:
+    table = queryset.model._meta.db_table
+    match = " ".join('"{}"*'.format(term) for term in terms)
+    matched = f"SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s"
+    # tasks matched by attachments only have no rank and headline
+    rank = (
+        f"SELECT coalesce((SELECT -bm25({table}_fts, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) "
+        f"FROM {table}_fts WHERE {table}_fts MATCH %s AND rowid = {table}.id), 0.0)"
+    )
+    headline = (
+        f"SELECT snippet({table}_fts, -1, %s, %s, '…', 20) "
+        f"FROM {table}_fts WHERE {table}_fts MATCH %s AND rowid = {table}.id"
+    )
+    return queryset.filter(Q(id__in=RawSQL(matched, (match,))) | attached).annotate(
+        search_rank=RawSQL(rank, (match,), output_field=FloatField()),
+        search_headline=RawSQL(headline, (HIGHLIGHT_START, HIGHLIGHT_STOP, match), output_field=TextField()),
+    )
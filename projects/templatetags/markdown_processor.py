@@ -9,22 +9,34 @@ Methods:
 
 """
 
+from typing import Any
+
 from django import template
-from markdown import markdown
+
+from projects.rendering import render_markdown
 
 register = template.Library()
 
 
 @register.filter(name="markdown", is_safe=True)
-def markdown_processor(text: str) -> str:
+def markdown_processor(value: Any) -> str:
     """Process Markdown text.
 
-    Generates html template from Markdown text.
+    Generates html template from Markdown text,
+    rendered html is cached by content hash.
+
+    Model instances with pre-rendered description html
+    (see `projects.models.RenderedDescriptionModel`) are rendered
+    from stored html, description is rendered only if html is stale.
 
     Args:
-        text (str):
+        value (str or Model): Markdown text or model instance
 
     Returns:
         (str):
     """
-    return markdown(text)
+    if hasattr(value, "description_html_is_fresh"):
+        if value.description_html_is_fresh:
+            return value.description_html or ""
+        return render_markdown(value.description)
+    return render_markdown(value)
@@ -0,0 +1,87 @@
+"""
+Windowed paginator template tag module.
+
+Attributes:
+    register (Library): template library
+
+Methods:
+    paginator: render pagination links for list views
+"""
+
+from typing import Any, Dict, List, Optional
+
+from django import template
+from django.core.paginator import Page, Paginator
+from django.http import QueryDict
+
+register = template.Library()
+
+
+def page_links(page: Page, base_query: str, on_each_side: int = 2, on_ends: int = 1) -> List[Dict[str, Any]]:
+    """Build windowed list of page links.
+
+    Args:
+        page: current page
+        base_query: url encoded query without page parameter
+        on_each_side: number of neighbour pages around the current one
+        on_ends: number of pages at the beginning and the end
+
+    Returns:
+        (list): list of dicts with page `number`, `url` (None for ellipsis) and `current` flag
+    """
+    links = []
+    for number in page.paginator.get_elided_page_range(page.number, on_each_side=on_each_side, on_ends=on_ends):
+        if number == Paginator.ELLIPSIS:
+            links.append({"number": number, "url": None, "current": False})
+        else:
+            links.append({"number": number, "url": f"{base_query}page={number}", "current": number == page.number})
+    return links
+
+
+@register.inclusion_tag("pagination.html", takes_context=True)
+def paginator(context: template.Context, on_each_side: int = 2, on_ends: int = 1) -> Dict[str, Any]:
+    """Render pagination links for the current page of a list view.
+
+    Supports `Paginator` (first/last pages, neighbours of the current page and ellipsis)
+    and keyset paginator (previous and next cursor links).
+    Base query string is copied and encoded once per render.
+
+    Examples:
+        {% load paginator %}
+        {% paginator %}
+        {% paginator on_each_side=3 on_ends=2 %}
+
+    Args:
+        context: template context with `page_obj` and `request`
+        on_each_side: number of neighbour pages around the current one
+        on_ends: number of pages at the beginning and the end
+
+    Returns:
+        (dict): context for pagination template
+    """
+    page = context.get("page_obj")
+    if page is None or not page.has_other_pages():
+        return {"page": None}
+
+    query: QueryDict = context["request"].GET.copy()
+    query.pop("page", None)
+    query.pop("cursor", None)
+    encoded = query.urlencode()
+    base_query = f"?{encoded}&" if encoded else "?"
+
+    previous_url: Optional[str] = None
+    next_url: Optional[str] = None
+    links: List[Dict[str, Any]] = []
+    if getattr(page.paginator, "is_keyset", False):
+        if page.has_previous():
+            previous_url = f"{base_query}cursor={page.previous_cursor}"
+        if page.has_next():
+            next_url = f"{base_query}cursor={page.next_cursor}"
+    else:
+        if page.has_previous():
+            previous_url = f"{base_query}page={page.previous_page_number()}"
+        if page.has_next():
+            next_url = f"{base_query}page={page.next_page_number()}"
+        links = page_links(page, base_query, on_each_side, on_ends)
+
+    return {"page": page, "links": links, "previous_url": previous_url, "next_url": next_url}
@@ -15,6 +15,9 @@ def query_builder(query: QueryDict, **kwargs) -> str:
 
     Builds query from base GET query adding extra parameters to it.
 
+    Changing `order_by` resets keyset pagination `cursor` to the first page,
+    because cursors are bound to the ordering they were issued for.
+
     Examples:
         Add params page: 0, limit: 10 to get query
         {% query_builder request.GET page=0 limit=10 %}
@@ -32,4 +35,6 @@ def query_builder(query: QueryDict, **kwargs) -> str:
             query_dict[k] = "-" + v
         else:
             query_dict[k] = v
+        if k == "order_by" and "cursor" in query_dict and "cursor" not in kwargs:
+            query_dict["cursor"] = ""
     return "?" + query_dict.urlencode() or ""
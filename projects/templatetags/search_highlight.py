@@ -0,0 +1,36 @@
+"""
+Search highlight filter for Jinja2 template.
+
+Methods:
+    highlight: Register filter for rendering search headlines.
+
+Attributes:
+    register (Library): template library.
+"""
+
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+
+from projects.search import HIGHLIGHT_START, HIGHLIGHT_STOP
+
+register = template.Library()
+
+
+@register.filter(name="highlight")
+def highlight(headline: str) -> SafeString:
+    """Register filter for rendering search headlines.
+
+    Escapes headline text and wraps matched fragments
+    (between `HIGHLIGHT_START` and `HIGHLIGHT_STOP` markers) into `<mark>` tags.
+
+    Args:
+        headline (str): search headline with highlight markers
+
+    Returns:
+        (str): safe html string
+    """
+    if not headline:
+        return mark_safe("")
+    html = escape(headline).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+    return mark_safe(html)
@@ -2,8 +2,8 @@ from django.contrib.admin import AdminSite
 from django.test import TestCase
 from django.urls import reverse
 
-from projects.admin import CommentAdmin, ProjectAdmin, TaskAdmin
-from projects.models import Comment, Project, Task
+from projects.admin import CommentAdmin, ProjectAdmin, TaskAdmin, TaskBulkUpdateAdmin, TaskImportAdmin
+from projects.models import Comment, Project, Task, TaskBulkUpdate, TaskImport
 
 
 class ProjectAdminTestCase(TestCase):
@@ -38,3 +38,9 @@ class ProjectAdminTestCase(TestCase):
         self.assertEqual(
             url, reverse("projects-task-detail", kwargs={"pk": self.comment.task.id})
         )
+
+    def test_task_job_admin_has_no_add_permission(self):
+        task_import_admin = TaskImportAdmin(model=TaskImport, admin_site=AdminSite)
+        self.assertFalse(task_import_admin.has_add_permission(request=None))
+        task_bulk_update_admin = TaskBulkUpdateAdmin(model=TaskBulkUpdate, admin_site=AdminSite)
+        self.assertFalse(task_bulk_update_admin.has_add_permission(request=None))
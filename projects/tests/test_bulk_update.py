@@ -0,0 +1,183 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.db import DatabaseError
+from django.shortcuts import reverse
+from django.test import TestCase, override_settings
+
+from documents.models import Document, DocumentText
+from employees.models import Employee
+from projects.forms import TaskBulkUpdateForm
+from projects.models import Project, Task, TaskBulkUpdate, TaskJobStatus, TaskStatus
+from worker.projects.tasks import update_tasks
+
+
+class TaskBulkUpdateTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Roof")
+        self.other = Project.objects.create(title="Walls")
+        self.tasks = [Task.objects.create(title=f"Tiles {number}", project=self.project) for number in range(5)]
+        self.tasks.append(Task.objects.create(title="Paint", project=self.other))
+        self.employee = Employee.objects.create(
+            firstname="Ann", surname="Smith", email="ann@example.com", birthdate=datetime.date(1990, 1, 1)
+        )
+
+    def test_apply(self):
+        bulk_update = TaskBulkUpdate.objects.create(query="tiles", changes={"status": TaskStatus.DONE}, total=5)
+        self.assertEqual((bulk_update.progress, str(bulk_update)), (0.0, f"{bulk_update.pk}: pending (0/5)"))
+        self.assertEqual(bulk_update.apply(chunk_size=2), 5)
+        bulk_update.refresh_from_db()
+        self.assertEqual((bulk_update.processed, bulk_update.updated, bulk_update.progress), (5, 5, 100.0))
+        self.assertEqual(Task.objects.filter(status=TaskStatus.DONE).count(), 5)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_open, self.project.tasks_completed), (0, 5))
+
+    def test_apply_shifts_counters(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(status=TaskStatus.CLOSED)
+        bulk_update = TaskBulkUpdate.objects.create(changes={"status": TaskStatus.IN_PROGRESS}, total=6)
+        with mock.patch("projects.models.ProjectQuerySet.refresh_task_counters") as refresh_task_counters:
+            self.assertEqual(bulk_update.apply(chunk_size=4), 6)
+        refresh_task_counters.assert_not_called()
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_total, self.project.tasks_open, self.project.tasks_completed), (5, 5, 0))
+
+        bulk_update = TaskBulkUpdate.objects.create(changes={"status": TaskStatus.DONE}, total=6)
+        bulk_update.apply(chunk_size=4)
+        for project in (self.project, self.other):
+            project.refresh_from_db()
+            self.assertEqual((project.tasks_open, project.tasks_completed), (0, project.tasks_total))
+
+    def test_update_in_projects(self):
+        tasks = Task.objects.filter(project=self.project)
+        self.assertEqual(tasks.update_in_projects(assignee=self.employee), 5)
+        self.assertEqual(tasks.filter(assignee=self.employee).count(), 5)
+        with self.assertRaises(ValueError):
+            tasks.update_in_projects(project=self.other)
+
+    def test_get_queryset(self):
+        self.assertEqual(TaskBulkUpdate().get_queryset().count(), 6)
+        self.assertEqual(TaskBulkUpdate(query="paint").get_queryset().get(), self.tasks[-1])
+        self.assertEqual(list(TaskBulkUpdate(task_ids=[self.tasks[0].pk]).get_queryset()), [self.tasks[0]])
+
+    def test_get_queryset_attachments(self):
+        document = Document.objects.create(title="quote.pdf")
+        DocumentText.objects.create(document=document, text="Tiles quotation")
+        self.tasks[-1].documents.add(document)
+        user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        self.assertFalse(TaskBulkUpdate(query="quotation").get_queryset().exists())
+        self.assertFalse(TaskBulkUpdate(query="quotation", user=user).get_queryset().exists())
+        user.user_permissions.add(Permission.objects.get(codename="view_document"))
+        user = get_user_model().objects.get(pk=user.pk)
+        self.assertEqual(TaskBulkUpdate(query="quotation", user=user).get_queryset().get(), self.tasks[-1])
+
+    def test_progress(self):
+        self.assertEqual(TaskBulkUpdate(status=TaskJobStatus.DONE).progress, 100.0)
+        self.assertEqual(TaskBulkUpdate(total=4, processed=1).progress, 25.0)
+
+    def test_form(self):
+        form = TaskBulkUpdateForm(data={"tasks": [self.tasks[0].pk, self.tasks[1].pk], "assignee": self.employee.pk})
+        self.assertTrue(form.is_valid())
+        bulk_update = form.get_bulk_update()
+        self.assertEqual(bulk_update.task_ids, [self.tasks[0].pk, self.tasks[1].pk])
+        self.assertEqual(bulk_update.changes, {"assignee_id": self.employee.pk})
+
+        form = TaskBulkUpdateForm(data={"select_all": "on", "q": "paint", "status": TaskStatus.CLOSED})
+        self.assertTrue(form.is_valid())
+        bulk_update = form.get_bulk_update()
+        self.assertEqual((bulk_update.query, bulk_update.task_ids), ("paint", None))
+
+        self.assertFalse(TaskBulkUpdateForm(data={"status": TaskStatus.DONE}).is_valid())
+        self.assertFalse(TaskBulkUpdateForm(data={"select_all": "on"}).is_valid())
+
+    def test_update_tasks(self):
+        bulk_update = TaskBulkUpdate.objects.create(changes={"assignee_id": self.employee.pk}, total=6)
+        self.assertEqual(update_tasks(str(bulk_update.pk)), 6)
+        bulk_update.refresh_from_db()
+        self.assertEqual(bulk_update.status, TaskJobStatus.DONE)
+        self.assertIsNotNone(bulk_update.finished)
+        self.assertEqual(Task.objects.filter(assignee=self.employee).count(), 6)
+        # redelivered message
+        self.assertEqual(update_tasks(str(bulk_update.pk)), 0)
+
+    def test_update_tasks_unexpected_error(self):
+        bulk_update = TaskBulkUpdate.objects.create(changes={"assignee_id": self.employee.pk}, total=6)
+        with mock.patch.object(TaskBulkUpdate, "apply", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                update_tasks(str(bulk_update.pk))
+        bulk_update.refresh_from_db()
+        self.assertEqual(bulk_update.status, TaskJobStatus.FAILED)
+
+    def test_update_tasks_failed(self):
+        bulk_update = TaskBulkUpdate.objects.create(changes={"assignee_id": self.employee.pk}, total=6)
+        with mock.patch.object(TaskBulkUpdate, "apply", side_effect=DatabaseError("deadlock detected")):
+            update_tasks(str(bulk_update.pk))
+        bulk_update.refresh_from_db()
+        self.assertEqual(bulk_update.status, TaskJobStatus.FAILED)
+
+
+class TaskBulkUpdateViewTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Roof")
+        self.tasks = [Task.objects.create(title=f"Tiles {number}", project=self.project) for number in range(3)]
+        Task.objects.create(title="Paint", project=self.project)
+        self.url = reverse("projects-task-bulk-update")
+        self.user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        self.user.user_permissions.add(*Permission.objects.filter(codename__in=["view_task", "change_task"]))
+        self.client.login(email="user@example.com", password="password")
+
+    def test_bulk_update_form_on_task_list(self):
+        response = self.client.get(reverse("projects-task-list"), {"q": "tiles"})
+        self.assertContains(response, 'form="bulk-update-form"', count=3)
+        self.assertEqual(response.context["bulk_update_form"].initial["q"], "tiles")
+
+        self.user.user_permissions.remove(Permission.objects.get(codename="change_task"))
+        response = self.client.get(reverse("projects-task-list"))
+        self.assertNotIn("bulk_update_form", response.context)
+
+    def test_task_list_search_attachments(self):
+        document = Document.objects.create(title="quote.pdf")
+        DocumentText.objects.create(document=document, text="Roof quotation")
+        self.tasks[0].documents.add(document)
+        url = reverse("projects-task-list")
+        self.assertEqual(list(self.client.get(url, {"q": "quotation"}).context["object_list"]), [])
+        self.user.user_permissions.add(Permission.objects.get(codename="view_document"))
+        self.assertEqual(list(self.client.get(url, {"q": "quotation"}).context["object_list"]), [self.tasks[0]])
+
+    def test_bulk_update_selected(self):
+        next_url = reverse("projects-task-list") + "?page=2"
+        data = {"tasks": [self.tasks[0].pk, self.tasks[1].pk], "status": TaskStatus.DONE, "next": next_url}
+        response = self.client.post(self.url, data)
+        self.assertRedirects(response, next_url, fetch_redirect_response=False)
+        self.assertEqual(Task.objects.filter(status=TaskStatus.DONE).count(), 2)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_open, self.project.tasks_completed), (2, 2))
+        self.assertFalse(TaskBulkUpdate.objects.exists())
+
+        data = {"select_all": "on", "q": "paint", "status": TaskStatus.CLOSED, "next": "https://example.org/"}
+        response = self.client.post(self.url, data)
+        self.assertRedirects(response, reverse("projects-task-list"), fetch_redirect_response=False)
+        self.assertEqual(Task.objects.get(status=TaskStatus.CLOSED).title, "Paint")
+
+    @override_settings(TASKS_BULK_UPDATE_SYNC_MAX_SIZE=2)
+    def test_bulk_update_in_worker(self):
+        with mock.patch("projects.views.update_tasks.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, {"select_all": "on", "q": "tiles", "status": TaskStatus.DONE})
+        bulk_update = TaskBulkUpdate.objects.get()
+        url = reverse("projects-task-bulk-update-detail", kwargs={"pk": bulk_update.pk})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        delay.assert_called_once_with(str(bulk_update.pk))
+        self.assertEqual((bulk_update.user, bulk_update.total), (self.user, 3))
+        self.assertFalse(Task.objects.filter(status=TaskStatus.DONE).exists())
+
+        self.assertContains(self.client.get(url), 'http-equiv="refresh"')
+        update_tasks(str(bulk_update.pk))
+        response = self.client.get(url)
+        self.assertNotContains(response, 'http-equiv="refresh"')
+        self.assertContains(response, "3 / 3")
+
+    def test_bulk_update_invalid(self):
+        self.assertEqual(self.client.post(self.url, {"status": TaskStatus.DONE}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
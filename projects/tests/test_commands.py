@@ -0,0 +1,108 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from projects.management.commands.rebuild_task_counters import rebuild_chunk, run_in_thread
+from projects.models import Comment, Project, Task, TaskStatus
+
+
+class RebuildTaskCountersCommandTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Test project")
+        Task.objects.create(title="Task 1", project=self.project)
+        Task.objects.create(title="Task 2", project=self.project, status=TaskStatus.DONE)
+        Project.objects.update(tasks_total=0, tasks_open=0, tasks_completed=0)
+
+    def test_verify_out_of_sync(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_task_counters", "--verify", "--workers=1")
+
+    def test_rebuild_and_verify(self):
+        call_command("rebuild_task_counters", "--workers=1", "--chunk-size=1", stdout=mock.Mock())
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.tasks_total, self.project.tasks_open, self.project.tasks_completed),
+            (2, 1, 1),
+        )
+        call_command("rebuild_task_counters", "--verify", "--workers=1", stdout=mock.Mock())
+
+    def test_write_database_by_default(self):
+        module = "projects.management.commands.rebuild_task_counters"
+        with mock.patch(f"{module}.router.db_for_write", return_value="default") as db_for_write:
+            call_command("rebuild_task_counters", "--workers=1", stdout=mock.Mock())
+        db_for_write.assert_called_once_with(Project)
+        with mock.patch(f"{module}.router.db_for_write") as db_for_write:
+            call_command("rebuild_task_counters", "--workers=1", "--database=default", stdout=mock.Mock())
+        db_for_write.assert_not_called()
+
+    def test_rebuild_in_thread_pool(self):
+        # run pool jobs inline: test transaction is not visible from other threads
+        executor = mock.MagicMock()
+        executor.return_value.__enter__.return_value.map = map
+        with mock.patch("projects.management.commands.rebuild_task_counters.ThreadPoolExecutor", executor):
+            with mock.patch("projects.management.commands.rebuild_task_counters.connections"):
+                call_command("rebuild_task_counters", "--workers=2", stdout=mock.Mock())
+        executor.assert_called_once_with(max_workers=2)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.tasks_total, 2)
+
+    def test_run_in_thread_closes_connection(self):
+        mock_connections = mock.MagicMock()
+        with mock.patch("projects.management.commands.rebuild_task_counters.connections", mock_connections):
+            self.assertEqual(run_in_thread(rebuild_chunk, [self.project.pk], "default"), 1)
+        mock_connections["default"].close.assert_called_once()
+
+
+class RenderDescriptionsCommandTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Test project", description="*project*")
+        self.task = Task.objects.create(title="Task", project=self.project, description="task")
+        self.comment = Comment.objects.create(task=self.task, description="comment")
+        Task.objects.update(description="*task*")
+        Comment.objects.update(description_html=None, description_digest="")
+
+    def test_render_stale(self):
+        stdout = StringIO()
+        call_command("render_descriptions", "--batch-size=1", stdout=stdout)
+        self.assertIn("Rendered 0 projects.Project descriptions", stdout.getvalue())
+        self.assertIn("Rendered 1 projects.Task descriptions", stdout.getvalue())
+        self.assertIn("Rendered 1 projects.Comment descriptions", stdout.getvalue())
+        self.task.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.task.description_html, "<p><em>task</em></p>")
+        self.assertEqual(self.comment.description_html, "<p>comment</p>")
+
+    def test_render_force(self):
+        stdout = StringIO()
+        module = "projects.management.commands.render_descriptions"
+        with mock.patch(f"{module}.router.db_for_write", return_value="default") as db_for_write:
+            call_command("render_descriptions", "--model=projects.Project", "--force", stdout=stdout)
+        db_for_write.assert_called_once_with(Project)
+        self.assertEqual(stdout.getvalue().strip(), "Rendered 1 projects.Project descriptions")
+
+
+class ImportTasksCommandTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Test project")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "tasks.csv")
+        with open(self.path, "w") as file:
+            file.write(f"project,title\n{self.project.pk},Task 1\n{self.project.pk},\n")
+
+    def test_import_tasks(self):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_tasks", self.path, "--batch-size=1", "--no-copy", stdout=stdout, stderr=stderr)
+        self.assertIn("Imported 1 of 2 tasks, 1 failed", stdout.getvalue())
+        self.assertTrue(stderr.getvalue().startswith("line 3: title: "))
+        self.assertEqual(list(Task.objects.values_list("title", flat=True)), ["Task 1"])
+
+    def test_import_tasks_errors(self):
+        with self.assertRaisesMessage(CommandError, "Unknown file format"):
+            call_command("import_tasks", self.path + ".txt")
+        with self.assertRaisesMessage(CommandError, "Import failed after 0 tasks"):
+            call_command("import_tasks", self.path + ".txt", "--format=ndjson")
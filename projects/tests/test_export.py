@@ -0,0 +1,240 @@
+import datetime
+import csv
+import io
+import json
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.files.base import ContentFile
+from django.shortcuts import reverse
+from django.test import TestCase, override_settings
+
+from documents.models import Document
+from employees.models import Employee
+from projects.export import TASK_LIST_FIELDS, ProjectExport, TaskListExport, ZipStream, stream_zip
+from projects.models import Comment, Project, Task
+
+
+class StreamZipTestCase(TestCase):
+    def test_zip_stream(self):
+        stream = ZipStream()
+        stream.write(b"ab")
+        stream.write(memoryview(b"c"))
+        stream.flush()
+        self.assertEqual((stream.tell(), stream.pop(), stream.pop(), stream.tell()), (3, b"abc", b"", 3))
+
+    def test_stream_zip(self):
+        entries = [
+            ("a.txt", [b"a" * 1000, b"b" * 1000], zipfile.ZIP_DEFLATED),
+            ("empty.bin", [], zipfile.ZIP_STORED),
+        ]
+        chunks = list(stream_zip(entries))
+        self.assertGreater(len(chunks), 2)
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            self.assertEqual(archive.read("a.txt"), b"a" * 1000 + b"b" * 1000)
+            self.assertEqual(archive.read("empty.bin"), b"")
+            self.assertEqual(archive.getinfo("a.txt").compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(archive.getinfo("empty.bin").compress_type, zipfile.ZIP_STORED)
+
+
+class ProjectExportTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.project = Project.objects.create(
+            title="Roof", description="Fix the *roof*", due_date=datetime.date(2026, 12, 1)
+        )
+        assignee = Employee.objects.create(
+            firstname="Ann", surname="Smith", email="ann@example.com", birthdate=datetime.date(1990, 1, 1)
+        )
+        self.first = Task.objects.create(title="Buy tiles", description="Red ones", project=self.project)
+        self.second = Task.objects.create(title="Lay tiles", project=self.project, assignee=assignee)
+        Task.objects.create(title="No comments", project=self.project)
+        other_task = Task.objects.create(title="Other", project=Project.objects.create(title="Other"))
+        for task, text in [
+            (self.second, "second 1"),
+            (self.first, "first 1"),
+            (other_task, "other"),
+            (self.second, "second 2"),
+        ]:
+            Comment.objects.create(task=task, description=text)
+
+        self.project.documents.add(Document.objects.create(title="plan.txt", document=ContentFile(b"plan", "p.txt")))
+        shared = Document.objects.create(title="../../quote.pdf", document=ContentFile(b"%PDF-1.4", "q.pdf"))
+        self.first.documents.add(shared)
+        self.second.documents.add(shared)
+        other_task.documents.add(Document.objects.create(title="other.txt", document=ContentFile(b"x", "o.txt")))
+        self.project.refresh_from_db()
+
+    def export(self, **kwargs) -> zipfile.ZipFile:
+        return zipfile.ZipFile(io.BytesIO(b"".join(ProjectExport(self.project, chunk_size=2, **kwargs))))
+
+    def test_export(self):
+        with self.export() as archive:
+            project = json.loads(archive.read("project.json"))
+            self.assertEqual((project["title"], project["due_date"], project["tasks_total"]), ("Roof", "2026-12-01", 3))
+
+            tasks = json.loads(archive.read("tasks.json"))
+            self.assertEqual([task["title"] for task in tasks], ["Buy tiles", "Lay tiles", "No comments"])
+            self.assertEqual(
+                [[comment["description"] for comment in task["comments"]] for task in tasks],
+                [["first 1"], ["second 1", "second 2"], []],
+            )
+            self.assertEqual(tasks[1]["assignee__email"], "ann@example.com")
+
+            markdown = archive.read("project.md").decode()
+            self.assertTrue(markdown.startswith("# Roof\n\nDue date: 2026-12-01\n\nFix the *roof*\n"))
+            self.assertIn(
+                "## #{} Lay tiles\n\nStatus: new\nAssignee: ann@example.com\n".format(self.second.pk), markdown
+            )
+            self.assertLess(markdown.index("second 1"), markdown.index("second 2"))
+            self.assertNotIn("other", markdown)
+
+            documents = sorted(name for name in archive.namelist() if name.startswith("documents/"))
+            self.assertEqual(len(documents), 2)
+            self.assertTrue(documents[0].endswith("-plan.txt"))
+            self.assertTrue(documents[1].endswith("-quote.pdf"))
+            self.assertEqual(archive.read(documents[1]), b"%PDF-1.4")
+
+    def test_export_without_permissions(self):
+        Project.objects.filter(pk=self.project.pk).update(description=None, due_date=None)
+        self.project.refresh_from_db()
+        with self.export(include_tasks=False, include_documents=False) as archive:
+            self.assertEqual(archive.namelist(), ["project.json", "project.md"])
+            self.assertEqual(archive.read("project.md"), b"# Roof\n")
+
+        with self.export(include_tasks=False) as archive:
+            self.assertEqual(len(archive.namelist()), 3)
+            self.assertTrue(archive.namelist()[-1].endswith("-plan.txt"))
+
+        with self.export(include_comments=False) as archive:
+            tasks = json.loads(archive.read("tasks.json"))
+            self.assertEqual([task["comments"] for task in tasks], [[], [], []])
+
+    def test_export_empty_project_with_missing_file(self):
+        self.project = Project.objects.create(title="Empty")
+        self.project.documents.add(Document.objects.create(title="..", document="documents/lost.txt"))
+        with self.export() as archive:
+            self.assertEqual(json.loads(archive.read("tasks.json")), [])
+            self.assertTrue(archive.namelist()[-1].endswith("-document"))
+            self.assertEqual(archive.read(archive.namelist()[-1]), b"")
+
+    def test_tasks_read_once(self):
+        export = ProjectExport(self.project, chunk_size=2)
+        export.spool_size = 10
+        with mock.patch.object(ProjectExport, "tasks", autospec=True, side_effect=ProjectExport.tasks) as tasks:
+            with zipfile.ZipFile(io.BytesIO(b"".join(export))) as archive:
+                self.assertIn("Lay tiles", archive.read("project.md").decode())
+        tasks.assert_called_once_with(export)
+
+    def test_document_filename(self):
+        for title, name in [("(!)", "document"), ("@@@", "document"), ("#", "document"), ("a b.txt", "a_b.txt")]:
+            self.assertEqual(ProjectExport.document_filename(Document(title=title)), name)
+        self.assertEqual(ProjectExport.document_filename(Document(document="documents/x/q.pdf")), "q.pdf")
+
+
+
+class ProjectExportViewTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Roof")
+        Task.objects.create(title="Buy tiles", project=self.project)
+        self.url = reverse("project-export", kwargs={"pk": self.project.pk})
+        self.user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_project"))
+        self.client.login(email="user@example.com", password="password")
+
+    def test_export_view(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertEqual(response["Content-Disposition"], f'attachment; filename="project-{self.project.pk}.zip"')
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            # user can't view tasks
+            self.assertEqual(archive.namelist(), ["project.json", "project.md"])
+
+        self.user.user_permissions.add(Permission.objects.get(codename="view_task"))
+        response = self.client.get(self.url)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            self.assertIn("tasks.json", archive.namelist())
+
+    def test_export_view_not_found(self):
+        self.assertEqual(self.client.get(reverse("project-export", kwargs={"pk": 0})).status_code, 404)
+
+
+class TaskListExportTestCase(TestCase):
+    def setUp(self) -> None:
+        project = Project.objects.create(title="Roof")
+        self.tasks = [
+            Task.objects.create(
+                title=f"Task, {number}",
+                description='Say "hi"\nтут',
+                project=project,
+                start=datetime.datetime(2026, 1, number, 9, tzinfo=datetime.timezone.utc),
+            )
+            for number in range(1, 6)
+        ]
+
+    def test_csv(self):
+        export = TaskListExport(Task.objects.order_by("-id"), chunk_size=2, buffer_size=100)
+        chunks = list(export)
+        self.assertGreater(len(chunks), 1)
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        self.assertEqual(rows[0], list(TASK_LIST_FIELDS))
+        self.assertEqual([row[0] for row in rows[1:]], [str(task.pk) for task in reversed(self.tasks)])
+        self.assertEqual(rows[1][2:6], ["Task, 5", 'Say "hi"\nтут', "new", "2026-01-05T09:00:00+00:00"])
+        self.assertEqual(rows[1][6:], ["", "", ""])
+        self.assertEqual((export.content_type, export.filename), ("text/csv; charset=utf-8", "tasks.csv"))
+
+    def test_ndjson(self):
+        export = TaskListExport(Task.objects.order_by("id"), "ndjson", fields=("id", "start"))
+        chunks = list(export)
+        self.assertEqual(len(chunks), 1)
+        rows = [json.loads(line) for line in chunks[0].decode().splitlines()]
+        self.assertEqual(rows[0], {"id": self.tasks[0].pk, "start": "2026-01-01T09:00:00Z"})
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(export.filename, "tasks.ndjson")
+
+    def test_empty(self):
+        self.assertEqual(list(TaskListExport(Task.objects.none(), "ndjson")), [])
+
+
+class TaskExportViewTestCase(TestCase):
+    def setUp(self) -> None:
+        project = Project.objects.create(title="Roof")
+        for title in ("Buy tiles", "Lay tiles", "Paint walls"):
+            Task.objects.create(title=title, project=project)
+        self.url = reverse("projects-task-export")
+        user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        user.user_permissions.add(Permission.objects.get(codename="view_task"))
+
+    def export(self, **params) -> list:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-store")
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_export_view(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.client.login(email="user@example.com", password="password")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tasks.csv"')
+
+        lines = self.export(order_by="-title")
+        self.assertEqual([line.split(",")[2] for line in lines], ["title", "Paint walls", "Lay tiles", "Buy tiles"])
+
+        lines = self.export(q="tiles", order_by="title", format="ndjson")
+        self.assertEqual([json.loads(line)["title"] for line in lines], ["Buy tiles", "Lay tiles"])
+
+        lines = self.export(q="lay", format="ndjson", page=2)
+        self.assertEqual([json.loads(line)["title"] for line in lines], ["Lay tiles"])
+
+        self.assertEqual(self.client.get(self.url, {"format": "xml"}).status_code, 404)
@@ -0,0 +1,193 @@
+import datetime
+import io
+import json
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from django.shortcuts import reverse
+from django.test import TestCase, override_settings
+
+from employees.models import Employee
+from projects.imports import ImportFileError, TaskImporter, copy_value
+from projects.models import Project, Task, TaskImport, TaskJobStatus, TaskQuerySet, TaskStatus
+from worker.projects.tasks import import_tasks
+
+INVALID_CHOICE = "Select a valid choice. That choice is not one of the available choices."
+
+
+class TaskImporterTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Roof")
+        self.other = Project.objects.create(title="Walls")
+        birthdate = datetime.date(1990, 1, 1)
+        self.ann = Employee.objects.create(firstname="Ann", surname="A", email="ann@example.com", birthdate=birthdate)
+        Employee.objects.create(firstname="Ann", surname="B", email="Ann@example.com", birthdate=birthdate)
+        self.bob = Employee.objects.create(firstname="Bob", surname="B", email="bob@example.com", birthdate=birthdate)
+
+    def run_import(self, content: str, format: str = "csv", **kwargs) -> TaskImporter:
+        return TaskImporter(**kwargs).run(io.BytesIO(content.encode()), format)
+
+    def test_import_csv(self):
+        content = (
+            "﻿id,project_id,title,description,status,start,end,author__email,assignee__email,extra\n"
+            f'7,{self.project.pk},Buy tiles,"*red*\nones",,2026-01-05T09:00:00+00:00,,ANN@example.com,,x\n'
+            f"8,{self.other.pk},Lay tiles,,done,,,,bob@example.com\n"
+            f"9,0,Paint,,new,,,,\n"
+            f",{self.project.pk},,,wrong,,,nobody@example.com,\n"
+        )
+        importer = self.run_import(content, batch_size=1)
+        self.assertEqual((importer.processed, importer.imported, importer.failed), (4, 2, 2))
+        self.assertEqual(
+            importer.errors,
+            [
+                {"line": 5, "errors": {"project": [INVALID_CHOICE]}},
+                {
+                    "line": 6,
+                    "errors": {
+                        "author": [INVALID_CHOICE],
+                        "title": ["This field is required."],
+                        "status": ["Select a valid choice. wrong is not one of the available choices."],
+                    },
+                },
+            ],
+        )
+
+        first, second = Task.objects.order_by("id")
+        self.assertEqual((first.title, first.description, first.status), ("Buy tiles", "*red*\nones", "new"))
+        self.assertEqual(first.start, datetime.datetime(2026, 1, 5, 9, tzinfo=datetime.timezone.utc))
+        self.assertEqual((first.author_id, first.assignee_id), (self.ann.pk, None))
+        self.assertEqual(first.description_html, "<p><em>red</em>\nones</p>")
+        self.assertTrue(first.description_html_is_fresh)
+        self.assertEqual((second.project_id, second.status, second.assignee_id), (self.other.pk, "done", self.bob.pk))
+
+        self.project.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.project.tasks_total, self.project.tasks_open), (1, 1))
+        self.assertEqual((self.other.tasks_total, self.other.tasks_completed), (1, 1))
+
+    def test_import_ndjson(self):
+        rows = [
+            {"project": self.project.pk, "title": "One", "author": self.bob.pk, "assignee_id": None},
+            "not an object",
+            {"project": str(self.project.pk), "title": "Two", "status": TaskStatus.IN_PROGRESS, "assignee": "x"},
+        ]
+        content = "\n".join(json.dumps(row) for row in rows) + "\n\n{broken\n"
+        progress = mock.Mock()
+        importer = self.run_import(content, "ndjson", on_progress=progress, max_errors=2)
+        self.assertEqual((importer.processed, importer.imported, importer.failed), (4, 1, 3))
+        self.assertEqual(
+            importer.errors,
+            [
+                {"line": 2, "errors": {"__all__": ["Row is not a JSON object"]}},
+                {"line": 3, "errors": {"assignee": [INVALID_CHOICE]}},
+            ],
+        )
+        progress.assert_called_once_with(importer)
+        self.assertEqual(list(Task.objects.values_list("title", "author_id")), [("One", self.bob.pk)])
+
+    def test_import_missing_project(self):
+        importer = self.run_import("title\nOrphan\n")
+        self.assertEqual(importer.errors, [{"line": 2, "errors": {"project": ["This field is required."]}}])
+
+    def test_import_malformed_file(self):
+        with self.assertRaises(ImportFileError):
+            TaskImporter().run(io.BytesIO(b"title\n\xff\n"), "csv")
+        with self.assertRaises(ImportFileError):
+            self.run_import("title\n" + "a" * 200000 + "\n")
+
+    def test_import_database_error(self):
+        content = f"project,title\n{self.project.pk},One\n{self.project.pk},Two\n"
+        bulk_create = TaskQuerySet.bulk_create
+
+        def fail_on_two(queryset, objs, *args, **kwargs):
+            if any(obj.title == "Two" for obj in objs):
+                raise IntegrityError("constraint failed")
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        with mock.patch.object(TaskQuerySet, "bulk_create", autospec=True, side_effect=fail_on_two):
+            importer = self.run_import(content)
+        self.assertEqual((importer.imported, importer.failed), (1, 1))
+        self.assertEqual(importer.errors, [{"line": 3, "errors": {"__all__": ["constraint failed"]}}])
+        self.assertEqual(list(Task.objects.values_list("title", flat=True)), ["One"])
+
+    def test_copy_value(self):
+        self.assertEqual(copy_value(None), "\\N")
+        self.assertEqual(copy_value("a\\b\tc\nd\re"), "a\\\\b\\tc\\nd\\re")
+        self.assertEqual(copy_value(5), "5")
+
+    def test_import_copy(self):
+        content = f'project,title,description\n{self.project.pk},One,"tab\there"\n{self.project.pk},Two,\n'
+        copied = []
+
+        def copy_expert(sql, file):
+            copied.append((sql, file.read()))
+
+        with mock.patch("django.db.backends.utils.CursorWrapper.copy_expert", create=True, side_effect=copy_expert):
+            importer = self.run_import(content, use_copy=True)
+        self.assertEqual(importer.imported, 2)
+        sql, data = copied[0]
+        self.assertEqual(
+            sql,
+            'COPY "projects_task" ("title", "description", "project_id", "start", "end", "author_id", '
+            '"assignee_id", "status", "description_html", "description_digest") FROM STDIN',
+        )
+        lines = data.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith(f"One\ttab\\there\t{self.project.pk}\t\\N\t\\N\t\\N\t\\N\tnew\t<p>tab"))
+        self.assertTrue(lines[1].startswith(f"Two\t\t{self.project.pk}\t"))
+
+    def test_use_copy_default(self):
+        self.assertFalse(TaskImporter().use_copy)
+        with mock.patch("projects.imports.connections") as connections:
+            connections.__getitem__.return_value.vendor = "postgresql"
+            self.assertTrue(TaskImporter().use_copy)
+
+    def test_using_default(self):
+        self.assertEqual(TaskImporter(using="default").using, "default")
+        with mock.patch("projects.imports.router.db_for_write", return_value="master") as db_for_write:
+            with mock.patch("projects.imports.connections"):
+                self.assertEqual(TaskImporter().using, "master")
+        db_for_write.assert_called_once_with(Task)
+
+
+class TaskImportViewTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.project = Project.objects.create(title="Roof")
+        self.user = get_user_model().objects.create_user(email="user@example.com", password="password", is_active=True)
+        self.user.user_permissions.add(Permission.objects.get(codename="add_task"))
+        self.client.login(email="user@example.com", password="password")
+
+    def test_import_view(self):
+        self.assertEqual(self.client.get(reverse("projects-task-import")).status_code, 200)
+        file = SimpleUploadedFile("tasks.csv", f"project,title\n{self.project.pk},One\n,Two\n".encode())
+        with mock.patch("projects.views.import_tasks.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse("projects-task-import"), {"file": file, "format": "csv"})
+        task_import = TaskImport.objects.get()
+        self.assertRedirects(response, reverse("projects-task-import-detail", kwargs={"pk": task_import.pk}))
+        delay.assert_called_once_with(str(task_import.pk))
+        self.assertEqual((task_import.user, task_import.status), (self.user, TaskJobStatus.PENDING))
+
+        response = self.client.get(response.url)
+        self.assertContains(response, 'http-equiv="refresh"')
+
+        import_tasks(str(task_import.pk))
+        response = self.client.get(reverse("projects-task-import-detail", kwargs={"pk": task_import.pk}))
+        self.assertNotContains(response, 'http-equiv="refresh"')
+        self.assertContains(response, "This field is required.")
+        self.assertEqual(response.context["taskimport"].imported, 1)
+
+    def test_import_view_other_user(self):
+        task_import = TaskImport.objects.create(file="imports/tasks.csv", format="csv")
+        response = self.client.get(reverse("projects-task-import-detail", kwargs={"pk": task_import.pk}))
+        self.assertEqual(response.status_code, 404)
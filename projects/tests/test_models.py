@@ -1,6 +1,10 @@
-from django.test import TestCase
+from unittest import mock
 
-from projects.models import Project, Task
+from django.db import router
+from django.test import TestCase, override_settings
+
+from projects.models import Comment, Project, Task, TaskStatus
+from projects.rendering import markdown_digest
 
 
 class ProjectsTestCase(TestCase):
@@ -19,3 +23,166 @@ class ProjectsTestCase(TestCase):
             self.task.__str__(),
             f"{self.task.id}: {self.task.title} ({self.task.status})",
         )
+
+
+class ProjectTaskCountersTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Test project")
+        self.other_project = Project.objects.create(title="Other project")
+
+    def assertCounters(self, project, total, open_, completed):
+        project.refresh_from_db()
+        self.assertEqual(
+            (project.tasks_total, project.tasks_open, project.tasks_completed),
+            (total, open_, completed),
+        )
+
+    def test_task_create_update_delete(self):
+        task = Task.objects.create(title="Task", project=self.project)
+        self.assertCounters(self.project, 1, 1, 0)
+
+        task.status = TaskStatus.DONE
+        task.save()
+        self.assertCounters(self.project, 1, 0, 1)
+
+        task = Task.objects.get(pk=task.pk)
+        task.project = self.other_project
+        task.save()
+        self.assertCounters(self.project, 0, 0, 0)
+        self.assertCounters(self.other_project, 1, 0, 1)
+
+        task.title = "Renamed task"
+        task.save(update_fields=["title"])
+        self.assertCounters(self.other_project, 1, 0, 1)
+
+        Task(pk=task.pk, title="Task", project=self.project, status=TaskStatus.NEW).save()
+        self.assertCounters(self.project, 1, 1, 0)
+        self.assertCounters(self.other_project, 0, 0, 0)
+
+        task = Task.objects.get(pk=task.pk)
+        task.delete()
+        self.assertCounters(self.project, 0, 0, 0)
+
+    def test_task_bulk_operations(self):
+        Task.objects.bulk_create(
+            [
+                Task(title="Task 1", project=self.project),
+                Task(title="Task 2", project=self.project, status=TaskStatus.CLOSED),
+                Task(title="Task 3", project=self.other_project),
+            ]
+        )
+        self.assertCounters(self.project, 2, 1, 1)
+        self.assertCounters(self.other_project, 1, 1, 0)
+
+        Task.objects.filter(project=self.project).update(status=TaskStatus.DONE)
+        self.assertCounters(self.project, 2, 0, 2)
+
+        Task.objects.filter(project=self.project).update(title="Renamed")
+        Task.objects.filter(title="Task 3").update(project=self.project)
+        self.assertCounters(self.project, 3, 1, 2)
+        self.assertCounters(self.other_project, 0, 0, 0)
+
+        tasks = list(Task.objects.filter(status=TaskStatus.DONE))
+        for task in tasks:
+            task.project = self.other_project
+        Task.objects.bulk_update(tasks, ["project"])
+        Task.objects.bulk_update(tasks, ["title"])
+        self.assertCounters(self.project, 1, 1, 0)
+        self.assertCounters(self.other_project, 2, 0, 2)
+
+        Task.objects.filter(project=self.other_project).delete()
+        self.assertCounters(self.other_project, 0, 0, 0)
+
+    def test_task_bulk_operations_on_write_database(self):
+        Task.objects.create(title="Task", project=self.project)
+        # replica alias doesn't exist, so any read from it fails
+        with mock.patch.object(router, "db_for_read", return_value="replica"):
+            Task.objects.bulk_create([Task(title="Task 2", project=self.project)])
+            Task.objects.filter(project=self.project).update(status=TaskStatus.DONE)
+            Task.objects.filter(project=self.project).update_in_projects(status=TaskStatus.NEW)
+            tasks = list(Task.objects.using("default").filter(project=self.project))
+            Task.objects.bulk_update(tasks, ["status"])
+            Task.objects.filter(title="Task").delete()
+        self.assertCounters(self.project, 1, 1, 0)
+
+    def test_project_save_keeps_counters(self):
+        project = Project.objects.get(pk=self.project.pk)
+        Task.objects.create(title="Task", project=self.project)
+        project.title = "Renamed project"
+        project.save()
+        self.assertCounters(self.project, 1, 1, 0)
+        self.assertEqual(self.project.title, "Renamed project")
+
+    def test_project_completed(self):
+        self.assertEqual(self.project.completed, 0.0)
+        Task.objects.create(title="Task 1", project=self.project)
+        Task.objects.create(title="Task 2", project=self.project, status=TaskStatus.DONE)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.completed, 50.0)
+
+    def test_task_save_without_changes_and_deferred_fields(self):
+        task = Task.objects.create(title="Task", project=self.project)
+        task.save()
+        task = Task.objects.only("title").get(pk=task.pk)
+        task.status = TaskStatus.CLOSED
+        task.save()
+        self.assertCounters(self.project, 1, 0, 1)
+
+    def test_task_saved_by_stale_instances(self):
+        task = Task.objects.create(title="Task", project=self.project)
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+        first.status = TaskStatus.DONE
+        first.save()
+        second.project = self.other_project
+        second.save()
+        self.assertCounters(self.project, 0, 0, 0)
+        self.assertCounters(self.other_project, 1, 1, 0)
+        first.delete()
+        self.assertCounters(self.other_project, 0, 0, 0)
+
+    def test_delete_missing_task_and_empty_queryset(self):
+        Task(pk=1000, title="Task", project=self.project).delete()
+        Task.objects.none().update(status=TaskStatus.DONE)
+        self.assertCounters(self.project, 0, 0, 0)
+
+
+class RenderedDescriptionTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Test project", description="*project*")
+
+    def test_render_on_save(self):
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.description_html, "<p><em>project</em></p>")
+        self.assertTrue(self.project.description_html_is_fresh)
+
+        task = Task.objects.create(title="Task", project=self.project, description="**task**")
+        task.description = "**changed**"
+        task.save(update_fields=["description"])
+        task.refresh_from_db()
+        self.assertEqual(task.description_html, "<p><strong>changed</strong></p>")
+
+        # html is not touched when description isn't saved
+        task.description = "not saved"
+        task.save(update_fields=["title"])
+        task.refresh_from_db()
+        self.assertEqual(task.description_html, "<p><strong>changed</strong></p>")
+
+        comment = Comment.objects.create(task=task, description="comment")
+        self.assertEqual(comment.description_html, "<p>comment</p>")
+
+    def test_stale_after_queryset_update(self):
+        Project.objects.update(description="changed")
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.description_html_is_fresh)
+
+    @override_settings(MARKDOWN_RENDER_SYNC_MAX_SIZE=5)
+    def test_large_description_rendered_by_worker(self):
+        with mock.patch("projects.models.render_description_html.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.project.description = "*large project*"
+                self.project.save()
+        delay.assert_called_once_with("projects.Project", self.project.pk, markdown_digest("*large project*"))
+        self.project.refresh_from_db()
+        # html is rendered at request time until worker stores it
+        self.assertFalse(self.project.description_html_is_fresh)
+        self.assertEqual(self.project.description_html, "<p><em>project</em></p>")
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from projects.models import Project, Task
+from projects.pagination import InvalidCursor, KeysetPaginator
+
+
+class KeysetPaginatorTestCase(TestCase):
+    def setUp(self) -> None:
+        project = Project.objects.create(title="Test project")
+        now = timezone.now()
+        for i in range(11):
+            Task.objects.create(
+                title=f"Task {i % 4}",
+                project=project,
+                end=None if i % 3 == 0 else now + timedelta(days=i % 5),
+            )
+
+    def walk(self, ordering, per_page=3):
+        paginator = KeysetPaginator(Task.objects.all(), per_page, ordering)
+        pages, cursor = [], ""
+        while True:
+            page = paginator.page(cursor)
+            pages.append([task.pk for task in page])
+            if not page.has_next():
+                return paginator, pages
+            cursor = page.next_cursor
+
+    def test_walk_forward_and_back(self):
+        for ordering, order_by in [
+            ("id", ["id"]),
+            ("-title", ["-title", "-id"]),
+            ("end", ["end", "id"]),
+            ("-end", ["-end", "-id"]),
+            ("unknown", ["id"]),
+        ]:
+            with self.subTest(ordering=ordering):
+                paginator, pages = self.walk(ordering)
+                expected = list(Task.objects.order_by(*order_by).values_list("pk", flat=True))
+                if "end" in ordering:
+                    # nulls are placed last in both directions
+                    nulls = list(Task.objects.filter(end=None).order_by(order_by[1]).values_list("pk", flat=True))
+                    expected = [pk for pk in expected if pk not in nulls] + nulls
+                self.assertEqual([pk for page in pages for pk in page], expected)
+                self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+
+                # walk backwards from the last page
+                page = paginator.page(paginator.encode_cursor("n", Task.objects.get(pk=pages[-2][-1])))
+                backwards = []
+                while page.has_previous():
+                    page = paginator.page(page.previous_cursor)
+                    backwards.append([task.pk for task in page])
+                self.assertEqual(backwards, pages[-2::-1])
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(Task.objects.all(), 3, "title")
+        other = KeysetPaginator(Task.objects.all(), 3, "end")
+        for cursor in ["garbage!", "bm90IGpzb24", other.encode_cursor("n", Task.objects.first())]:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    paginator.page(cursor)
+
+    def test_invalid_cursor_value(self):
+        import base64
+
+        paginator = KeysetPaginator(Task.objects.all(), 3, "end")
+        cursor = base64.urlsafe_b64encode(b'["end","n","not a date",1]').decode()
+        with self.assertRaises(InvalidCursor):
+            paginator.page(cursor)
+
+    def test_cursor_encoder(self):
+        from projects.pagination import CursorJSONEncoder
+
+        self.assertEqual(CursorJSONEncoder().default(date(2021, 3, 1)), "2021-03-01")
+
+    def test_page_protocol(self):
+        paginator = KeysetPaginator(Task.objects.all(), 20, "documents")
+        page = paginator.page()
+        self.assertEqual(paginator.ordering, "id")
+        self.assertEqual(len(page), 11)
+        self.assertFalse(page.has_other_pages())
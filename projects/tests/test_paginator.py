@@ -0,0 +1,49 @@
+from django.core.paginator import Paginator
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+
+from projects.models import Project, Task
+from projects.pagination import KeysetPaginator
+
+
+class PaginatorTagTestCase(TestCase):
+    template = Template("{% load paginator %}{% paginator on_each_side=1 on_ends=1 %}")
+
+    def render(self, page, query="q=test&page=5&cursor=abc"):
+        request = RequestFactory().get("/tasks/?" + query)
+        return self.template.render(Context({"page_obj": page, "request": request}))
+
+    def test_elided_page_range(self):
+        page = Paginator(range(1000), 10).page(50)
+        html = self.render(page)
+        self.assertEqual(html.count('class="page-link" href="?q=test&amp;page='), 7)
+        for number in [1, 49, 50, 51, 100]:
+            self.assertIn(f'href="?q=test&amp;page={number}">{number}</a>', html)
+        self.assertEqual(html.count("…"), 2)
+        self.assertIn('aria-current="page"', html)
+        self.assertNotIn("cursor", html)
+
+    def test_first_page_without_query(self):
+        html = self.render(Paginator(range(30), 10).page(1), query="")
+        self.assertIn('href="?page=2">', html)
+        self.assertIn('aria-disabled="true">', html)
+
+    def test_last_page(self):
+        html = self.render(Paginator(range(30), 10).page(3), query="")
+        self.assertIn('href="?page=2">', html)
+        self.assertIn('aria-disabled="true">', html)
+
+    def test_single_page(self):
+        self.assertEqual(self.render(Paginator(range(5), 10).page(1)).strip(), "")
+        self.assertEqual(self.render(None).strip(), "")
+
+    def test_keyset_page(self):
+        project = Project.objects.create(title="Test project")
+        for i in range(5):
+            Task.objects.create(title=f"Task {i}", project=project)
+        paginator = KeysetPaginator(Task.objects.all(), 2)
+        page = paginator.page(paginator.page().next_cursor)
+        html = self.render(page)
+        self.assertIn(f'href="?q=test&amp;cursor={page.next_cursor}"', html)
+        self.assertIn(f'href="?q=test&amp;cursor={page.previous_cursor}"', html)
+        self.assertNotIn("page=", html)
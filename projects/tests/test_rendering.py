@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from projects.models import Project
+from projects.rendering import MarkdownRenderCache, markdown_cache, markdown_digest, render_markdown
+from projects.templatetags.markdown_processor import markdown_processor
+
+
+class MarkdownRenderCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.cache = MarkdownRenderCache(max_size=100)
+
+    def test_render_empty(self):
+        self.assertEqual(self.cache.render(""), "")
+        self.assertEqual(self.cache.render(None), "")
+        self.assertEqual(self.cache.stats()["misses"], 0)
+
+    def test_render_levels(self):
+        self.assertEqual(self.cache.render("**bold**"), "<p><strong>bold</strong></p>")
+        self.assertEqual(self.cache.render("**bold**"), "<p><strong>bold</strong></p>")
+        self.assertEqual(self.cache.stats()["misses"], 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+        # another process: html is taken from shared cache
+        other = MarkdownRenderCache(max_size=100)
+        with mock.patch("projects.rendering.markdown") as markdown:
+            self.assertEqual(other.render("**bold**"), "<p><strong>bold</strong></p>")
+        markdown.assert_not_called()
+        self.assertEqual(other.stats()["shared_hits"], 1)
+
+    def test_lru_eviction_by_size(self):
+        first, second, third = "a" * 40, "b" * 40, "c" * 40
+        self.cache.render(first)
+        self.cache.render(second)
+        self.cache.render(first)
+        self.cache.render(third)
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertLessEqual(stats["size"], 100)
+        self.assertIn(self.cache.key(first), self.cache._local)
+        self.assertNotIn(self.cache.key(second), self.cache._local)
+
+        # html larger than the whole cache is not kept in process
+        self.cache.render("d" * 200)
+        self.assertNotIn(self.cache.key("d" * 200), self.cache._local)
+
+        # re-setting the same key doesn't count its size twice
+        self.cache._set_local(self.cache.key(first), "<p>x</p>")
+        self.assertEqual(self.cache.stats()["size"], len("<p>x</p>") + len(f"<p>{third}</p>"))
+
+    def test_warm(self):
+        self.cache.render("cached")
+        cache.set(self.cache.key("shared"), "<p>shared</p>")
+        with mock.patch("projects.rendering.markdown", side_effect=lambda text: text) as markdown:
+            self.assertEqual(self.cache.warm(["cached", "shared", "new", "new", "", None]), 1)
+            markdown.assert_called_once_with("new")
+            self.assertEqual(self.cache.warm(["cached", "shared", "new"]), 0)
+            self.assertEqual(self.cache.render("new"), "new")
+        self.assertEqual(cache.get(self.cache.key("new")), "new")
+        stats = self.cache.stats()
+        self.assertEqual((stats["misses"], stats["shared_hits"], stats["hits"]), (2, 1, 1))
+
+        with mock.patch("projects.rendering.markdown") as markdown:
+            self.assertEqual(MarkdownRenderCache().warm(["shared"]), 0)
+        markdown.assert_not_called()
+
+    def test_clear(self):
+        self.cache.render("text")
+        self.cache.clear()
+        self.assertEqual(
+            self.cache.stats(),
+            {"hits": 0, "shared_hits": 0, "misses": 0, "entries": 0, "size": 0, "max_size": 100},
+        )
+
+    def test_render_markdown(self):
+        with mock.patch.object(markdown_cache, "render", return_value="<p>x</p>") as render:
+            self.assertEqual(render_markdown("x"), "<p>x</p>")
+            self.assertEqual(markdown_processor("x"), "<p>x</p>")
+        self.assertEqual(render.call_count, 2)
+
+    def test_markdown_filter_model_instance(self):
+        project = Project.objects.create(title="Test project", description="*project*")
+        with mock.patch("projects.templatetags.markdown_processor.render_markdown") as render:
+            self.assertEqual(markdown_processor(project), "<p><em>project</em></p>")
+            render.assert_not_called()
+
+            project.description = "changed"
+            render.return_value = "<p>changed</p>"
+            self.assertEqual(markdown_processor(project), "<p>changed</p>")
+            render.assert_called_once_with("changed")
+
+        project.description_html, project.description_digest = None, markdown_digest(None)
+        project.description = None
+        self.assertEqual(markdown_processor(project), "")
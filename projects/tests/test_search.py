@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.postgres.search import SearchHeadline, SearchRank
+from django.db import connection
+from django.test import TestCase
+
+from documents.models import Document, DocumentText
+from projects.apps import ensure_search_index
+from projects.models import Project, Task
+from projects.search import (
+    HIGHLIGHT_START,
+    HIGHLIGHT_STOP,
+    TASK_SEARCH_INDEX,
+    install_search_index,
+    search_terms,
+    search_tasks,
+    uninstall_search_index,
+)
+from projects.templatetags.search_highlight import highlight
+
+
+class TaskSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        project = Project.objects.create(title="Test project")
+        self.in_title = Task.objects.create(title="Paint fences", description="All of them", project=project)
+        self.in_description = Task.objects.create(
+            title="Build roof", description="Then paint the roof", project=project
+        )
+        self.other = Task.objects.create(title="Mow the grass", project=project)
+
+    def test_search_terms(self):
+        self.assertEqual(search_terms('#tag "quoted" OR-not*'), ["tag", "quoted", "OR", "not"])
+        self.assertEqual(search_terms(None), [])
+
+    def test_search_rank_and_headline(self):
+        tasks = list(search_tasks(Task.objects.all(), "pain").order_by("-search_rank"))
+        self.assertEqual(tasks, [self.in_title, self.in_description])
+        self.assertIn(f"{HIGHLIGHT_START}Paint{HIGHLIGHT_STOP}", tasks[0].search_headline)
+
+    def test_search_index_maintained(self):
+        self.other.description = "paint the grass green"
+        self.other.save()
+        self.in_title.delete()
+        tasks = search_tasks(Task.objects.all(), "paint green")
+        self.assertQuerySetEqual(tasks, [self.other], transform=lambda x: x)
+
+    def test_search_attachments(self):
+        document = Document.objects.create(title="quote.pdf")
+        DocumentText.objects.create(document=document, text="Green paint quotation")
+        self.other.documents.add(document)
+        tasks = list(search_tasks(Task.objects.all(), "paint quot").order_by("-search_rank"))
+        self.assertEqual(tasks, [self.other])
+        self.assertEqual(tasks[0].search_rank, 0.0)
+        self.assertIsNone(tasks[0].search_headline)
+
+        tasks = search_tasks(Task.objects.all(), "paint").order_by("-search_rank", "id")
+        self.assertQuerySetEqual(tasks, [self.in_title, self.in_description, self.other], transform=lambda x: x)
+
+        with mock.patch("projects.search.connections", {"default": mock.Mock(vendor="mysql")}):
+            tasks = search_tasks(Task.objects.all(), "quotation")
+        self.assertQuerySetEqual(tasks, [self.other], transform=lambda x: x)
+
+        self.assertFalse(search_tasks(Task.objects.all(), "quotation", attachments=False).exists())
+        self.assertEqual(search_tasks(Task.objects.all(), "paint", attachments=False).count(), 2)
+
+    def test_search_without_terms(self):
+        self.assertQuerySetEqual(search_tasks(Task.objects.all(), "#!"), [])
+
+    def test_search_other_vendor(self):
+        with mock.patch("projects.search.connections", {"default": mock.Mock(vendor="mysql")}):
+            tasks = search_tasks(Task.objects.all(), "paint roof")
+        self.assertQuerySetEqual(tasks, [self.in_description], transform=lambda x: x)
+        self.assertIsNone(tasks[0].search_headline)
+
+    def test_search_postgresql_query(self):
+        with mock.patch("projects.search.connections", {"default": mock.Mock(vendor="postgresql")}):
+            tasks = search_tasks(Task.objects.all(), "paint roof")
+        self.assertIsInstance(tasks.query.annotations["search_rank"], SearchRank)
+        self.assertIsInstance(tasks.query.annotations["search_headline"], SearchHeadline)
+        self.assertIn("@@", str(tasks.values("id").query))
+
+    def test_install_search_index(self):
+        uninstall_search_index(connection)
+        install_search_index(connection, rebuild=True)
+        self.assertEqual(search_tasks(Task.objects.all(), "grass").count(), 1)
+
+        other_vendor = mock.MagicMock(vendor="mysql")
+        install_search_index(other_vendor, rebuild=True)
+        uninstall_search_index(other_vendor)
+        other_vendor.cursor.return_value.__enter__.return_value.execute.assert_not_called()
+
+    def test_highlight_filter(self):
+        self.assertEqual(highlight(f"<b>{HIGHLIGHT_START}x{HIGHLIGHT_STOP}"), "&lt;b&gt;<mark>x</mark>")
+        self.assertEqual(highlight(None), "")
+
+    def test_ensure_search_index_after_migrate(self):
+        config = apps.get_app_config("projects")
+        with mock.patch.object(TASK_SEARCH_INDEX, "install") as install:
+            ensure_search_index(config)
+            install.assert_called_once_with(connection)
+
+            introspection = mock.MagicMock()
+            introspection.table_names.return_value = []
+            with mock.patch.object(connection, "introspection", introspection):
+                ensure_search_index(config)
+            introspection.table_names.return_value = [Task._meta.db_table]
+            introspection.get_table_description.return_value = []
+            with mock.patch.object(connection, "introspection", introspection):
+                ensure_search_index(config)
+            install.assert_called_once()
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.http import QueryDict
 from django.shortcuts import reverse
 from django.test import Client, TestCase
 
@@ -20,3 +21,12 @@ class TaskListTestCase(TestCase):
     def test_task_list_view_with_tags(self):
         response = self.client.get(reverse("projects-task-list"))
         self.assertEqual(response.status_code, 200)
+
+
+class QueryBuilderTestCase(TestCase):
+    def test_query_builder_order_by_resets_cursor(self):
+        from projects.templatetags.query_builder import query_builder
+
+        query = QueryDict("q=test&order_by=title&cursor=abc")
+        self.assertEqual(query_builder(query, order_by="title"), "?q=test&order_by=-title&cursor=")
+        self.assertEqual(query_builder(query, cursor="def"), "?q=test&order_by=title&cursor=def")
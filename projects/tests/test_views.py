@@ -1,11 +1,16 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.db.models import Q
 from django.http import QueryDict
 from django.shortcuts import reverse
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 
+from documents.models import Document
 from projects.models import Comment, Project, Task, TaskStatus
 
 
@@ -336,6 +341,59 @@ class TaskListViewTestCase(TestCaseWithUser):
         )
 
 
+    def test_task_list_view_search_relevance(self):
+        project = Project.objects.create(title="Test project for tasks")
+        in_description = Task.objects.create(
+            title="Task 1", description="fence", project=project
+        )
+        in_title = Task.objects.create(title="Paint fence", project=project)
+        Task.objects.create(title="Task 3", project=project)
+
+        response = self.client.get(reverse("projects-task-list") + "?q=fence")
+        self.assertEqual(response.status_code, 200)
+        self.assertQuerySetEqual(
+            response.context["task_list"], [in_title, in_description], transform=lambda x: x
+        )
+        self.assertContains(response, "<mark>fence</mark>")
+
+    def test_task_list_view_cursor_pagination(self):
+        project = Project.objects.create(title="Test project for tasks")
+        for i in range(15):
+            Task.objects.create(title=f"Task {i} #searchtag", project=project)
+        Task.objects.create(title="Task without tag", project=project)
+
+        q = QueryDict(mutable=True)
+        q["q"] = "#searchtag"
+        q["order_by"] = "-title"
+        q["cursor"] = ""
+        response = self.client.get(
+            "{}?{}".format(reverse("projects-task-list"), q.urlencode())
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["paginator"].is_keyset)
+        page = response.context["page_obj"]
+        self.assertEqual(len(page), 10)
+        self.assertFalse(page.has_previous())
+
+        q["cursor"] = page.next_cursor
+        response = self.client.get(
+            "{}?{}".format(reverse("projects-task-list"), q.urlencode())
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertQuerySetEqual(
+            response.context["task_list"],
+            Task.objects.filter(title__icontains="#searchtag").order_by("-title", "-id")[10:],
+            transform=lambda x: x,
+        )
+        self.assertContains(response, "cursor=" + response.context["page_obj"].previous_cursor)
+
+        q["cursor"] = "broken"
+        response = self.client.get(
+            "{}?{}".format(reverse("projects-task-list"), q.urlencode())
+        )
+        self.assertEqual(response.status_code, 404)
+
+
 class TaskListDetailTestCase(TestCaseWithUser):
     def setUp(self) -> None:
         self.client = Client(HTTP_ACCEPT_LANGUAGE="ru")
@@ -372,6 +430,34 @@ class TaskListDetailTestCase(TestCaseWithUser):
         self.assertTrue("comments" in response.context)
         self.assertTrue("comment_form" in response.context)
 
+    def test_task_detail_view_constant_queries(self):
+        def task_with(count):
+            task = Task.objects.create(
+                title="Test task",
+                project=Project.objects.create(title="Test project"),
+            )
+            for i in range(count):
+                Comment.objects.create(description=f"comment {i}", task=task)
+                task.documents.add(
+                    Document.objects.create(
+                        title=f"document {i}",
+                        document=SimpleUploadedFile(f"doc{i}.txt", b"content"),
+                    )
+                )
+            return task
+
+        counts = []
+        for task in (task_with(1), task_with(5)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    reverse("projects-task-detail", kwargs={"pk": task.id})
+                )
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertContains(response, "comment 4")
+        self.assertContains(response, "document 4")
+
     def test_task_detail_view_OK_no_comment_permission(self):
         self.client.logout()
         user = get_user_model().objects.create_user(
@@ -489,6 +575,24 @@ class CommentCreateTestCase(TestCaseWithUser):
         self.assertTrue("comment_form" in response.context)
         self.assertEqual(len(response.context["comments"]), 2)
 
+    def test_view_task_warms_markdown_cache(self):
+        task = Task.objects.create(
+            title="Test task",
+            description="task *description*",
+            project=Project.objects.create(title="Test project"),
+        )
+        Comment.objects.create(task=task, description="comment *description*")
+        # task html is stale, comment html is rendered on save
+        Task.objects.filter(pk=task.pk).update(description="task **description**")
+        with mock.patch("projects.views.markdown_cache.warm") as warm:
+            response = self.client.get(
+                reverse("projects-task-detail", kwargs={"pk": task.id})
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(warm.call_args.args[0]), ["task **description**"])
+        self.assertContains(response, "<em>description</em>")
+        self.assertContains(response, "<strong>description</strong>")
+
     def test_comment_post_success(self):
         task = Task.objects.create(
             title="Test task", project=Project.objects.create(title="Test project")
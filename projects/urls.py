@@ -9,16 +9,24 @@ from django.urls import path
 
 from .views import (
     CommentCreate,
+    ProjectChunkedDocumentUpload,
     ProjectCreateView,
     ProjectDeleteView,
     ProjectDetailView,
     ProjectDocumentUpload,
     ProjectEditView,
+    ProjectExportView,
     ProjectsListView,
+    TaskBulkUpdateDetailView,
+    TaskBulkUpdateView,
+    TaskChunkedDocumentUpload,
     TaskCreateView,
     TaskDeleteView,
     TaskDetailView,
     TaskDocumentUpload,
+    TaskExportView,
+    TaskImportCreateView,
+    TaskImportDetailView,
     TaskListView,
     TaskUpdateView,
 )
@@ -28,13 +36,38 @@ urlpatterns = [
     path("add/", ProjectCreateView.as_view(), name="project-create"),
     path("<int:pk>/", ProjectDetailView.as_view(), name="project-detail"),
     path("<int:pk>/edit/", ProjectEditView.as_view(), name="project-edit"),
+    path("<int:pk>/export/", ProjectExportView.as_view(), name="project-export"),
     path(
         "<int:pk>/document_upload/",
         ProjectDocumentUpload.as_view(),
         name="project-document-upload",
     ),
+    path(
+        "<int:pk>/document_upload/chunked/",
+        ProjectChunkedDocumentUpload.as_view(action="init"),
+        name="project-chunked-upload",
+    ),
+    path(
+        "<int:pk>/document_upload/chunked/<uuid:upload_id>/",
+        ProjectChunkedDocumentUpload.as_view(action="append"),
+        name="project-chunked-upload-append",
+    ),
+    path(
+        "<int:pk>/document_upload/chunked/<uuid:upload_id>/complete/",
+        ProjectChunkedDocumentUpload.as_view(action="complete"),
+        name="project-chunked-upload-complete",
+    ),
     path("<int:pk>/delete/", ProjectDeleteView.as_view(), name="project-delete"),
     path("tasks/", TaskListView.as_view(), name="projects-task-list"),
+    path("tasks/export/", TaskExportView.as_view(), name="projects-task-export"),
+    path("tasks/import/", TaskImportCreateView.as_view(), name="projects-task-import"),
+    path("tasks/import/<uuid:pk>/", TaskImportDetailView.as_view(), name="projects-task-import-detail"),
+    path("tasks/bulk_update/", TaskBulkUpdateView.as_view(), name="projects-task-bulk-update"),
+    path(
+        "tasks/bulk_update/<uuid:pk>/",
+        TaskBulkUpdateDetailView.as_view(),
+        name="projects-task-bulk-update-detail",
+    ),
     path("tasks/add/", TaskCreateView.as_view(), name="projects-task-create"),
     path("tasks/<int:pk>/", TaskDetailView.as_view(), name="projects-task-detail"),
     path("tasks/<int:pk>/comment_post/", CommentCreate.as_view(), name="comment-post"),
@@ -43,6 +76,21 @@ urlpatterns = [
         TaskDocumentUpload.as_view(),
         name="task-document-upload",
     ),
+    path(
+        "tasks/<int:pk>/document_upload/chunked/",
+        TaskChunkedDocumentUpload.as_view(action="init"),
+        name="task-chunked-upload",
+    ),
+    path(
+        "tasks/<int:pk>/document_upload/chunked/<uuid:upload_id>/",
+        TaskChunkedDocumentUpload.as_view(action="append"),
+        name="task-chunked-upload-append",
+    ),
+    path(
+        "tasks/<int:pk>/document_upload/chunked/<uuid:upload_id>/complete/",
+        TaskChunkedDocumentUpload.as_view(action="complete"),
+        name="task-chunked-upload-complete",
+    ),
     path("tasks/<int:pk>/edit/", TaskUpdateView.as_view(), name="projects-task-edit"),
     path("tasks/<int:pk>/delete/", TaskDeleteView.as_view(), name="projects-task-delete"),
 ]
@@ -2,27 +2,44 @@
 Projects views module.
 """
 
-from typing import Any, Dict
+from functools import partial
+from typing import Any, Dict, Tuple
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.db.models import Case, Count, F, FloatField, Q, When, QuerySet
-from django.db.models.functions import Cast
-from django.http import HttpResponseRedirect, HttpResponse
+from django.db import router, transaction
+from django.db.models import Prefetch, QuerySet
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header, url_has_allowed_host_and_scheme
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy
 from django.views.generic import (
     CreateView,
     DeleteView,
     DetailView,
+    FormView,
     ListView,
     UpdateView,
     View,
 )
 
-from documents.views import DocumentUpload
+from documents.views import ChunkedDocumentUpload, DocumentUpload
+from worker.projects.tasks import import_tasks, update_tasks
 
-from .forms import CommentModelForm, ProjectModelForm, TaskModelForm
-from .models import Comment, Project, Task, TaskStatus
+from .export import ProjectExport, TaskListExport
+from .forms import CommentModelForm, ProjectModelForm, TaskBulkUpdateForm, TaskImportModelForm, TaskModelForm
+from .models import Comment, Project, Task, TaskBulkUpdate, TaskImport
+from .pagination import InvalidCursor, KeysetPaginator
+from .rendering import markdown_cache
+from .search import search_tasks
 
 
 class ProjectsListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
@@ -37,30 +54,17 @@ class ProjectsListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
         template_name (str): template filename to render
         permission_required (str): permission requirements code
         permission_denied_message (str): message for user without permissions
-        queryset (QuerySet): queryset for getting projects list.
+        queryset (QuerySet): queryset for getting projects list,
+            progress is read from denormalized task counters.
+        paginate_by (int): number of items per page
     """
 
     login_url = reverse_lazy("accounts:login")
     template_name = "project_list.html"
     permission_required = "projects.view_project"
     permission_denied_message = gettext_lazy("You have no permission to view Projects")
-    queryset = (
-        Project.objects.annotate(
-            status_count=Count("task"),
-            status_new=Count(
-                "task",
-                filter=~Q(task__status__in=[TaskStatus.NEW, TaskStatus.IN_PROGRESS]),
-            ),
-        )
-        .annotate(
-            completed=Case(
-                When(status_count=0, then=0.0),
-                default=(100.0 * F("status_new") / F("status_count")),
-                output_field=FloatField(),
-            )
-        )
-        .order_by("id")
-    )
+    queryset = Project.objects.order_by("id")
+    paginate_by = 10
 
 
 class ProjectDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
@@ -87,7 +91,8 @@ class ProjectDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView)
         """Get from db all data for rendering detail view.
 
         Enriches project data with: list of tasks,
-        completed tasks, total tasks, assignee
+        completed tasks, total tasks, assignee.
+        Completed and total tasks are read from project task counters.
 
         Args:
             **kwargs: key value arguments with project id
@@ -101,28 +106,46 @@ class ProjectDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView)
         if self.request.user.has_perm("projects.view_task"):
             context["task_list"] = tasks
 
-        completed_data = tasks.aggregate(
-            total=Count("id"),
-            completed=Case(
-                When(total=0, then=0.0),
-                default=100.0
-                * Cast(
-                    Count(
-                        "id",
-                        filter=~Q(status__in=[TaskStatus.NEW, TaskStatus.IN_PROGRESS]),
-                    ),
-                    output_field=FloatField(),
-                )
-                / Cast(Count("id"), output_field=FloatField()),
-            ),
-        )
-
-        context["completed"] = completed_data.get("completed")
-        context["total"] = completed_data.get("total")
+        context["completed"] = self.object.completed
+        context["total"] = self.object.tasks_total
 
         return context
 
 
+class ProjectExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Project ZIP export view.
+
+    Archive is streamed while it is built, see `projects.export`.
+    Tasks, comments and documents are exported if user has view permission for them.
+
+    Attributes:
+        login_url (str): path to redirect not logged-in users.
+        permission_required (str): permission requirements code
+        permission_denied_message (str): message for user without permissions
+        chunk_size (int): number of rows fetched from server-side cursor at once
+    """
+
+    login_url = reverse_lazy("accounts:login")
+    permission_required = ["projects.view_project"]
+    permission_denied_message = gettext_lazy("You have no permission to view Projects")
+    chunk_size = 500
+
+    def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        """Stream project ZIP archive."""
+        user = request.user
+        export = ProjectExport(
+            get_object_or_404(Project, pk=pk),
+            include_tasks=user.has_perm("projects.view_task"),
+            include_comments=user.has_perm("projects.view_comment"),
+            include_documents=user.has_perm("documents.view_document"),
+            chunk_size=self.chunk_size,
+        )
+        response = StreamingHttpResponse(export, content_type="application/zip")
+        response["Content-Disposition"] = content_disposition_header(True, export.filename)
+        response["Cache-Control"] = "private, no-store"
+        return response
+
+
 class ProjectCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     """Create Project view.
 
@@ -225,12 +248,16 @@ class TaskListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
         login_url (str): path to redirect not logged-in users
         ordering (str): default ordering string
         paginate_by (int): number of items per page
+        cursor_kwarg (str): GET parameter which switches list to keyset pagination
         template_name (str): template filename to render
         permission_required (str): permission requirements code
         permission_denied_message (str): message for user without permissions
 
     Methods:
+        get_ordering: ordering from `order_by` GET parameter
         get_queryset: queryset for getting Tasks list
+        get_context_data: adds bulk update form for users allowed to change tasks
+        paginate_queryset: offset or keyset (cursor) pagination of Tasks list
     """
 
     login_url = reverse_lazy("accounts:login")
@@ -240,20 +267,96 @@ class TaskListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = Task
     ordering = "id"
     paginate_by = 10
+    cursor_kwarg = "cursor"
+
+    def get_ordering(self) -> str:
+        """Get ordering field name from request or default one.
+
+        Returns:
+            (str): field name, prefixed with `-` for descending order
+        """
+        return self.request.GET.get("order_by") or self.ordering
 
     def get_queryset(self) -> QuerySet:
         """Get queryset for getting Tasks list.
 
+        Searches tasks with full text search engine if `q` GET parameter is set,
+        search results are ordered by relevance unless `order_by` is set.
+        Attached documents are searched for users with `documents.view_document` permission.
+
         Returns:
             (QuerySet): queryset for getting Tasks list
         """
-        tasks = Task.objects.all().select_related("author", "assignee")
-        ordering = self.request.GET.get("order_by") or self.ordering
+        tasks = Task.objects.all().select_related("author", "assignee").defer("search_vector")
         if self.request.GET.get("q"):
-            search = self.request.GET.get("q")
-            tasks = tasks.filter(Q(title__icontains=search) | Q(description__icontains=search))
+            attachments = self.request.user.has_perm("documents.view_document")
+            tasks = search_tasks(tasks, self.request.GET.get("q"), attachments=attachments)
+            if not self.request.GET.get("order_by"):
+                return tasks.order_by("-search_rank", "id")
+
+        return tasks.order_by(self.get_ordering())
+
+    def get_context_data(self, **kwargs) -> Dict[str, Any]:
+        """Add bulk update form for users allowed to change tasks."""
+        context = super(TaskListView, self).get_context_data(**kwargs)
+        if self.request.user.has_perm("projects.change_task"):
+            context["bulk_update_form"] = TaskBulkUpdateForm(
+                initial={"q": self.request.GET.get("q", ""), "next": self.request.get_full_path()}
+            )
+        return context
 
-        return tasks.order_by(ordering)
+    def paginate_queryset(self, queryset: QuerySet, page_size: int) -> Tuple[Any, Any, Any, bool]:
+        """Paginate Tasks list.
+
+        Uses keyset pagination if `cursor` GET parameter is present
+        (empty value for the first page), otherwise default offset pagination.
+
+        Args:
+            queryset: Tasks queryset
+            page_size: number of items per page
+
+        Returns:
+            (tuple): paginator, page, object list and is paginated flag
+        """
+        if self.cursor_kwarg not in self.request.GET:
+            return super(TaskListView, self).paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, self.get_ordering())
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404(gettext_lazy("Invalid cursor"))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class TaskExportView(TaskListView):
+    """Task list export view.
+
+    Streams all tasks of the list filtered by `q` and ordered by `order_by`
+    GET parameters as in `TaskListView`, without pagination.
+
+    Attributes:
+        format_kwarg (str): GET parameter with export format, see `TaskListExport.formats`
+        chunk_size (int): number of rows fetched from server-side cursor at once
+    """
+
+    format_kwarg = "format"
+    chunk_size = 2000
+
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """Stream exported tasks.
+
+        Raises:
+            Http404: if export format is not supported
+        """
+        export_format = request.GET.get(self.format_kwarg) or "csv"
+        if export_format not in TaskListExport.formats:
+            raise Http404(gettext_lazy("Unsupported export format"))
+        export = TaskListExport(self.get_queryset(), export_format, chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(export, content_type=export.content_type)
+        response["Content-Disposition"] = content_disposition_header(True, export.filename)
+        response["Cache-Control"] = "private, no-store"
+        return response
 
 
 class TaskDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
@@ -267,6 +370,7 @@ class TaskDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
         model: model link to Task
 
     Methods:
+        get_queryset: returns task queryset with related objects loaded in bounded number of queries
         get_context_data: returns data for detail view rendering
     """
 
@@ -276,6 +380,25 @@ class TaskDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
     template_name = "task_detail.html"
     model = Task
 
+    def get_queryset(self) -> QuerySet:
+        """Get task queryset loading all objects rendered on the page.
+
+        Project, author and assignee are joined, comments and documents
+        are prefetched (if user has permission to see them) with one query each,
+        so number of queries doesn't depend on number of comments and documents.
+
+        Returns:
+            (QuerySet): tasks queryset
+        """
+        queryset = super(TaskDetailView, self).get_queryset().select_related("project", "author", "assignee")
+        if self.request.user.has_perm("projects.view_comment"):
+            queryset = queryset.prefetch_related(
+                Prefetch("comment_set", queryset=Comment.objects.order_by("created", "pk"))
+            )
+        if self.request.user.has_perm("documents.view_document"):
+            queryset = queryset.prefetch_related("documents")
+        return queryset
+
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         """Get from db all data for rendering detail view.
 
@@ -288,10 +411,13 @@ class TaskDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
             (dict) context data for rendering template
         """
         context = super().get_context_data(**kwargs)
-        task = self.get_object()
-        comments = Comment.objects.filter(task=task).order_by("created")
+        task = self.object
+        rendered = [task]
         if self.request.user.has_perm("projects.view_comment"):
-            context["comments"] = comments
+            context["comments"] = task.comment_set.all()
+            rendered.extend(context["comments"])
+        # only stale pre-rendered html is rendered at request time
+        markdown_cache.warm(obj.description for obj in rendered if not obj.description_html_is_fresh)
         if self.request.user.has_perm("projects.add_comment"):
             context["comment_form"] = CommentModelForm
         return context
@@ -330,6 +456,135 @@ class TaskCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
         return reverse_lazy("projects-task-detail", kwargs={"pk": self.object.id})
 
 
+class TaskImportCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+    """Task bulk import upload view.
+
+    Uploaded CSV or NDJSON file is imported by worker after transaction commit,
+    see `projects.imports`.
+
+    Attributes:
+        login_url (str): path to redirect not logged-in users.
+        template_name (str): template filename to render upload form
+        permission_required (str): permission requirements code
+        permission_denied_message (str): message for user without permissions
+        model: model to create, link to `TaskImport`
+        form_class: link to class form
+    """
+
+    login_url = reverse_lazy("accounts:login")
+    permission_required = ["projects.add_task"]
+    permission_denied_message = gettext_lazy("You have no permission to add Tasks")
+    template_name = "task_import_form.html"
+    model = TaskImport
+    form_class = TaskImportModelForm
+
+    def form_valid(self, form: TaskImportModelForm) -> HttpResponse:
+        """Save import and schedule it to worker."""
+        form.instance.user = self.request.user
+        response = super(TaskImportCreateView, self).form_valid(form)
+        using = router.db_for_write(TaskImport, instance=self.object)
+        transaction.on_commit(partial(import_tasks.delay, str(self.object.pk)), using=using)
+        return response
+
+    def get_success_url(self) -> str:
+        """Redirect to import progress page."""
+        return reverse("projects-task-import-detail", kwargs={"pk": self.object.pk})
+
+
+class TaskJobDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+    """Bulk task operation progress view, users see only their own jobs.
+
+    Page is refreshed until the job is finished.
+
+    Attributes:
+        login_url (str): path to redirect not logged-in users.
+        refresh_interval (int): page refresh interval (seconds) until job is finished
+    """
+
+    login_url = reverse_lazy("accounts:login")
+    refresh_interval = 2
+
+    def get_queryset(self) -> QuerySet:
+        """Get jobs of current user."""
+        return self.model.objects.filter(user=self.request.user)
+
+
+class TaskImportDetailView(TaskJobDetailView):
+    """Task bulk import progress view.
+
+    Attributes:
+        template_name (str): template filename to render
+        permission_required (str): permission requirements code
+        permission_denied_message (str): message for user without permissions
+    """
+
+    permission_required = ["projects.add_task"]
+    permission_denied_message = gettext_lazy("You have no permission to add Tasks")
+    template_name = "task_import_detail.html"
+    model = TaskImport
+
+
+class TaskBulkUpdateView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    """Bulk status and assignee update of tasks selected on task list.
+
+    Up to `TASKS_BULK_UPDATE_SYNC_MAX_SIZE` tasks are updated with one `UPDATE`
+    statement right away, larger updates are processed by worker.
+
+    Attributes:
+        login_url (str): path to redirect not logged-in users.
+        permission_required (str): permission requirements code
+        permission_denied_message (str): message for user without permissions
+        http_method_names (list): only POST requests are accepted
+        form_class: link to class form
+    """
+
+    login_url = reverse_lazy("accounts:login")
+    permission_required = ["projects.change_task"]
+    permission_denied_message = gettext_lazy("You have no permission to change Tasks")
+    http_method_names = ["post"]
+    form_class = TaskBulkUpdateForm
+
+    def form_valid(self, form: TaskBulkUpdateForm) -> HttpResponse:
+        """Update tasks or schedule update to worker."""
+        bulk_update = form.get_bulk_update()
+        bulk_update.user = self.request.user
+        tasks = bulk_update.get_queryset()
+        bulk_update.total = len(bulk_update.task_ids) if bulk_update.task_ids is not None else tasks.count()
+        if bulk_update.total <= settings.TASKS_BULK_UPDATE_SYNC_MAX_SIZE:
+            tasks.update(**bulk_update.changes)
+            return HttpResponseRedirect(self.get_success_url(form))
+        bulk_update.save()
+        using = router.db_for_write(TaskBulkUpdate, instance=bulk_update)
+        transaction.on_commit(partial(update_tasks.delay, str(bulk_update.pk)), using=using)
+        return HttpResponseRedirect(reverse("projects-task-bulk-update-detail", kwargs={"pk": bulk_update.pk}))
+
+    def form_invalid(self, form: TaskBulkUpdateForm) -> HttpResponse:
+        """Bad request, form is rendered on task list page."""
+        return HttpResponseBadRequest(" ".join(message for errors in form.errors.values() for message in errors))
+
+    def get_success_url(self, form: TaskBulkUpdateForm) -> str:
+        """Return to task list page the update was sent from."""
+        url = form.cleaned_data["next"]
+        if url and url_has_allowed_host_and_scheme(url, {self.request.get_host()}, self.request.is_secure()):
+            return url
+        return reverse("projects-task-list")
+
+
+class TaskBulkUpdateDetailView(TaskJobDetailView):
+    """Task bulk update progress view.
+
+    Attributes:
+        template_name (str): template filename to render
+        permission_required (str): permission requirements code
+        permission_denied_message (str): message for user without permissions
+    """
+
+    permission_required = ["projects.change_task"]
+    permission_denied_message = gettext_lazy("You have no permission to change Tasks")
+    template_name = "task_bulk_update_detail.html"
+    model = TaskBulkUpdate
+
+
 class TaskUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     """Task update view.
 
@@ -461,3 +716,19 @@ class ProjectDocumentUpload(LoginRequiredMixin, DocumentUpload):
         """
         project_id = self.kwargs.get("pk")
         return reverse("project-detail", args=(project_id,))
+
+
+class TaskChunkedDocumentUpload(LoginRequiredMixin, ChunkedDocumentUpload):
+    """Chunked upload of document to `Task` view class."""
+
+    login_url = reverse_lazy("accounts:login")
+    model = Task
+    model_field = "documents"
+
+
+class ProjectChunkedDocumentUpload(LoginRequiredMixin, ChunkedDocumentUpload):
+    """Chunked upload of document to `Project` view class."""
+
+    login_url = reverse_lazy("accounts:login")
+    model = Project
+    model_field = "documents"
@@ -0,0 +1,15 @@
+"""
+Pooled PostgreSQL database backend package.
+
+Usage:
+    DATABASES = {
+        "default": {
+            "ENGINE": "taskcamp.dbpool",
+            "CONN_MAX_AGE": 0,
+            "POOL": {"max_size": 4, "timeout": 10, "max_lifetime": 1800, "check_idle": 30},
+            ...
+        }
+    }
+
+See `taskcamp.dbpool.base` and `taskcamp.dbpool.pool`.
+"""
@@ -0,0 +1,55 @@
+"""
+Pooled PostgreSQL database backend module.
+
+Built-in PostgreSQL backend taking connections from process wide pool
+(see `taskcamp.dbpool.pool.ConnectionPool`), built-in pooling of Django
+requires psycopg 3.
+
+Attributes:
+    DatabaseWrapper: pooled PostgreSQL database wrapper
+"""
+
+from functools import partial
+from typing import Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+
+from .pool import ConnectionPool, PooledConnection, close_pool, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Pooled PostgreSQL database wrapper.
+
+    Pool options are taken from `POOL` dict of database settings, see `ConnectionPool`.
+    Connection is returned to the pool when Django closes it, so `CONN_MAX_AGE` must be 0.
+    """
+
+    @property
+    def pool(self) -> Optional[ConnectionPool]:
+        """Get process wide pool of database alias, connections without database alias aren't pooled."""
+        if self.alias == NO_DB_ALIAS:
+            return None
+        return get_pool(self.alias, self.create_pool)
+
+    def create_pool(self) -> ConnectionPool:
+        """Create pool of connections with parameters of database settings.
+
+        Returns:
+            (ConnectionPool): pool
+
+        Raises:
+            ImproperlyConfigured: if connections are persistent
+        """
+        if self.settings_dict.get("CONN_MAX_AGE", 0) != 0:
+            raise ImproperlyConfigured("Pooling doesn't support persistent connections.")
+        return ConnectionPool(
+            connect=partial(self.Database.connect, connection_factory=PooledConnection, **self.get_connection_params()),
+            configure=self._configure_connection,
+            **self.settings_dict.get("POOL", {}),
+        )
+
+    def close_pool(self) -> None:
+        """Close process wide pool of database alias."""
+        close_pool(self.alias)
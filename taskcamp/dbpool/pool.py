@@ -0,0 +1,266 @@
+"""
+Database connection pool module.
+
+Process keeps a bounded pool of PostgreSQL connections per database alias,
+shared across threads: connection is taken from the pool when Django opens
+database connection and returned when Django closes it (at the end of every
+request with `CONN_MAX_AGE` = 0), so number of open connections depends on
+pool size instead of number of threads.
+
+Attributes:
+    PooledConnection: psycopg2 connection keeping its pool and timestamps
+    PoolTimeout: exception raised when no connection is released in time
+    ConnectionPool: bounded thread safe connection pool
+
+Methods:
+    get_pool: get or create process wide pool of database alias
+    close_pool: close process wide pool of database alias
+    pool_stats: get stats of process wide pools
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Any, Callable, Deque, Dict, Optional
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR, TRANSACTION_STATUS_INTRANS
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Psycopg2 connection keeping its pool and timestamps.
+
+    Attributes:
+        _pool (ConnectionPool): pool the connection belongs to
+        _pool_pid (int): id of process the connection was opened by
+        _pool_created (float): `time.monotonic()` of connection opening
+        _pool_returned (float): `time.monotonic()` of last return to pool
+    """
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No pooled connection is released in time."""
+
+
+class ConnectionPool:
+    """Bounded thread safe connection pool.
+
+    Idle connections are reused last returned first, so rarely used connections
+    age and are closed. Connection idle longer than `check_idle` is checked with
+    `SELECT 1` before it is handed out, connection older than `max_lifetime` is closed
+    instead of reuse. Transaction left open is rolled back when connection is returned.
+
+    Connections inherited by forked process are abandoned, not closed: closing them
+    would terminate sessions of parent process. Forked process opens its own.
+
+    Attributes:
+        connect (callable): opens new connection
+        configure (callable): configures new connection, returns True if it must be committed
+        max_size (int): max number of open connections
+        timeout (float): max time (seconds) to wait for released connection
+        max_lifetime (float): max connection age in seconds
+        check_idle (float): idle time (seconds) after which connection is checked before use
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        configure: Optional[Callable[[Any], bool]] = None,
+        max_size: int = 4,
+        timeout: float = 10,
+        max_lifetime: float = 1800,
+        check_idle: float = 30,
+    ) -> None:
+        """Init empty pool, connections are opened on demand."""
+        self.connect = connect
+        self.configure = configure
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+        self._condition = threading.Condition()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._idle: Deque[Any] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self.counters = dict.fromkeys(("requests", "waits", "timeouts", "opened", "closed", "failed_checks"), 0)
+
+    def open(self) -> None:
+        """Do nothing, connections are opened on demand."""
+
+    def getconn(self) -> Any:
+        """Take idle connection or open new one if pool isn't full.
+
+        Returns:
+            (PooledConnection): connection
+
+        Raises:
+            PoolTimeout: if no connection is released in `timeout` seconds
+            psycopg2.Error: if new connection can't be opened
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            if self._pid != os.getpid():
+                self._reset()
+            self.counters["requests"] += 1
+        while True:
+            connection = self._acquire(deadline)
+            if connection is None:
+                return self._open()
+            if self._check(connection):
+                return connection
+            self._discard(connection, failed_check=True)
+
+    def _acquire(self, deadline: float) -> Any:
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    raise PoolTimeout(f"no connection released in {self.timeout} seconds")
+                self.counters["waits"] += 1
+                self._condition.wait(remaining)
+            self._in_use += 1
+            if self._idle:
+                return self._idle.pop()
+            # reserve a slot, connection is opened outside of the lock
+            self._size += 1
+            return None
+
+    def _open(self) -> Any:
+        try:
+            connection = self.connect()
+            connection.autocommit = True
+            if self.configure is not None:
+                self.configure(connection)
+        except BaseException:
+            self._release_slot()
+            raise
+        connection._pool = self
+        connection._pool_pid = os.getpid()
+        connection._pool_created = connection._pool_returned = time.monotonic()
+        with self._condition:
+            self.counters["opened"] += 1
+        return connection
+
+    def _check(self, connection: Any) -> bool:
+        now = time.monotonic()
+        if connection.closed or now - connection._pool_created > self.max_lifetime:
+            return False
+        if now - connection._pool_returned <= self.check_idle:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _release_slot(self) -> None:
+        with self._condition:
+            self._size -= 1
+            self._in_use -= 1
+            self._condition.notify()
+
+    def _discard(self, connection: Any, failed_check: bool = False) -> None:
+        with suppress(psycopg2.Error):
+            connection.close()
+        with self._condition:
+            self.counters["closed"] += 1
+            self.counters["failed_checks"] += failed_check
+        self._release_slot()
+
+    def putconn(self, connection: Any) -> None:
+        """Return connection to pool, broken, expired or not resettable connection is closed.
+
+        Args:
+            connection: connection taken from the pool
+        """
+        if connection._pool_pid != os.getpid():
+            return
+        status = None if connection.closed else connection.info.transaction_status
+        if status in (TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR):
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                status = None
+            else:
+                status = TRANSACTION_STATUS_IDLE
+        expired = time.monotonic() - connection._pool_created > self.max_lifetime
+        if status != TRANSACTION_STATUS_IDLE or expired or self._closed:
+            self._discard(connection)
+            return
+        connection._pool_returned = time.monotonic()
+        with self._condition:
+            self._in_use -= 1
+            self._idle.append(connection)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Close idle connections, connections in use are closed when returned."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+        for connection in idle:
+            with suppress(psycopg2.Error):
+                connection.close()
+        with self._condition:
+            self._size -= len(idle)
+            self.counters["closed"] += len(idle)
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool size and counters."""
+        with self._condition:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                **self.counters,
+            }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """Get or create process wide pool of database alias.
+
+    Args:
+        alias: database alias
+        factory: creates pool if there is no pool of alias yet
+
+    Returns:
+        (ConnectionPool): pool
+    """
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = factory()
+        return _pools[alias]
+
+
+def close_pool(alias: str) -> None:
+    """Close process wide pool of database alias, next connection creates new pool.
+
+    Args:
+        alias: database alias
+    """
+    with _pools_lock:
+        pool = _pools.pop(alias, None)
+    if pool is not None:
+        pool.close()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Get stats of process wide pools by database alias."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
@@ -1,35 +1,429 @@
 """
 Database simple router module.
 
+Reads are balanced across replica connections (`DATABASE_REPLICAS`) and writes are routed to `master` connection.
+Replica lags behind master, so reads of a request are pinned to `master`:
+
+    - after the request wrote to database
+    - for `DATABASE_REPLICA_PIN_SECONDS` after previous request of the same
+      client wrote to database, see `taskcamp.middleware.ReplicaPinningMiddleware`
+
+Reads of related objects follow the connection the instance was loaded from.
+
+Replication lag is sampled by background thread of every process
+(see `ReplicaMonitor`), replicas lagging behind by more than `DATABASE_REPLICA_MAX_LAG`
+seconds (or view threshold set with `replica_max_lag`) or unreachable are ejected
+from balancing, reads fall back to `master` when no replica is usable.
+All reads of a request go to the same replica. Dedicated read databases of routing
+policies are sampled and ejected the same way, but aren't balanced.
+
 Attributes:
+    REPLICA_LAG_QUERY: PostgreSQL replication lag query
+    RoutingState: database routing state of current request
+    ReplicaState: sampled state of replica
+    ReplicaMonitor: replication lag monitor and read balancer of replicas
+    replica_monitor: process wide replica monitor instance
     SimpleDBRouter: class for simple router.
+
+Methods:
+    get_routing_state: get routing state of current request
+    set_routing_state: set routing state of current request
+    pin_to_master: route reads of current request to master
+    replica_max_lag: set replication lag threshold of view
+    get_policy: get routing policy of model or app
 """
 
-from typing import Optional
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import suppress
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, connections
+
+# idle master writes no WAL, so replica replaying all received WAL isn't lagging
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+View = TypeVar("View", bound=Callable[..., Any])
+
+
+class RoutingState:
+    """Database routing state of current request.
+
+    Attributes:
+        pinned (bool): route reads to master
+        wrote (bool): request wrote to database
+        max_lag (float): max replication lag (seconds) of replica reads, None for `DATABASE_REPLICA_MAX_LAG`
+        replica (str): replica alias chosen for reads of request, so they don't hop between replicas
+        policy (dict): routing policy of view, see `SimpleDBRouter`
+    """
+
+    def __init__(self, pinned: bool = False, max_lag: Optional[float] = None) -> None:
+        """Init request state."""
+        self.pinned = pinned
+        self.wrote = False
+        self.max_lag = max_lag
+        self.replica: Optional[str] = None
+        self.policy: Dict[str, Any] = {}
+
+
+_routing_state: ContextVar[Optional[RoutingState]] = ContextVar("routing_state", default=None)
+
+
+def get_routing_state() -> Optional[RoutingState]:
+    """Get routing state of current request, None outside of requests."""
+    return _routing_state.get()
+
+
+def set_routing_state(state: Optional[RoutingState]) -> None:
+    """Set routing state of current request, None when request is finished."""
+    _routing_state.set(state)
+
+
+def pin_to_master() -> None:
+    """Route reads of current request and following requests of the client to master.
+
+    Called on writes routed by the router, should be called explicitly
+    on writes bypassing it (raw SQL with `connections["master"]`).
+    """
+    state = _routing_state.get()
+    if state is not None:
+        state.pinned = state.wrote = True
+
+
+def replica_max_lag(seconds: float) -> Callable[[View], View]:
+    """Set max replication lag of replica reads of view, function or class based.
+
+    Usage:
+        @replica_max_lag(600)
+        def report(request):
+            ...
+
+    Args:
+        seconds: max replication lag in seconds
+
+    Returns:
+        (callable): view decorator
+    """
+
+    def decorator(view: View) -> View:
+        view.replica_max_lag = seconds
+        return view
+
+    return decorator
+
+
+class ReplicaState:
+    """Sampled state of replica.
+
+    Attributes:
+        lag (float): replication lag in seconds, None if unknown
+        available (bool): replica is reachable
+        sampled (float): `time.monotonic()` of last sample
+    """
+
+    def __init__(self) -> None:
+        """Init state, replica is considered available until first sample."""
+        self.lag: Optional[float] = None
+        self.available = True
+        self.sampled = time.monotonic()
+
+
+class ReplicaMonitor:
+    """Replication lag monitor and read balancer of replicas.
+
+    Lag of every replica is sampled every `DATABASE_REPLICA_LAG_INTERVAL` seconds
+    by daemon thread started on first read in every process (forked processes
+    start their own), so routing reads costs no queries. Replica is ejected
+    from balancing while it lags behind by more than max lag, its sampling
+    failed or last sample is older than three intervals (sampling query hangs).
+
+    Reads are balanced across usable replicas with smooth weighted round robin.
+
+    Attributes:
+        replicas (dict): replica database aliases and their weights, None for `DATABASE_REPLICAS`
+        states (dict): sampled states of replicas by alias
+        decisions (Counter): number of reads by replica alias or reason to read from master
+    """
+
+    def __init__(self, replicas: Optional[Dict[str, int]] = None) -> None:
+        """Init monitor."""
+        self._replicas = replicas
+        self.states: Dict[str, ReplicaState] = {}
+        self.decisions: Counter = Counter()
+        self._current: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def replicas(self) -> Dict[str, int]:
+        """Get replica database aliases and their weights."""
+        return settings.DATABASE_REPLICAS if self._replicas is None else self._replicas
+
+    @property
+    def interval(self) -> float:
+        """Get sampling interval in seconds, 0 disables monitor."""
+        return settings.DATABASE_REPLICA_LAG_INTERVAL
+
+    @property
+    def read_aliases(self) -> List[str]:
+        """Get dedicated read database aliases of routing policies, databases models are written to excluded."""
+        policies = [*settings.DATABASE_ROUTING_POLICIES.values(), *settings.DATABASE_VIEW_ROUTING_POLICIES.values()]
+        excluded = {"master", "replica", *self.replicas, *(policy["write"] for policy in policies if "write" in policy)}
+        return sorted({policy["read"] for policy in policies if "read" in policy} - excluded)
+
+    @property
+    def monitored(self) -> List[str]:
+        """Get aliases of sampled replicas and read databases, aliases without configured database aren't sampled."""
+        if self.interval <= 0:
+            return []
+        return [alias for alias in [*self.replicas, *self.read_aliases] if alias in settings.DATABASES]
+
+    def state(self, alias: str) -> ReplicaState:
+        """Get sampled state of replica."""
+        with self._lock:
+            return self.states.setdefault(alias, ReplicaState())
+
+    def start(self) -> None:
+        """Start sampling thread unless it is running in current process or there is nothing to sample."""
+        if self._pid == os.getpid() or not self.monitored:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for state in self.states.values():
+                state.sampled = time.monotonic()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self.run, name="replica-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling thread."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = self._pid = None
+
+    def run(self) -> None:
+        """Sample lag of replicas until monitor is stopped."""
+        try:
+            while True:
+                for alias in self.monitored:
+                    self.sample(alias)
+                if self._stopped.wait(self.interval):
+                    return
+        finally:
+            for alias in self.monitored:
+                connections[alias].close()
+
+    def sample(self, alias: str) -> None:
+        """Query replication lag of replica, connection is reopened on next sample after failure.
+
+        Args:
+            alias: replica database alias
+        """
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    cursor.execute(REPLICA_LAG_QUERY)
+                    lag = float(cursor.fetchone()[0])
+                else:
+                    cursor.execute("SELECT 1")
+                    lag = 0.0
+        except DatabaseError:
+            with suppress(DatabaseError):
+                connection.close()
+            lag = None
+        else:
+            if getattr(connection, "pool", None) is not None:
+                # pooled connection isn't held between samples
+                connection.close()
+        state = self.state(alias)
+        with self._lock:
+            state.lag = lag
+            state.available = lag is not None
+            state.sampled = time.monotonic()
+
+    def check(self, alias: str, max_lag: float) -> str:
+        """Check if replica is usable for reads.
+
+        Args:
+            alias: replica database alias
+            max_lag: max replication lag in seconds
+
+        Returns:
+            (str): `replica` if replica is usable, otherwise reason to eject it:
+                `unavailable` or `lagging`
+        """
+        if alias not in self.monitored:
+            return "replica"
+        state = self.state(alias)
+        if not state.available or time.monotonic() - state.sampled > 3 * self.interval:
+            return "unavailable"
+        if state.lag is not None and state.lag > max_lag:
+            return "lagging"
+        return "replica"
+
+    def choose(self, max_lag: float, preferred: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """Choose replica for reads.
+
+        Args:
+            max_lag: max replication lag in seconds
+            preferred: replica chosen for previous reads of request, kept while it is usable
+
+        Returns:
+            (tuple): replica alias and `replica` decision, or None and reason to read from master:
+                `lagging` if any replica lags behind, otherwise `unavailable`
+        """
+        self.start()
+        if preferred is not None and self.check(preferred, max_lag) == "replica":
+            return preferred, "replica"
+        usable: Dict[str, int] = {}
+        decision = "unavailable"
+        for alias, weight in self.replicas.items():
+            reason = self.check(alias, max_lag)
+            if reason == "replica":
+                usable[alias] = weight
+            elif reason == "lagging":
+                decision = reason
+        if not usable:
+            return None, decision
+        with self._lock:
+            for alias, weight in usable.items():
+                self._current[alias] = self._current.get(alias, 0) + weight
+            alias = max(usable, key=self._current.__getitem__)
+            self._current[alias] -= sum(usable.values())
+        return alias, "replica"
+
+    def count(self, decision: str) -> None:
+        """Count read by replica alias or reason to read from master."""
+        with self._lock:
+            self.decisions[decision] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get replica states and read routing decision counters, read databases aren't balanced (weight 0)."""
+        monitored = self.monitored
+        weights = {**self.replicas, **dict.fromkeys(self.read_aliases, 0)}
+        with self._lock:
+            return {
+                "replicas": {
+                    alias: {
+                        "weight": weight,
+                        "monitored": alias in monitored,
+                        "available": self.states[alias].available if alias in self.states else True,
+                        "lag": self.states[alias].lag if alias in self.states else None,
+                    }
+                    for alias, weight in weights.items()
+                },
+                "decisions": dict(self.decisions),
+            }
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def get_policy(app_label: str, model_name: Optional[str] = None) -> Dict[str, Any]:
+    """Get routing policy of model or app from `DATABASE_ROUTING_POLICIES`.
+
+    Args:
+        app_label: name of application
+        model_name: lowercase model name, None for policy of application
+
+    Returns:
+        (dict): policy: `read` and `write` aliases, empty if there is no policy
+    """
+    policies = settings.DATABASE_ROUTING_POLICIES
+    if model_name is not None and f"{app_label}.{model_name}" in policies:
+        return policies[f"{app_label}.{model_name}"]
+    return policies.get(app_label, {})
 
 
 class SimpleDBRouter:
     """Simple database router.
 
     Used for split queries between master and read only replica databases.
+
+    Routing is customized with declarative policies:
+
+        - `DATABASE_ROUTING_POLICIES` by app label or `app_label.model_name`
+          (model policy overrides app policy): `write` alias (`master` by default) and `read` alias
+          (`replica` for balanced replicas, by default for models written to `master`, otherwise `write` alias)
+        - `DATABASE_VIEW_ROUTING_POLICIES` by url name: `read` alias for models without
+          policy and `max_lag` of replicas, see `taskcamp.middleware.ReplicaPinningMiddleware`
+
+    Pinned reads go to database the model is written to, as well as reads
+    of dedicated read database which is unusable (see `ReplicaMonitor.check`).
+
+    Only models without foreign keys to or from models of other databases
+    can be written to dedicated database: relations across databases are rejected.
     """
 
+    @staticmethod
+    def get_model_policy(model: Optional[ContentType]) -> Dict[str, Any]:
+        """Get routing policy of model, empty for queries without model."""
+        if model is None:
+            return {}
+        return get_policy(model._meta.app_label, model._meta.model_name)
+
     def db_for_read(self, model: ContentType, **hints) -> Optional[str]:
-        """Forward read queries to replica connection.
+        """Forward read queries to replica connection unless request is pinned to master or replica is unusable.
 
         Args:
             model: model object link (content type)
-            **hints:
+            **hints: `instance` - related objects are read from the database instance was loaded from
 
         Returns:
             (str): name of database connection to be used for read queries
         """
-        return "replica"
+        policy = self.get_model_policy(model)
+        write = policy.get("write", "master")
+        instance = hints.get("instance")
+        state = _routing_state.get()
+        read = policy.get("read")
+        if read is None and state is not None and not policy:
+            read = state.policy.get("read")
+        if read is None:
+            read = "replica" if write == "master" else write
+        if instance is not None and instance._state.db == write:
+            decision = "instance"
+        elif read == write:
+            replica_monitor.count(read)
+            return read
+        elif state is not None and state.pinned:
+            decision = "pinned"
+        else:
+            max_lag = state.max_lag if state is not None else None
+            max_lag = settings.DATABASE_REPLICA_MAX_LAG if max_lag is None else max_lag
+            if read == "replica":
+                preferred = state.replica if state is not None else None
+                alias, decision = replica_monitor.choose(max_lag, preferred=preferred)
+                if alias is not None and state is not None:
+                    state.replica = alias
+            else:
+                replica_monitor.start()
+                decision = replica_monitor.check(read, max_lag)
+                alias = read if decision == "replica" else None
+            if alias is not None:
+                replica_monitor.count(alias)
+                return alias
+        replica_monitor.count(decision)
+        return write
 
     def db_for_write(self, model: ContentType, **hints) -> str:
-        """Forward write queries to master connection.
+        """Forward write queries to master connection (or `write` alias of model policy) and pin reads to it.
 
         Args:
             model: model object link (content type)
@@ -38,11 +432,14 @@ class SimpleDBRouter:
         Returns:
             (str) name of database connection to be used for write queries
         """
-        return "master"
+        pin_to_master()
+        return self.get_model_policy(model).get("write", "master")
 
     def allow_relation(self, obj1: ContentType, obj2: ContentType, **hints) -> Optional[bool]:
         """Return the possibility to proceed create relation between models.
 
+        Relation is allowed only between models written to the same database.
+
         Args:
             obj1: Instance of first model
             obj2: Instance of second model
@@ -52,7 +449,8 @@ class SimpleDBRouter:
             (bool): True - if it's possible to create relation between models
                     False - otherwise
         """
-        return True
+        write1 = self.get_model_policy(obj1).get("write", "master")
+        return write1 == self.get_model_policy(obj2).get("write", "master")
 
     def allow_migrate(self, db: str, app_label: str, model_name: str = None, **hints) -> Optional[bool]:
         """Check if migration for model cold be applied to database db.
@@ -66,5 +464,14 @@ class SimpleDBRouter:
         Returns:
             (bool): True - if migration for model cold be applied to database db.
                     False - otherwise
+
+        Notes:
+            Models written to dedicated database (policy `write` alias other than `master`)
+            are migrated only there, and only they are migrated to dedicated databases.
         """
+        dedicated = {policy["write"] for policy in settings.DATABASE_ROUTING_POLICIES.values() if "write" in policy}
+        dedicated.discard("master")
+        write = get_policy(app_label, model_name).get("write", "master")
+        if db in dedicated or write in dedicated:
+            return db == write
         return True
@@ -0,0 +1,93 @@
+"""
+Project middleware module.
+
+Attributes:
+    ReplicaPinningMiddleware: read-your-writes pinning of database reads to master
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.http import FileResponse, HttpRequest, HttpResponse
+
+from taskcamp.dbrouter import RoutingState, get_routing_state, set_routing_state
+
+
+class ReplicaPinningMiddleware:
+    """Pin database reads of a client to master for a while after it wrote to database.
+
+    Request which wrote to database (see `taskcamp.dbrouter.SimpleDBRouter`) sets signed cookie
+    valid for `DATABASE_REPLICA_PIN_SECONDS`, reads of following requests with the cookie
+    are routed to master, so client reads its own writes even if replica lags behind.
+    Cookie is used instead of session, so pinning costs no database queries.
+
+    Max replication lag of replica reads is taken from view, see `taskcamp.dbrouter.replica_max_lag`,
+    routing policy of view from `DATABASE_VIEW_ROUTING_POLICIES`, see `taskcamp.dbrouter.SimpleDBRouter`.
+
+    Attributes:
+        cookie_name (str): pinning cookie name
+        cookie_salt (str): pinning cookie signature salt
+    """
+
+    cookie_name = "db_pinned"
+    cookie_salt = "taskcamp.middleware.ReplicaPinningMiddleware"
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        """Init middleware."""
+        self.get_response = get_response
+
+    def is_pinned(self, request: HttpRequest) -> bool:
+        """Check if request has valid pinning cookie."""
+        value = request.get_signed_cookie(
+            self.cookie_name, default=None, salt=self.cookie_salt, max_age=settings.DATABASE_REPLICA_PIN_SECONDS
+        )
+        return value is not None
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Route reads of request with its routing state and pin client after writes."""
+        state = RoutingState(pinned=self.is_pinned(request))
+        set_routing_state(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            set_routing_state(None)
+        if state.wrote:
+            response.set_signed_cookie(
+                self.cookie_name,
+                "1",
+                salt=self.cookie_salt,
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        if response.streaming and not response.is_async and not isinstance(response, FileResponse):
+            # streamed content is generated after the middleware returns, its reads follow routing of request
+            response.streaming_content = self.stream(response.streaming_content, state)
+        return response
+
+    def process_view(
+        self, request: HttpRequest, view_func: Callable, view_args: List[Any], view_kwargs: Dict[str, Any]
+    ) -> Optional[HttpResponse]:
+        """Set routing policy of view and max replication lag of request reads.
+
+        Max lag is taken from view attribute (class based views included), otherwise from view policy.
+        """
+        # state is set by `__call__` before view is resolved
+        state = get_routing_state()
+        state.policy = settings.DATABASE_VIEW_ROUTING_POLICIES.get(request.resolver_match.view_name, {})
+        max_lag = getattr(view_func, "replica_max_lag", None)
+        if max_lag is None:
+            max_lag = getattr(getattr(view_func, "view_class", None), "replica_max_lag", None)
+        state.max_lag = state.policy.get("max_lag") if max_lag is None else max_lag
+        return None
+
+    @staticmethod
+    def stream(content: Iterable[bytes], state: RoutingState) -> Iterator[bytes]:
+        """Iterate over streamed content with routing state of its request."""
+        previous = get_routing_state()
+        set_routing_state(state)
+        try:
+            yield from content
+        finally:
+            set_routing_state(previous)
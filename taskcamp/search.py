@@ -0,0 +1,172 @@
+"""
+Full text search index module.
+
+Search index of table text columns is maintained by database triggers:
+
+    PostgreSQL: `search_vector` tsvector column of the table is updated by a trigger
+        and indexed with GIN, columns are weighted (`A` to `D`) for ranking
+    SQLite: external content FTS5 table `<table>_fts` is updated by triggers
+
+Other database vendors have no index, search falls back to `icontains` lookups.
+
+Attributes:
+    SEARCH_CONFIG: PostgreSQL text search configuration
+    SearchIndex: search index of table text columns
+"""
+
+from typing import Dict, List, Optional
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+SEARCH_CONFIG = "simple"
+
+
+class SearchIndex:
+    """Search index of table text columns.
+
+    Usage:
+        index = SearchIndex("projects_task", {"title": "A", "description": "B"})
+        index.install(connection, rebuild=True)
+
+    Attributes:
+        table (str): indexed table
+        columns (dict): indexed columns and their PostgreSQL weights, None for not weighted column
+        key (str): primary key column, rowid of FTS5 table
+        config (str): PostgreSQL text search configuration
+    """
+
+    def __init__(
+        self, table: str, columns: Dict[str, Optional[str]], key: str = "id", config: str = SEARCH_CONFIG
+    ) -> None:
+        """Init index."""
+        self.table = table
+        self.columns = columns
+        self.key = key
+        self.config = config
+
+    def search_vector(self, prefix: str = "") -> str:
+        """Build PostgreSQL tsvector expression of columns.
+
+        Args:
+            prefix: row reference prefix of columns, e.g. `NEW.` in trigger function
+        """
+        vectors = []
+        for column, weight in self.columns.items():
+            vector = f"to_tsvector('{self.config}', coalesce({prefix}{column}, ''))"
+            vectors.append(f"setweight({vector}, '{weight}')" if weight else vector)
+        return " || ".join(vectors)
+
+    def install_statements(self, vendor: str, rebuild: bool = False) -> List[str]:
+        """Get statements creating (idempotently) search triggers and indexes.
+
+        Args:
+            vendor: database vendor
+            rebuild: recalculate index for existing rows
+        """
+        table, columns = self.table, ", ".join(self.columns)
+        if vendor == "postgresql":
+            statements = [
+                f"""
+                CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := {self.search_vector("NEW.")};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+                """,
+                f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}",
+                f"""
+                CREATE TRIGGER {table}_search_vector_trigger
+                    BEFORE INSERT OR UPDATE OF {columns} ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+                """,
+                f"CREATE INDEX IF NOT EXISTS {table}_search_vector_gin ON {table} USING gin (search_vector)",
+            ]
+            return statements + ([f"UPDATE {table} SET search_vector = {self.search_vector()}"] if rebuild else [])
+        if vendor == "sqlite":
+            new = ", ".join(f"new.{column}" for column in self.columns)
+            old = ", ".join(f"old.{column}" for column in self.columns)
+            statements = [
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                    {columns}, content='{table}', content_rowid='{self.key}',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+                """,
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.{self.key}, {new});
+                END
+                """,
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {table}_fts({table}_fts, rowid, {columns}) VALUES ('delete', old.{self.key}, {old});
+                END
+                """,
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                    INSERT INTO {table}_fts({table}_fts, rowid, {columns}) VALUES ('delete', old.{self.key}, {old});
+                    INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.{self.key}, {new});
+                END
+                """,
+            ]
+            return statements + ([f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"] if rebuild else [])
+        return []
+
+    def uninstall_statements(self, vendor: str) -> List[str]:
+        """Get statements dropping search triggers and indexes.
+
+        Args:
+            vendor: database vendor
+        """
+        table = self.table
+        if vendor == "postgresql":
+            return [
+                f"DROP INDEX IF EXISTS {table}_search_vector_gin",
+                f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}",
+                f"DROP FUNCTION IF EXISTS {table}_search_vector_update()",
+            ]
+        if vendor == "sqlite":
+            return [
+                f"DROP TRIGGER IF EXISTS {table}_fts_insert",
+                f"DROP TRIGGER IF EXISTS {table}_fts_delete",
+                f"DROP TRIGGER IF EXISTS {table}_fts_update",
+                f"DROP TABLE IF EXISTS {table}_fts",
+            ]
+        return []
+
+    def install(self, connection: BaseDatabaseWrapper, rebuild: bool = False) -> None:
+        """Create (idempotently) search triggers and indexes for database connection.
+
+        Args:
+            connection: database connection
+            rebuild: recalculate index for existing rows
+        """
+        with connection.cursor() as cursor:
+            for statement in self.install_statements(connection.vendor, rebuild):
+                cursor.execute(statement)
+
+    def uninstall(self, connection: BaseDatabaseWrapper) -> None:
+        """Drop search triggers and indexes for database connection.
+
+        Args:
+            connection: database connection
+        """
+        with connection.cursor() as cursor:
+            for statement in self.uninstall_statements(connection.vendor):
+                cursor.execute(statement)
+
+    def ensure(self, connection: BaseDatabaseWrapper) -> None:
+        """Recreate search triggers after migrations if table has `search_vector` column.
+
+        SQLite drops triggers when schema editor remakes the table.
+
+        Args:
+            connection: database connection
+        """
+        if self.table not in connection.introspection.table_names():
+            return
+        with connection.cursor() as cursor:
+            columns = {column.name for column in connection.introspection.get_table_description(cursor, self.table)}
+        if "search_vector" in columns:
+            self.install(connection)
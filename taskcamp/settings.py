@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "taskcamp.middleware.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -85,6 +86,21 @@ WSGI_APPLICATION = "taskcamp.wsgi.application"  # noqa
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+# replica database aliases and their read weights, see `taskcamp.dbrouter.SimpleDBRouter`
+DATABASE_REPLICAS = {"replica": 1}
+
+# routing policies by app label or `app_label.model_name`: `read` and `write` database aliases,
+# `write` moves models to dedicated database: only models without foreign keys to or from
+# models of other databases can be moved, relations across databases are rejected by router
+DATABASE_ROUTING_POLICIES = {
+    "sessions": {"read": "master"},
+    "auth.permission": {"read": "master"},
+    "admin.logentry": {"read": "master"},
+}
+
+# routing policies by url name: `read` database alias and `max_lag` of replicas
+DATABASE_VIEW_ROUTING_POLICIES = {}
+
 if env.get("POSTGRES_HOST"):
     DATABASES = {
         "default": {
@@ -109,16 +125,22 @@ elif env.get("POSTGRES_MASTER_HOST") and env.get("POSTGRES_REPLICA_HOST"):
             "PORT": env.get("POSTGRES_PORT"),
             "CONN_MAX_AGE": None,
         },
-        "replica": {
-            "ENGINE": "django.db.backends.postgresql",
-            "NAME": env.get("POSTGRES_DB"),
-            "USER": env.get("POSTGRES_USER"),
-            "PASSWORD": env.get("POSTGRES_PASSWORD"),
-            "HOST": env.get("POSTGRES_REPLICA_HOST"),
-            "PORT": env.get("POSTGRES_PORT"),
-            "CONN_MAX_AGE": None,
-        },
     }
+    # comma separated replica hosts and optional read weights of them: `replica1,replica2` and `2,1`
+    replica_hosts = [host.strip() for host in env.get("POSTGRES_REPLICA_HOST").split(",") if host.strip()]
+    replica_weights = [weight.strip() for weight in env.get("POSTGRES_REPLICA_WEIGHTS", "").split(",")]
+    DATABASE_REPLICAS = {}
+    for number, host in enumerate(replica_hosts, 1):
+        alias = "replica" if number == 1 else f"replica_{number}"
+        DATABASES[alias] = {**DATABASES["master"], "HOST": host}
+        weight = replica_weights[number - 1] if number <= len(replica_weights) else ""
+        DATABASE_REPLICAS[alias] = int(weight or 1)
+    # reports (home dashboard and exports) are read from dedicated analytics replica
+    if env.get("POSTGRES_ANALYTICS_HOST"):
+        DATABASES["analytics"] = {**DATABASES["master"], "HOST": env.get("POSTGRES_ANALYTICS_HOST")}
+        DATABASE_VIEW_ROUTING_POLICIES = {
+            view_name: {"read": "analytics"} for view_name in ("home", "project-export", "projects-task-export")
+        }
     DATABASE_ROUTERS = ["taskcamp.dbrouter.SimpleDBRouter"]
 else:
     DATABASES = {
@@ -128,8 +150,35 @@ else:
         }
     }
 
+# pooled connections: every process keeps at most this number of connections per PostgreSQL database,
+# shared by its threads, connections are returned to the pool at the end of request (see `taskcamp.dbpool`)
+if env.get("DATABASE_POOL_MAX_SIZE"):
+    for database in DATABASES.values():
+        if database.get("ENGINE") == "django.db.backends.postgresql":
+            database.update(
+                ENGINE="taskcamp.dbpool",
+                CONN_MAX_AGE=0,
+                POOL={
+                    "max_size": int(env.get("DATABASE_POOL_MAX_SIZE")),
+                    "timeout": float(env.get("DATABASE_POOL_TIMEOUT", 10)),
+                    "max_lifetime": float(env.get("DATABASE_POOL_MAX_LIFETIME", 1800)),
+                    "check_idle": float(env.get("DATABASE_POOL_CHECK_IDLE", 30)),
+                },
+            )
+
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
+# reads of a client are routed to master for this time (seconds) after it wrote to database
+DATABASE_REPLICA_PIN_SECONDS = int(env.get("DATABASE_REPLICA_PIN_SECONDS", 5))
+
+# replication lag of replica is sampled by every process with this interval (seconds), 0 disables sampling
+DATABASE_REPLICA_LAG_INTERVAL = float(env.get("DATABASE_REPLICA_LAG_INTERVAL", 5))
+
+# reads are routed to master while replica lags behind by more (seconds), views can override it
+DATABASE_REPLICA_MAX_LAG = float(env.get("DATABASE_REPLICA_MAX_LAG", 30))
+
+# Shared cache is required by counters shared by web and worker processes
+# (pending document file deletions), default local memory cache is per process
 if env.get("MEMCACHED_LOCATION"):
     CACHES = {
         "default": {
@@ -139,6 +188,16 @@ if env.get("MEMCACHED_LOCATION"):
     }
     SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 
+# Rendered Markdown cache: max total size of html kept in process (characters)
+# and timeout of html stored in shared cache (seconds)
+MARKDOWN_CACHE_MAX_SIZE = int(env.get("MARKDOWN_CACHE_MAX_SIZE", 8 * 1024 * 1024))
+MARKDOWN_CACHE_TIMEOUT = int(env.get("MARKDOWN_CACHE_TIMEOUT", 86400))
+# Markdown descriptions longer than this (characters) are rendered to html by worker
+MARKDOWN_RENDER_SYNC_MAX_SIZE = int(env.get("MARKDOWN_RENDER_SYNC_MAX_SIZE", 10000))
+
+# bulk updates of more tasks than this are processed by worker with progress reporting
+TASKS_BULK_UPDATE_SYNC_MAX_SIZE = int(env.get("TASKS_BULK_UPDATE_SYNC_MAX_SIZE", 500))
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -171,6 +230,33 @@ MEDIA_URL = "/media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+# store uploaded documents by content hash, identical uploads share one file
+DOCUMENTS_CONTENT_ADDRESSED = env.get("DOCUMENTS_CONTENT_ADDRESSED", False) == "True"
+# number of files deleted from storage by one worker job
+DOCUMENTS_DELETE_BATCH_SIZE = int(env.get("DOCUMENTS_DELETE_BATCH_SIZE", 100))
+# documents not attached to any project or task for this time (seconds) are deleted by garbage collector
+DOCUMENTS_ORPHAN_GRACE_PERIOD = int(env.get("DOCUMENTS_ORPHAN_GRACE_PERIOD", 86400))
+# document downloads transfer: "x-sendfile" (uWSGI), "x-accel-redirect" (nginx) or empty (django)
+DOCUMENTS_DOWNLOAD_OFFLOAD = env.get("DOCUMENTS_DOWNLOAD_OFFLOAD", "")
+# nginx internal location aliased to MEDIA_ROOT
+DOCUMENTS_X_ACCEL_REDIRECT_PREFIX = env.get("DOCUMENTS_X_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+# temporary files of chunked uploads, should be on the same file system as MEDIA_ROOT
+DOCUMENTS_CHUNKED_UPLOAD_DIR = env.get("DOCUMENTS_CHUNKED_UPLOAD_DIR", str(MEDIA_ROOT / "chunked"))
+# max size of one chunk (bytes) and time (seconds) unfinished chunked uploads are kept
+DOCUMENTS_CHUNK_MAX_SIZE = int(env.get("DOCUMENTS_CHUNK_MAX_SIZE", 16 * 1024 * 1024))
+DOCUMENTS_CHUNKED_UPLOAD_EXPIRE = int(env.get("DOCUMENTS_CHUNKED_UPLOAD_EXPIRE", 86400))
+# total size of documents one user can upload (bytes), 0 - unlimited
+DOCUMENTS_USER_QUOTA = int(env.get("DOCUMENTS_USER_QUOTA", 0))
+# render thumbnails and previews of uploaded images (Pillow) and PDF documents (pdftoppm) by worker,
+# image previews are scheduled only if Pillow is installed (optional `pillow` package)
+DOCUMENTS_PREVIEWS = env.get("DOCUMENTS_PREVIEWS", "True") == "True"
+# max time (seconds) of one PDF page rendering
+DOCUMENTS_PREVIEW_TIMEOUT = int(env.get("DOCUMENTS_PREVIEW_TIMEOUT", 30))
+# extract text of uploaded documents by worker, so task search matches attachments
+DOCUMENTS_TEXT_EXTRACTION = env.get("DOCUMENTS_TEXT_EXTRACTION", "True") == "True"
+# max number of characters of extracted text stored per document
+DOCUMENTS_TEXT_MAX_SIZE = int(env.get("DOCUMENTS_TEXT_MAX_SIZE", 100000))
+
 
 LANGUAGES = [
     ("en", _("English")),
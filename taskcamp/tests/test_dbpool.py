@@ -0,0 +1,224 @@
+import os
+import threading
+from unittest import mock
+
+import psycopg2
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.test import SimpleTestCase
+from psycopg2.extensions import TRANSACTION_STATUS_ACTIVE, TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from taskcamp.dbpool.base import DatabaseWrapper
+from taskcamp.dbpool.pool import ConnectionPool, PooledConnection, PoolTimeout, close_pool, get_pool, pool_stats
+
+
+def connect():
+    connection = mock.MagicMock(closed=0)
+    connection.info.transaction_status = TRANSACTION_STATUS_IDLE
+    return connection
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.configure = mock.Mock(return_value=False)
+        self.pool = ConnectionPool(connect, configure=self.configure, max_size=2, timeout=5)
+
+    def test_reuse(self):
+        first = self.pool.getconn()
+        second = self.pool.getconn()
+        self.assertIsNot(first, second)
+        self.assertIs(first._pool, self.pool)
+        self.assertTrue(first.autocommit)
+        self.configure.assert_has_calls([mock.call(first), mock.call(second)])
+        self.pool.putconn(first)
+        self.pool.putconn(second)
+        self.assertIs(self.pool.getconn(), second)
+        self.assertEqual(
+            self.pool.stats(),
+            {
+                "max_size": 2,
+                "size": 2,
+                "idle": 1,
+                "in_use": 1,
+                "requests": 3,
+                "waits": 0,
+                "timeouts": 0,
+                "opened": 2,
+                "closed": 0,
+                "failed_checks": 0,
+            },
+        )
+
+    def test_not_configured(self):
+        pool = ConnectionPool(connect)
+        self.assertIs(pool.getconn()._pool, pool)
+
+    def test_timeout(self):
+        self.pool.timeout = 0.01
+        self.pool.getconn()
+        self.pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            self.pool.getconn()
+        stats = self.pool.stats()
+        self.assertEqual((stats["size"], stats["timeouts"]), (2, 1))
+        self.assertGreaterEqual(stats["waits"], 1)
+
+    def test_wait_for_released_connection(self):
+        connection = self.pool.getconn()
+        self.pool.getconn()
+        taken = []
+        thread = threading.Thread(target=lambda: taken.append(self.pool.getconn()))
+        thread.start()
+        thread.join(0.05)
+        self.pool.putconn(connection)
+        thread.join()
+        self.assertEqual(taken, [connection])
+
+    def test_health_check(self):
+        connection = self.pool.getconn()
+        self.pool.putconn(connection)
+        connection._pool_returned -= 60
+        self.assertIs(self.pool.getconn(), connection)
+        connection.cursor.return_value.__enter__.return_value.execute.assert_called_once_with("SELECT 1")
+
+        self.pool.putconn(connection)
+        connection._pool_returned -= 60
+        connection.cursor.side_effect = psycopg2.OperationalError
+        connection.close.side_effect = psycopg2.InterfaceError
+        self.assertIsNot(self.pool.getconn(), connection)
+        connection.close.assert_called_once_with()
+        stats = self.pool.stats()
+        self.assertEqual((stats["size"], stats["failed_checks"], stats["closed"]), (1, 1, 1))
+
+    def test_max_lifetime(self):
+        connection = self.pool.getconn()
+        self.pool.putconn(connection)
+        connection._pool_created -= 3600
+        self.assertIsNot(self.pool.getconn(), connection)
+        connection.close.assert_called_once_with()
+
+        connection = self.pool.getconn()
+        connection._pool_created -= 3600
+        self.pool.putconn(connection)
+        connection.close.assert_called_once_with()
+        self.assertEqual(self.pool.stats()["idle"], 0)
+
+    def test_closed_connection(self):
+        connection = self.pool.getconn()
+        self.pool.putconn(connection)
+        connection.closed = 2
+        self.assertIsNot(self.pool.getconn(), connection)
+        connection = self.pool.getconn()
+        connection.closed = 1
+        self.pool.putconn(connection)
+        stats = self.pool.stats()
+        self.assertEqual((stats["size"], stats["idle"], stats["closed"]), (1, 0, 2))
+
+    def test_transaction_rolled_back(self):
+        connection = self.pool.getconn()
+        connection.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        self.pool.putconn(connection)
+        connection.rollback.assert_called_once_with()
+        self.assertEqual(self.pool.stats()["idle"], 1)
+
+        connection = self.pool.getconn()
+        connection.rollback.side_effect = psycopg2.OperationalError
+        self.pool.putconn(connection)
+        connection.close.assert_called_once_with()
+
+        connection = self.pool.getconn()
+        connection.info.transaction_status = TRANSACTION_STATUS_ACTIVE
+        self.pool.putconn(connection)
+        connection.close.assert_called_once_with()
+        self.assertEqual(self.pool.stats()["size"], 0)
+
+    def test_connect_failed(self):
+        self.pool.connect = mock.Mock(side_effect=psycopg2.OperationalError)
+        with self.assertRaises(psycopg2.OperationalError):
+            self.pool.getconn()
+        stats = self.pool.stats()
+        self.assertEqual((stats["size"], stats["in_use"], stats["opened"]), (0, 0, 0))
+
+    def test_close(self):
+        idle = self.pool.getconn()
+        used = self.pool.getconn()
+        self.pool.putconn(idle)
+        idle.close.side_effect = psycopg2.InterfaceError
+        self.pool.close()
+        idle.close.assert_called_once_with()
+        self.pool.putconn(used)
+        used.close.assert_called_once_with()
+        stats = self.pool.stats()
+        self.assertEqual((stats["size"], stats["idle"], stats["closed"]), (0, 0, 2))
+
+    def test_fork(self):
+        connection = self.pool.getconn()
+        self.pool.putconn(self.pool.getconn())
+        with mock.patch("os.getpid", return_value=os.getpid() + 1):
+            self.assertIsNot(self.pool.getconn(), connection)
+            self.pool.putconn(connection)
+            stats = self.pool.stats()
+        connection.close.assert_not_called()
+        self.assertEqual((stats["size"], stats["idle"], stats["in_use"]), (1, 0, 1))
+
+
+class PoolRegistryTestCase(SimpleTestCase):
+    def test_registry(self):
+        pool = mock.Mock(spec=ConnectionPool)
+        pool.stats.return_value = {"size": 1}
+        factory = mock.Mock(return_value=pool)
+        self.addCleanup(close_pool, "pooled")
+        self.assertIs(get_pool("pooled", factory), pool)
+        self.assertIs(get_pool("pooled", factory), pool)
+        factory.assert_called_once_with()
+        self.assertEqual(pool_stats()["pooled"], {"size": 1})
+        close_pool("pooled")
+        close_pool("pooled")
+        pool.close.assert_called_once_with()
+        self.assertNotIn("pooled", pool_stats())
+
+
+class DatabaseWrapperTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.settings_dict = {
+            "ENGINE": "taskcamp.dbpool",
+            "NAME": "taskcamp",
+            "USER": "taskcamp",
+            "PASSWORD": "secret",
+            "HOST": "localhost",
+            "PORT": "",
+            "OPTIONS": {},
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": False,
+            "AUTOCOMMIT": True,
+            "ATOMIC_REQUESTS": False,
+            "TIME_ZONE": None,
+            "POOL": {"max_size": 1},
+        }
+        self.addCleanup(close_pool, "pooled")
+
+    def test_pooled_connection(self):
+        wrapper = DatabaseWrapper(self.settings_dict, alias="pooled")
+        with mock.patch("psycopg2.connect", side_effect=lambda **kwargs: connect()) as connect_mock:
+            pool = wrapper.pool
+            with mock.patch("psycopg2.extras.register_default_jsonb"):
+                connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        self.assertIs(pool, DatabaseWrapper(self.settings_dict, alias="pooled").pool)
+        self.assertEqual(pool.max_size, 1)
+        self.assertIs(connection._pool, pool)
+        kwargs = connect_mock.call_args.kwargs
+        self.assertEqual((kwargs["connection_factory"], kwargs["host"]), (PooledConnection, "localhost"))
+        wrapper.connection = connection
+        wrapper._close()
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(pool_stats()["pooled"]["idle"], 1)
+        wrapper.close_pool()
+        self.assertNotIn("pooled", pool_stats())
+
+    def test_not_pooled(self):
+        self.assertIsNone(DatabaseWrapper(self.settings_dict, alias=NO_DB_ALIAS).pool)
+
+    def test_persistent_connections(self):
+        self.settings_dict["CONN_MAX_AGE"] = None
+        with self.assertRaises(ImproperlyConfigured):
+            DatabaseWrapper(self.settings_dict, alias="pooled").pool
@@ -1,6 +1,23 @@
-from django.test import TestCase
+import os
+import time
+from unittest import mock
 
-from taskcamp.dbrouter import SimpleDBRouter
+from django.contrib.sessions.models import Session
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from taskcamp.dbrouter import (
+    ReplicaMonitor,
+    RoutingState,
+    SimpleDBRouter,
+    get_routing_state,
+    pin_to_master,
+    replica_max_lag,
+    replica_monitor,
+    set_routing_state,
+)
+from employees.models import Employee
+from projects.models import Comment, Task
 
 
 class SimpleDBRouterTestCase(TestCase):
@@ -20,3 +37,271 @@ class SimpleDBRouterTestCase(TestCase):
         self.assertTrue(
             self.db_router.allow_migrate(db="master", app_label=None, model_name=None)
         )
+
+    def test_db_read_pinned_to_master(self):
+        set_routing_state(RoutingState())
+        self.addCleanup(set_routing_state, None)
+        self.assertEqual(self.db_router.db_for_read(model=None), "replica")
+        self.assertEqual(self.db_router.db_for_write(model=None), "master")
+        self.assertEqual(self.db_router.db_for_read(model=None), "master")
+        self.assertTrue(get_routing_state().wrote)
+
+    def test_db_read_pinned_by_previous_write(self):
+        set_routing_state(RoutingState(pinned=True))
+        self.addCleanup(set_routing_state, None)
+        self.assertEqual(self.db_router.db_for_read(model=None), "master")
+        self.assertFalse(get_routing_state().wrote)
+
+    def test_db_read_instance_hint(self):
+        instance = mock.Mock()
+        instance._state.db = "master"
+        self.assertEqual(self.db_router.db_for_read(model=None, instance=instance), "master")
+        instance._state.db = "replica"
+        self.assertEqual(self.db_router.db_for_read(model=None, instance=instance), "replica")
+
+    def test_pin_to_master_outside_request(self):
+        pin_to_master()
+        self.assertIsNone(get_routing_state())
+        self.assertEqual(self.db_router.db_for_write(model=None), "master")
+        self.assertEqual(self.db_router.db_for_read(model=None), "replica")
+
+    def test_db_read_replica_unusable(self):
+        set_routing_state(RoutingState(max_lag=600))
+        self.addCleanup(set_routing_state, None)
+        with mock.patch.object(replica_monitor, "choose", return_value=(None, "lagging")) as choose:
+            self.assertEqual(self.db_router.db_for_read(model=None), "master")
+        choose.assert_called_once_with(600, preferred=None)
+        self.assertIsNone(get_routing_state().replica)
+
+    def test_db_read_replica_kept_for_request(self):
+        set_routing_state(RoutingState())
+        self.addCleanup(set_routing_state, None)
+        with self.settings(DATABASE_REPLICA_MAX_LAG=10):
+            with mock.patch.object(replica_monitor, "choose", return_value=("replica_2", "replica")) as choose:
+                self.assertEqual(self.db_router.db_for_read(model=None), "replica_2")
+                self.assertEqual(get_routing_state().replica, "replica_2")
+                self.db_router.db_for_read(model=None)
+        choose.assert_called_with(10, preferred="replica_2")
+
+    def test_db_read_decisions_counted(self):
+        replica_monitor.decisions.clear()
+        self.addCleanup(replica_monitor.decisions.clear)
+        instance = mock.Mock()
+        instance._state.db = "master"
+        self.db_router.db_for_read(model=None)
+        self.db_router.db_for_read(model=None, instance=instance)
+        self.assertEqual(replica_monitor.stats()["decisions"], {"replica": 1, "instance": 1})
+
+    @override_settings(
+        DATABASE_ROUTING_POLICIES={
+            "sessions": {"read": "master"},
+            "projects": {"read": "replica"},
+            "projects.comment": {"write": "comments"},
+        }
+    )
+    def test_db_policies(self):
+        self.assertEqual(self.db_router.db_for_read(Session), "master")
+        self.assertEqual(self.db_router.db_for_write(Session), "master")
+        self.assertEqual(self.db_router.db_for_read(Comment), "comments")
+        self.assertEqual(self.db_router.db_for_write(Comment), "comments")
+        self.assertEqual(self.db_router.db_for_read(Task), "replica")
+
+        comment = Comment()
+        comment._state.db = "comments"
+        self.assertEqual(self.db_router.db_for_read(Task, instance=comment), "replica")
+
+        set_routing_state(RoutingState(pinned=True))
+        self.addCleanup(set_routing_state, None)
+        self.assertEqual(self.db_router.db_for_read(Comment), "comments")
+        self.assertEqual(self.db_router.db_for_read(Task), "master")
+        self.assertEqual(self.db_router.db_for_read(Session), "master")
+
+    @override_settings(DATABASE_ROUTING_POLICIES={"sessions": {"read": "master"}, "projects": {"read": "replica"}})
+    def test_db_view_policy(self):
+        state = RoutingState()
+        state.policy = {"read": "analytics"}
+        set_routing_state(state)
+        self.addCleanup(set_routing_state, None)
+        self.assertEqual(self.db_router.db_for_read(Employee), "analytics")
+        self.assertEqual(self.db_router.db_for_read(None), "analytics")
+        self.assertEqual(self.db_router.db_for_read(Session), "master")
+        self.assertEqual(self.db_router.db_for_read(Task), "replica")
+
+    def test_db_view_policy_pinned(self):
+        state = RoutingState(pinned=True)
+        state.policy = {"read": "analytics"}
+        set_routing_state(state)
+        self.addCleanup(set_routing_state, None)
+        self.assertEqual(self.db_router.db_for_read(Employee), "master")
+
+    def test_db_view_policy_read_database_unusable(self):
+        state = RoutingState(max_lag=60)
+        state.policy = {"read": "analytics"}
+        set_routing_state(state)
+        self.addCleanup(set_routing_state, None)
+        replica_monitor.decisions.clear()
+        self.addCleanup(replica_monitor.decisions.clear)
+        with mock.patch.object(replica_monitor, "start"):
+            with mock.patch.object(replica_monitor, "check", return_value="lagging") as check:
+                self.assertEqual(self.db_router.db_for_read(Employee), "master")
+        check.assert_called_once_with("analytics", 60)
+        self.assertIsNone(state.replica)
+        self.assertEqual(replica_monitor.stats()["decisions"], {"lagging": 1})
+
+    @override_settings(DATABASE_ROUTING_POLICIES={"projects.comment": {"write": "comments"}})
+    def test_db_allow_relation_dedicated_database(self):
+        self.assertFalse(self.db_router.allow_relation(Comment(), Task()))
+        self.assertTrue(self.db_router.allow_relation(Comment(), Comment()))
+        self.assertTrue(self.db_router.allow_relation(Task(), Employee()))
+
+    @override_settings(DATABASE_ROUTING_POLICIES={"projects.comment": {"write": "comments"}, "sessions": {"read": "master"}})
+    def test_allow_migrate_dedicated_database(self):
+        self.assertTrue(self.db_router.allow_migrate("comments", "projects", "comment"))
+        self.assertFalse(self.db_router.allow_migrate("master", "projects", "comment"))
+        self.assertFalse(self.db_router.allow_migrate("comments", "projects", "task"))
+        self.assertFalse(self.db_router.allow_migrate("comments", "projects"))
+        self.assertTrue(self.db_router.allow_migrate("master", "projects", "task"))
+        self.assertTrue(self.db_router.allow_migrate("master", "sessions", "session"))
+
+    def test_replica_max_lag(self):
+        view = replica_max_lag(60)(lambda request: None)
+        self.assertEqual(view.replica_max_lag, 60)
+
+
+@override_settings(DATABASE_REPLICA_LAG_INTERVAL=5, DATABASE_REPLICAS={"default": 1, "replica": 2})
+class ReplicaMonitorTestCase(TestCase):
+    def setUp(self) -> None:
+        self.monitor = ReplicaMonitor()
+
+    def test_monitored(self):
+        self.assertEqual(self.monitor.replicas, {"default": 1, "replica": 2})
+        self.assertEqual(self.monitor.monitored, ["default"])
+        self.assertEqual(self.monitor.check("replica", 10), "replica")
+        with self.settings(DATABASE_REPLICA_LAG_INTERVAL=0):
+            self.assertEqual(self.monitor.monitored, [])
+            self.monitor.start()
+        self.assertIsNone(self.monitor._thread)
+
+    @override_settings(
+        DATABASE_ROUTING_POLICIES={"sessions": {"read": "master"}, "projects": {"write": "projects", "read": "default"}},
+        DATABASE_VIEW_ROUTING_POLICIES={"home": {"read": "analytics"}, "report": {"read": "replica", "max_lag": 60}},
+    )
+    def test_read_aliases(self):
+        self.assertEqual(self.monitor.read_aliases, ["analytics"])
+        self.assertEqual(self.monitor.monitored, ["default"])
+        self.assertEqual(self.monitor.stats()["replicas"]["analytics"]["weight"], 0)
+        with self.settings(DATABASE_REPLICAS={}):
+            self.assertEqual(self.monitor.read_aliases, ["analytics", "default"])
+            self.assertEqual(self.monitor.monitored, ["default"])
+
+    def test_check(self):
+        state = self.monitor.state("default")
+        self.assertEqual(self.monitor.check("default", 10), "replica")
+        state.lag = 11
+        self.assertEqual(self.monitor.check("default", 10), "lagging")
+        self.assertEqual(self.monitor.check("default", 20), "replica")
+        state.sampled = time.monotonic() - 16
+        self.assertEqual(self.monitor.check("default", 20), "unavailable")
+        state.sampled = time.monotonic()
+        state.available = False
+        self.assertEqual(self.monitor.check("default", 20), "unavailable")
+
+    def test_choose_weighted(self):
+        monitor = ReplicaMonitor({"a": 2, "b": 1, "c": 1})
+        with mock.patch.object(monitor, "start") as start:
+            chosen = [monitor.choose(10)[0] for _ in range(8)]
+        self.assertEqual(chosen, ["a", "b", "c", "a", "a", "b", "c", "a"])
+        self.assertEqual(start.call_count, 8)
+
+    def test_choose_preferred(self):
+        with mock.patch.object(self.monitor, "start"):
+            self.assertEqual(self.monitor.choose(10, preferred="default"), ("default", "replica"))
+            self.monitor.state("default").available = False
+            self.assertEqual(self.monitor.choose(10, preferred="default"), ("replica", "replica"))
+            self.assertEqual(self.monitor.choose(10), ("replica", "replica"))
+
+    def test_choose_ejected(self):
+        monitor = ReplicaMonitor({"default": 1})
+        with mock.patch.object(monitor, "start"):
+            monitor.state("default").lag = 60
+            self.assertEqual(monitor.choose(10), (None, "lagging"))
+            monitor.state("default").available = False
+            self.assertEqual(monitor.choose(10), (None, "unavailable"))
+
+    def test_sample(self):
+        self.monitor.state("default").available = False
+        self.monitor.sample("default")
+        state = self.monitor.state("default")
+        self.assertEqual((state.lag, state.available), (0.0, True))
+
+    def test_sample_postgresql(self):
+        connection = mock.MagicMock(vendor="postgresql")
+        connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (12.5,)
+        with mock.patch("taskcamp.dbrouter.connections", {"default": connection}):
+            self.monitor.sample("default")
+        state = self.monitor.state("default")
+        self.assertEqual((state.lag, state.available), (12.5, True))
+        connection.close.assert_called_once_with()
+
+    def test_sample_unavailable(self):
+        connection = mock.MagicMock(vendor="postgresql")
+        connection.cursor.side_effect = OperationalError
+        connection.close.side_effect = OperationalError
+        with mock.patch("taskcamp.dbrouter.connections", {"default": connection}):
+            self.monitor.sample("default")
+        connection.close.assert_called_once_with()
+        state = self.monitor.state("default")
+        self.assertEqual((state.lag, state.available), (None, False))
+        self.assertEqual(self.monitor.check("default", 60), "unavailable")
+
+    def test_run(self):
+        with mock.patch.object(self.monitor, "sample") as sample:
+            with mock.patch.object(self.monitor._stopped, "wait", side_effect=[False, True]) as wait:
+                self.monitor.run()
+        self.assertEqual(sample.call_args_list, [mock.call("default"), mock.call("default")])
+        wait.assert_called_with(5)
+
+    def test_thread(self):
+        connection = mock.MagicMock()
+        self.monitor.state("default").sampled = 0
+        with mock.patch.object(self.monitor, "sample") as sample:
+            with mock.patch("taskcamp.dbrouter.connections", {"default": connection}):
+                self.monitor.start()
+                thread = self.monitor._thread
+                self.monitor.start()
+                self.assertIs(self.monitor._thread, thread)
+                self.monitor.stop()
+        self.assertFalse(thread.is_alive())
+        self.assertGreater(self.monitor.state("default").sampled, 0)
+        sample.assert_called_once_with("default")
+        connection.close.assert_called_once_with()
+        self.monitor.stop()
+
+    def test_start_concurrently(self):
+        self.monitor._pid = 1
+        with mock.patch("os.getpid", side_effect=[2, 1]):
+            self.monitor.start()
+        self.assertIsNone(self.monitor._thread)
+
+    def test_thread_restarted_after_fork(self):
+        with mock.patch.object(self.monitor, "run"):
+            self.monitor.start()
+            with mock.patch("os.getpid", return_value=os.getpid() + 1):
+                self.monitor.start()
+            self.assertEqual(self.monitor._pid, os.getpid() + 1)
+        self.monitor.stop()
+
+    def test_stats(self):
+        self.monitor.state("default").lag = 1.5
+        self.monitor.count("default")
+        self.monitor.count("default")
+        self.assertEqual(
+            self.monitor.stats(),
+            {
+                "replicas": {
+                    "default": {"weight": 1, "monitored": True, "available": True, "lag": 1.5},
+                    "replica": {"weight": 2, "monitored": False, "available": True, "lag": None},
+                },
+                "decisions": {"default": 2},
+            },
+        )
@@ -0,0 +1,113 @@
+import tempfile
+import time
+from unittest import mock
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from django.urls import resolve
+from django.views import View
+
+from taskcamp.dbrouter import RoutingState, SimpleDBRouter, get_routing_state, replica_max_lag, set_routing_state
+from taskcamp.middleware import ReplicaPinningMiddleware
+
+
+class ReplicaPinningMiddlewareTestCase(TestCase):
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+        self.router = SimpleDBRouter()
+        self.reads = []
+
+    def view(self, write: bool = False, response_class=HttpResponse):
+        def get_response(request):
+            self.reads.append(self.router.db_for_read(model=None))
+            if write:
+                self.router.db_for_write(model=None)
+                self.reads.append(self.router.db_for_read(model=None))
+            if response_class is StreamingHttpResponse:
+                return StreamingHttpResponse(self.router.db_for_read(model=None).encode() for _ in range(1))
+            return response_class()
+
+        return ReplicaPinningMiddleware(get_response)
+
+    def pinned_request(self, **kwargs):
+        request = self.factory.get("/")
+        request.COOKIES[ReplicaPinningMiddleware.cookie_name] = self.cookie(**kwargs)
+        return request
+
+    def cookie(self, age: int = 0) -> str:
+        response = HttpResponse()
+        with mock.patch("time.time", return_value=time.time() - age):
+            response.set_signed_cookie(
+                ReplicaPinningMiddleware.cookie_name, "1", salt=ReplicaPinningMiddleware.cookie_salt
+            )
+        return response.cookies[ReplicaPinningMiddleware.cookie_name].value
+
+    def test_write_pins_reads(self):
+        response = self.view(write=True)(self.factory.post("/"))
+        self.assertEqual(self.reads, ["replica", "master"])
+        cookie = response.cookies[ReplicaPinningMiddleware.cookie_name]
+        self.assertEqual((cookie["max-age"], cookie["httponly"], cookie["samesite"]), (5, True, "Lax"))
+        self.assertIsNone(get_routing_state())
+
+    def test_read_only_request(self):
+        response = self.view()(self.factory.get("/"))
+        self.assertEqual(self.reads, ["replica"])
+        self.assertNotIn(ReplicaPinningMiddleware.cookie_name, response.cookies)
+
+    @override_settings(DATABASE_REPLICA_PIN_SECONDS=10)
+    def test_pinned_by_cookie(self):
+        self.view()(self.pinned_request(age=5))
+        self.view()(self.pinned_request(age=20))
+        request = self.factory.get("/")
+        request.COOKIES[ReplicaPinningMiddleware.cookie_name] = "forged"
+        self.view()(request)
+        self.assertEqual(self.reads, ["master", "replica", "replica"])
+
+    def test_pinned_streaming_response(self):
+        response = self.view(response_class=StreamingHttpResponse)(self.pinned_request())
+        self.assertIsNone(get_routing_state())
+        self.assertEqual(b"".join(response.streaming_content), b"master")
+        self.assertIsNone(get_routing_state())
+
+        response = self.view(response_class=StreamingHttpResponse)(self.factory.get("/"))
+        self.assertEqual(b"".join(response.streaming_content), b"replica")
+
+    def test_pinned_file_response(self):
+        with tempfile.TemporaryFile() as file:
+            response = self.view(response_class=lambda: FileResponse(file))(self.pinned_request())
+            self.assertIs(response.file_to_stream, file)
+
+    def test_process_view_max_lag(self):
+        view = replica_max_lag(60)(lambda request: None)
+
+        @replica_max_lag(600)
+        class ClassView(View):
+            pass
+
+        middleware = self.view()
+        request = self.factory.get("/")
+        request.resolver_match = resolve("/")
+        state = RoutingState()
+        set_routing_state(state)
+        self.addCleanup(set_routing_state, None)
+        self.assertIsNone(middleware.process_view(request, view, [], {}))
+        self.assertEqual((state.max_lag, state.policy), (60, {}))
+        middleware.process_view(request, ClassView.as_view(), [], {})
+        self.assertEqual(state.max_lag, 600)
+        middleware.process_view(request, View.as_view(), [], {})
+        self.assertIsNone(state.max_lag)
+
+    @override_settings(DATABASE_VIEW_ROUTING_POLICIES={"home": {"read": "analytics", "max_lag": 300}})
+    def test_process_view_policy(self):
+        view = replica_max_lag(60)(lambda request: None)
+        middleware = self.view()
+        request = self.factory.get("/")
+        request.resolver_match = resolve("/")
+        state = RoutingState()
+        set_routing_state(state)
+        self.addCleanup(set_routing_state, None)
+        middleware.process_view(request, View.as_view(), [], {})
+        self.assertEqual((state.max_lag, state.policy), (300, {"read": "analytics", "max_lag": 300}))
+        middleware.process_view(request, view, [], {})
+        self.assertEqual(state.max_lag, 60)
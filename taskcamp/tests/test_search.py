@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from taskcamp.search import SearchIndex
+
+
+class SearchIndexTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.index = SearchIndex("notes_note", {"title": "A", "text": None}, key="note_id")
+
+    def test_search_vector(self):
+        self.assertEqual(
+            self.index.search_vector("NEW."),
+            "setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') || "
+            "to_tsvector('simple', coalesce(NEW.text, ''))",
+        )
+
+    def test_postgresql_statements(self):
+        statements = self.index.install_statements("postgresql")
+        self.assertEqual(len(statements), 4)
+        self.assertIn("BEFORE INSERT OR UPDATE OF title, text ON notes_note", statements[2])
+        self.assertIn("notes_note_search_vector_gin", statements[3])
+        rebuild = self.index.install_statements("postgresql", rebuild=True)
+        self.assertEqual(rebuild[:4], statements)
+        self.assertTrue(rebuild[4].startswith("UPDATE notes_note SET search_vector = setweight("))
+        self.assertEqual(len(self.index.uninstall_statements("postgresql")), 3)
+
+    def test_sqlite_statements(self):
+        statements = self.index.install_statements("sqlite", rebuild=True)
+        self.assertIn("content_rowid='note_id'", statements[0])
+        self.assertIn("VALUES (new.note_id, new.title, new.text)", statements[1])
+        self.assertEqual(statements[-1], "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')")
+        self.assertEqual(self.index.uninstall_statements("sqlite")[-1], "DROP TABLE IF EXISTS notes_note_fts")
+
+    def test_other_vendor(self):
+        connection = mock.MagicMock(vendor="mysql")
+        self.index.install(connection, rebuild=True)
+        self.index.uninstall(connection)
+        connection.cursor.return_value.__enter__.return_value.execute.assert_not_called()
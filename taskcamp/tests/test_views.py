@@ -3,7 +3,7 @@ from unittest import mock
 from django.db import OperationalError
 from django.test import TestCase
 
-from taskcamp.views import http_403, http_404, http_500, status_page
+from taskcamp.views import db_status_page, http_403, http_404, http_500, status_page
 
 
 class HandlingViewsTestCase(TestCase):
@@ -41,3 +41,13 @@ class HandlingViewsTestCase(TestCase):
             ):
                 response = status_page(request=None)
                 self.assertEqual(response.status_code, 500)
+
+    def test_db_status_page(self):
+        response = db_status_page(request=None)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'"decisions"', response.content)
+        self.assertIn(b'"pools"', response.content)
+        self.assertIn(b'"markdown_cache": {"hits": ', response.content)
+        with mock.patch("taskcamp.views.pending_file_deletions", return_value=3):
+            self.assertEqual(db_status_page(request=None).content.count(b'"pending_file_deletions": 3'), 1)
+        self.assertEqual(self.client.get("/status-page/db/").status_code, 200)
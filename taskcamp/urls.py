@@ -18,15 +18,17 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from .views import status_page
+from .views import db_status_page, status_page
 
 urlpatterns = [
     path("", include("home.urls")),
     path("projects/", include("projects.urls")),
     path("employees/", include("employees.urls")),
+    path("documents/", include("documents.urls")),
     path("admin/", admin.site.urls),
     path("accounts/", include("accounts.urls")),
     path("status-page/", status_page),
+    path("status-page/db/", db_status_page),
 ]
 
 
@@ -6,14 +6,21 @@ Methods:
         http_403: 403-page handler
         http_500: 500-page handler
         status_page: status page handler function
+        db_status_page: replica, connection pool, Markdown cache and file deletion metrics handler function
 """
 
 from django.db import OperationalError as dbOperationalError
 from django.db import connections, router
-from django.http import HttpResponse, HttpRequest, Http404
+from django.http import HttpResponse, HttpRequest, Http404, JsonResponse
 from django.shortcuts import render
 from psycopg2 import OperationalError as pgOperationalError
 
+from documents.helpers import pending_file_deletions
+from projects.rendering import markdown_cache
+
+from .dbpool.pool import pool_stats
+from .dbrouter import replica_monitor
+
 
 def http_404(request: HttpRequest, exception: Http404) -> HttpResponse:
     """Render and retrieve http response for 404 requests.
@@ -73,3 +80,26 @@ def status_page(request: HttpRequest) -> HttpResponse:
         return HttpResponse("DB connection Fail", status=500)
     else:
         return HttpResponse("DB connection is OK", status=200)
+
+
+def db_status_page(request: HttpRequest) -> JsonResponse:
+    """Retrieve replica state, read routing counters, connection pool and Markdown cache stats of current process.
+
+    Also retrieves number of pending document file deletions, it's shared by processes
+    only with shared cache backend, see `documents.helpers.track_pending_file_deletions`.
+
+    Args:
+        request: http GET request object
+
+    Returns:
+        JsonResponse with replica monitor, connection pool, Markdown render cache stats
+        and pending file deletions
+    """
+    return JsonResponse(
+        {
+            **replica_monitor.stats(),
+            "pools": pool_stats(),
+            "markdown_cache": markdown_cache.stats(),
+            "pending_file_deletions": pending_file_deletions(),
+        }
+    )
@@ -34,7 +34,7 @@ celery_app.conf.result_backend = REDIS_RESULTS_BACKEND
 
 celery_app.config_from_object(config)
 
-celery_app.autodiscover_tasks(["worker.email"])
+celery_app.autodiscover_tasks(["worker.email", "worker.rendering", "worker.documents", "worker.projects"])
 
 queue_names_list = [x.name for x in config.task_queue]
 
@@ -2,6 +2,7 @@
 Celery workers configuration module.
 """
 
+from celery.schedules import crontab
 from kombu import Exchange, Queue
 
 worker_prefetch_multiplier = 1
@@ -12,7 +13,14 @@ accept_content = ["json"]
 timezone = "Europe/Moscow"
 enable_utc = True
 
-task_routes = {"worker.email.*": {"queue": "email"}}
+task_routes = {
+    "worker.documents.tasks.generate_document_previews": {"queue": "previews"},
+    "worker.documents.tasks.extract_document_text": {"queue": "extraction"},
+    "worker.email.*": {"queue": "email"},
+    "worker.rendering.*": {"queue": "rendering"},
+    "worker.documents.*": {"queue": "documents"},
+    "worker.projects.*": {"queue": "projects"},
+}
 
 task_default_queue = "celery"
 task_default_exchange = "celery"
@@ -22,6 +30,22 @@ task_default_exchange_type = "direct"
 task_queue = {
     Queue("celery", Exchange("celery"), routing_key="celery"),
     Queue("email", Exchange("email"), routing_key="email"),
+    Queue("rendering", Exchange("rendering"), routing_key="rendering"),
+    Queue("documents", Exchange("documents"), routing_key="documents"),
+    Queue("previews", Exchange("previews"), routing_key="previews"),
+    Queue("extraction", Exchange("extraction"), routing_key="extraction"),
+    Queue("projects", Exchange("projects"), routing_key="projects"),
 }
 
 task_create_missing_queues = True
+
+beat_schedule = {
+    "collect-orphaned-documents": {
+        "task": "worker.documents.tasks.collect_orphaned_documents",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "purge-expired-chunked-uploads": {
+        "task": "worker.documents.tasks.purge_expired_chunked_uploads",
+        "schedule": crontab(minute=15),
+    },
+}
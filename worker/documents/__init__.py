@@ -0,0 +1,3 @@
+"""
+Celery documents tasks package.
+"""
@@ -0,0 +1,124 @@
+"""
+Celery documents tasks module.
+"""
+
+from datetime import timedelta
+from typing import List, Tuple
+
+from celery.utils.log import get_task_logger
+from django.apps import apps
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+
+from documents.extraction import TextUnavailable
+from documents.helpers import track_pending_file_deletions
+from documents.previews import PreviewUnavailable
+from worker.app import celery_app
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task(max_retries=5, default_retry_delay=60, autoretry_for=(OSError,))
+def delete_document_files(names: List[str]) -> int:
+    """Delete batch of document files from storage.
+
+    Files (documents and previews) referenced by documents again are kept. Content addressed
+    upload doesn't reuse file no document references, so file can't be referenced
+    again after it is checked here, see `Document.save`.
+    Batch is retried on storage errors, pending deletions counter
+    is decreased only when the batch is done.
+
+    Args:
+        names: storage names of files
+
+    Returns:
+        (int): number of deleted files
+    """
+    document_model = apps.get_model("documents", "Document")
+    # references are read from write database, replica may still have deleted documents
+    referenced = document_model.objects.using(router.db_for_write(document_model)).referenced_files(names)
+    storage = document_model._meta.get_field("document").storage
+    deleted = 0
+    for name in names:
+        if name not in referenced:
+            storage.delete(name)
+            deleted += 1
+    track_pending_file_deletions(-len(names))
+    return deleted
+
+
+@celery_app.task
+def collect_orphaned_documents(chunk_size: int = 500) -> Tuple[int, int]:
+    """Delete documents attached neither to projects nor to tasks (periodic task).
+
+    Args:
+        chunk_size: number of documents deleted in one transaction
+
+    Returns:
+        (tuple): number of deleted documents and reclaimed storage bytes
+    """
+    uploaded_before = timezone.now() - timedelta(seconds=settings.DOCUMENTS_ORPHAN_GRACE_PERIOD)
+    return apps.get_model("documents", "Document").objects.collect_orphaned(chunk_size, uploaded_before)
+
+
+@celery_app.task
+def purge_expired_chunked_uploads() -> int:
+    """Delete unfinished chunked uploads older than `DOCUMENTS_CHUNKED_UPLOAD_EXPIRE` (periodic task).
+
+    Returns:
+        (int): number of deleted uploads
+    """
+    created_before = timezone.now() - timedelta(seconds=settings.DOCUMENTS_CHUNKED_UPLOAD_EXPIRE)
+    deleted, _ = apps.get_model("documents", "ChunkedUpload").objects.filter(created__lt=created_before).delete()
+    return deleted
+
+
+@celery_app.task(max_retries=3, default_retry_delay=60, autoretry_for=(OSError,), acks_late=True)
+def generate_document_previews(pk: int) -> bool:
+    """Render document thumbnail and preview.
+
+    Task is routed to separate `previews` queue, so CPU heavy rendering
+    is done by dedicated worker processes with bounded concurrency.
+
+    Args:
+        pk: document primary key
+
+    Returns:
+        (bool): True if document has previews
+    """
+    document_model = apps.get_model("documents", "Document")
+    # document is read from write database, replica may not have it yet
+    document = document_model.objects.using(router.db_for_write(document_model)).filter(pk=pk).first()
+    if document is None:
+        return False
+    try:
+        return document.generate_previews()
+    except PreviewUnavailable as exc:
+        logger.warning("Document %s preview is not rendered: %s", pk, exc)
+        return False
+
+
+@celery_app.task(max_retries=3, default_retry_delay=60, autoretry_for=(OSError,), acks_late=True)
+def extract_document_text(pk: int) -> bool:
+    """Extract document text for full text search.
+
+    Task is routed to separate `extraction` queue processed
+    by dedicated worker processes with bounded concurrency.
+
+    Args:
+        pk: document primary key
+
+    Returns:
+        (bool): True if document text is stored
+    """
+    document_model = apps.get_model("documents", "Document")
+    # document is read from write database, replica may not have it yet
+    document = document_model.objects.using(router.db_for_write(document_model)).filter(pk=pk).first()
+    if document is None:
+        return False
+    try:
+        return document.extract_text() is not None
+    except TextUnavailable as exc:
+        logger.warning("Document %s text is not extracted: %s", pk, exc)
+        return False
@@ -0,0 +1,3 @@
+"""
+Celery projects tasks package.
+"""
@@ -0,0 +1,116 @@
+"""
+Celery projects tasks module.
+"""
+
+from celery.utils.log import get_task_logger
+from django.apps import apps
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import DatabaseError, router
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from projects.imports import ImportFileError, TaskImporter
+from projects.models import TaskJobStatus
+from worker.app import celery_app
+
+logger = get_task_logger(__name__)
+
+
+def start_job(jobs: QuerySet, pk: str, redelivered: bool) -> bool:
+    """Mark pending bulk task job running.
+
+    Job is started once, redelivered message of started job is ignored.
+    Broker redelivers unacknowledged message when worker processing it was lost,
+    so job left running by lost worker is marked failed instead of staying running forever.
+
+    Args:
+        jobs: job queryset of write database
+        pk: job primary key
+        redelivered: message was redelivered by broker
+
+    Returns:
+        (bool): True if job is started
+    """
+    if jobs.filter(pk=pk, status=TaskJobStatus.PENDING).update(status=TaskJobStatus.RUNNING):
+        return True
+    if redelivered:
+        jobs.filter(pk=pk, status=TaskJobStatus.RUNNING).update(status=TaskJobStatus.FAILED, finished=timezone.now())
+    return False
+
+
+@celery_app.task(bind=True, acks_late=True)
+def import_tasks(self, pk: str, batch_size: int = 1000) -> int:
+    """Import tasks from uploaded file of `TaskImport`.
+
+    Import progress (counters and row errors) is stored after every batch,
+    uploaded file is deleted when import is finished, import failed
+    with unexpected error is marked failed too.
+
+    Args:
+        pk: task import primary key
+        batch_size: number of tasks inserted at once
+
+    Returns:
+        (int): number of created tasks
+    """
+    model = apps.get_model("projects", "TaskImport")
+    # job is read from write database, replica may not have it yet
+    jobs = model.objects.using(router.db_for_write(model))
+    if not start_job(jobs, pk, bool((self.request.delivery_info or {}).get("redelivered"))):
+        return 0
+    task_import = jobs.get(pk=pk)
+
+    def save_progress(importer: TaskImporter, **kwargs) -> None:
+        jobs.filter(pk=pk).update(
+            processed=importer.processed,
+            imported=importer.imported,
+            failed=importer.failed,
+            errors=importer.errors,
+            **kwargs,
+        )
+
+    importer = TaskImporter(using=jobs.db, batch_size=batch_size, on_progress=save_progress)
+    status = TaskJobStatus.FAILED
+    try:
+        with task_import.file.open("rb") as file:
+            importer.run(file, task_import.format)
+    except (ImportFileError, OSError) as exc:
+        logger.warning("Task import %s failed: %s", pk, exc)
+        importer.errors.insert(0, {"line": None, "errors": {NON_FIELD_ERRORS: [str(exc)]}})
+    else:
+        status = TaskJobStatus.DONE
+    finally:
+        task_import.file.delete(save=False)
+        save_progress(importer, status=status, finished=timezone.now(), file="")
+    return importer.imported
+
+
+@celery_app.task(bind=True, acks_late=True)
+def update_tasks(self, pk: str, chunk_size: int = 1000) -> int:
+    """Apply `TaskBulkUpdate` to its tasks in chunks, storing progress after every chunk.
+
+    Update failed with unexpected error is marked failed too.
+
+    Args:
+        pk: task bulk update primary key
+        chunk_size: number of tasks updated at once
+
+    Returns:
+        (int): number of updated tasks
+    """
+    model = apps.get_model("projects", "TaskBulkUpdate")
+    # job is read from write database, replica may not have it yet
+    jobs = model.objects.using(router.db_for_write(model))
+    if not start_job(jobs, pk, bool((self.request.delivery_info or {}).get("redelivered"))):
+        return 0
+    bulk_update = jobs.get(pk=pk)
+    status = TaskJobStatus.FAILED
+    try:
+        bulk_update.apply(chunk_size)
+    except DatabaseError as exc:
+        logger.warning("Task bulk update %s failed: %s", pk, exc)
+    else:
+        status = TaskJobStatus.DONE
+    finally:
+        jobs.filter(pk=pk).update(status=status, finished=timezone.now())
+    return bulk_update.updated
@@ -0,0 +1,3 @@
+"""
+Celery Markdown rendering tasks package.
+"""
@@ -0,0 +1,37 @@
+"""
+Celery Markdown rendering tasks module.
+"""
+
+from django.apps import apps
+from django.db import DatabaseError, router
+from markdown import markdown
+
+from projects.rendering import markdown_digest
+from worker.app import celery_app
+
+
+@celery_app.task(max_retries=5, default_retry_delay=60, autoretry_for=(DatabaseError,))
+def render_description_html(model: str, pk: int, digest: str) -> bool:
+    """Render Markdown description of model instance and store html.
+
+    Args:
+        model: model label, e.g. `projects.Task`
+        pk: instance primary key
+        digest: content hash of description the job was scheduled for
+
+    Returns:
+        (bool): True if html was stored, False if instance is gone
+            or its description was changed since job was scheduled
+    """
+    model_class = apps.get_model(model)
+    # description is read from write database, replica may not have it yet
+    rows = model_class.objects.using(router.db_for_write(model_class))
+    row = rows.filter(pk=pk).values("description").first()
+    if row is None or markdown_digest(row["description"]) != digest:
+        return False
+    html = markdown(row["description"] or "")
+    # description could be changed while rendering
+    updated = rows.filter(pk=pk, description=row["description"]).update(
+        description_html=html, description_digest=digest
+    )
+    return bool(updated)
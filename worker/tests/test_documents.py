@@ -0,0 +1,114 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from documents.helpers import pending_file_deletions, track_pending_file_deletions
+from documents.models import ChunkedUpload, Document
+from documents.extraction import TextUnavailable
+from documents.previews import PreviewUnavailable
+from worker.documents.tasks import (
+    collect_orphaned_documents,
+    delete_document_files,
+    extract_document_text,
+    generate_document_previews,
+    purge_expired_chunked_uploads,
+)
+
+
+class DeleteDocumentFilesTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        Document.objects.create(title="reused", document="documents/reused.txt")
+
+    def test_delete_document_files(self):
+        self.assertEqual(track_pending_file_deletions(2), 2)
+        with mock.patch("django.core.files.storage.FileSystemStorage.delete") as storage_delete:
+            self.assertEqual(delete_document_files(["documents/deleted.txt", "documents/reused.txt"]), 1)
+        storage_delete.assert_called_once_with("documents/deleted.txt")
+        self.assertEqual(pending_file_deletions(), 0)
+
+    def test_delete_document_files_reads_write_database(self):
+        track_pending_file_deletions(1)
+        # replica alias doesn't exist, so any read from it fails
+        with mock.patch.object(router, "db_for_read", return_value="replica"):
+            with mock.patch("django.core.files.storage.FileSystemStorage.delete") as storage_delete:
+                self.assertEqual(delete_document_files(["documents/reused.txt"]), 0)
+        storage_delete.assert_not_called()
+        self.assertEqual(pending_file_deletions(), 0)
+
+    def test_delete_document_files_storage_error(self):
+        track_pending_file_deletions(1)
+        with mock.patch("django.core.files.storage.FileSystemStorage.delete", side_effect=OSError):
+            with self.assertRaises(OSError):
+                delete_document_files.run(["documents/deleted.txt"])
+        # batch will be retried, it's still pending
+        self.assertEqual(pending_file_deletions(), 1)
+        self.assertIn(OSError, delete_document_files.autoretry_for)
+
+    def test_pending_file_deletions_never_negative(self):
+        self.assertEqual(pending_file_deletions(), 0)
+        self.assertEqual(track_pending_file_deletions(-3), 0)
+        self.assertEqual(pending_file_deletions(), 0)
+
+
+class CollectOrphanedDocumentsTaskTestCase(TestCase):
+    def test_collect_orphaned_documents(self):
+        with mock.patch("documents.models.DocumentQuerySet.collect_orphaned", return_value=(1, 10)) as collect:
+            self.assertEqual(collect_orphaned_documents(100), (1, 10))
+        chunk_size, uploaded_before = collect.call_args.args
+        self.assertEqual(chunk_size, 100)
+        self.assertLess(
+            uploaded_before, timezone.now() - timedelta(seconds=settings.DOCUMENTS_ORPHAN_GRACE_PERIOD - 60)
+        )
+
+
+class PurgeExpiredChunkedUploadsTaskTestCase(TestCase):
+    def test_purge_expired_chunked_uploads(self):
+        user = get_user_model().objects.create_user(email="user@example.com", password="password")
+        expired = ChunkedUpload.objects.create(user=user, filename="expired.txt", size=1)
+        ChunkedUpload.objects.filter(pk=expired.pk).update(created=timezone.now() - timedelta(days=2))
+        ChunkedUpload.objects.create(user=user, filename="active.txt", size=1)
+        with tempfile.TemporaryDirectory() as upload_dir:
+            with override_settings(DOCUMENTS_CHUNKED_UPLOAD_DIR=upload_dir):
+                open(expired.path, "wb").close()
+                self.assertEqual(purge_expired_chunked_uploads(), 1)
+                self.assertFalse(os.path.exists(expired.path))
+        self.assertEqual(list(ChunkedUpload.objects.values_list("filename", flat=True)), ["active.txt"])
+
+
+class GenerateDocumentPreviewsTaskTestCase(TestCase):
+    def test_generate_document_previews(self):
+        document = Document.objects.create(title="scan.pdf")
+        with mock.patch("documents.models.Document.generate_previews", return_value=True) as generate:
+            # replica alias doesn't exist, so any read from it fails
+            with mock.patch.object(router, "db_for_read", return_value="replica"):
+                self.assertTrue(generate_document_previews(document.pk))
+            generate.side_effect = PreviewUnavailable("pdftoppm is not installed")
+            with self.assertLogs("worker.documents.tasks", "WARNING"):
+                self.assertFalse(generate_document_previews(document.pk))
+            self.assertFalse(generate_document_previews(0))
+        self.assertEqual(generate.call_count, 2)
+
+
+class ExtractDocumentTextTaskTestCase(TestCase):
+    def test_extract_document_text(self):
+        document = Document.objects.create(title="notes.txt")
+        with mock.patch("documents.models.Document.extract_text", return_value=None) as extract:
+            self.assertFalse(extract_document_text(document.pk))
+            extract.return_value = mock.Mock()
+            # replica alias doesn't exist, so any read from it fails
+            with mock.patch.object(router, "db_for_read", return_value="replica"):
+                self.assertTrue(extract_document_text(document.pk))
+            extract.side_effect = TextUnavailable("pdftotext is not installed")
+            with self.assertLogs("worker.documents.tasks", "WARNING"):
+                self.assertFalse(extract_document_text(document.pk))
+            self.assertFalse(extract_document_text(0))
+        self.assertEqual(extract.call_count, 3)
@@ -0,0 +1,81 @@
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from projects.imports import TaskImporter
+from projects.models import Project, Task, TaskImport, TaskJobStatus
+from worker.projects.tasks import import_tasks, start_job
+
+
+class ImportTasksTaskTestCase(TestCase):
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.project = Project.objects.create(title="Roof")
+
+    def create_import(self, content: bytes, format: str = "ndjson") -> TaskImport:
+        task_import = TaskImport(format=format)
+        task_import.file.save(f"tasks.{format}", ContentFile(content))
+        return task_import
+
+    def test_import_tasks(self):
+        task_import = self.create_import(
+            f'{{"project": {self.project.pk}, "title": "One"}}\n{{"project": 0, "title": "Two"}}\n'.encode()
+        )
+        path = task_import.file.path
+        self.assertEqual(import_tasks(str(task_import.pk), batch_size=1), 1)
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.status, TaskJobStatus.DONE)
+        self.assertEqual((task_import.processed, task_import.imported, task_import.failed), (2, 1, 1))
+        self.assertEqual(task_import.errors[0]["line"], 2)
+        self.assertIsNotNone(task_import.finished)
+        self.assertEqual(task_import.file.name, "")
+        self.assertFalse(task_import.file.storage.exists(path))
+        self.assertTrue(task_import.is_finished)
+        self.assertEqual(str(task_import), f"{task_import.pk}: done (1/2)")
+        self.assertEqual(list(Task.objects.values_list("title", flat=True)), ["One"])
+
+        # redelivered message
+        self.assertEqual(import_tasks(str(task_import.pk)), 0)
+
+    def test_import_tasks_failed(self):
+        task_import = self.create_import(f"project,title\n{self.project.pk},One\n".encode() + b"\xff\n", "csv")
+        self.assertEqual(import_tasks(str(task_import.pk)), 0)
+        task_import.refresh_from_db()
+        self.assertEqual((task_import.status, task_import.processed), (TaskJobStatus.FAILED, 0))
+        self.assertIsNone(task_import.errors[0]["line"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_import_tasks_missing_file(self):
+        task_import = TaskImport.objects.create(file="imports/missing.csv", format="csv")
+        import_tasks(str(task_import.pk))
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.status, TaskJobStatus.FAILED)
+
+    def test_import_tasks_unexpected_error(self):
+        task_import = self.create_import(f'{{"project": {self.project.pk}, "title": "One"}}\n'.encode())
+        path = task_import.file.path
+        with mock.patch.object(TaskImporter, "run", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                import_tasks(str(task_import.pk))
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.status, TaskJobStatus.FAILED)
+        self.assertIsNotNone(task_import.finished)
+        self.assertFalse(task_import.file.storage.exists(path))
+
+    def test_import_tasks_lost_worker(self):
+        task_import = self.create_import(b"")
+        TaskImport.objects.filter(pk=task_import.pk).update(status=TaskJobStatus.RUNNING)
+        self.assertEqual(import_tasks.apply(args=(str(task_import.pk),)).get(), 0)
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.status, TaskJobStatus.RUNNING)
+
+        self.assertFalse(start_job(TaskImport.objects.all(), str(task_import.pk), redelivered=True))
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.status, TaskJobStatus.FAILED)
+        self.assertIsNotNone(task_import.finished)
@@ -0,0 +1,29 @@
+from unittest import mock
+
+from django.db import router
+from django.test import TestCase
+
+from projects.models import Project, Task
+from projects.rendering import markdown_digest
+from worker.rendering.tasks import render_description_html
+
+
+class RenderDescriptionHtmlTestCase(TestCase):
+    def setUp(self) -> None:
+        self.project = Project.objects.create(title="Test project")
+        self.task = Task.objects.create(title="Test task", project=self.project, description="old")
+        Task.objects.filter(pk=self.task.pk).update(description="*new*")
+
+    def test_render_description_html(self):
+        # replica alias doesn't exist, so any read from it fails
+        with mock.patch.object(router, "db_for_read", return_value="replica"):
+            self.assertTrue(render_description_html("projects.Task", self.task.pk, markdown_digest("*new*")))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.description_html, "<p><em>new</em></p>")
+        self.assertTrue(self.task.description_html_is_fresh)
+
+    def test_render_description_html_stale_job(self):
+        self.assertFalse(render_description_html("projects.Task", self.task.pk, markdown_digest("old")))
+        self.assertFalse(render_description_html("projects.Task", 0, markdown_digest("*new*")))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.description_html, "<p>old</p>")